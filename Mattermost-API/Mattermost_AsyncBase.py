@@ -0,0 +1,385 @@
+from typing import Union, Callable, BinaryIO, AsyncIterator, Awaitable
+import asyncio
+import contextvars
+import logging
+import os
+import time
+
+from Mattermost_Base import Base, RequestSpec, _CallState
+from Mattermost_Errors import Response, MattermostError, MattermostConnectionError, MattermostTimeoutError
+from Mattermost_Files import BLOCK_SIZE, MultipartBody, DownloadSink
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+logger = logging.getLogger(__name__)
+
+# aiohttp < 3.10 does not tell a connect timeout from a read timeout
+_CONNECT_TIMEOUT = getattr(aiohttp, 'ConnectionTimeoutError', ())
+
+
+def create_async_session(pool_maxsize: int = 100,
+                         limit_per_host: int = 0,
+                         keep_alive: bool = True):
+    """
+        Создает асинхронную сессию aiohttp с общим пулом соединений.
+        Должна вызываться внутри запущенного event loop.
+
+        :param pool_maxsize: Максимальное количество одновременных соединений (0 - без ограничения).
+        :type pool_maxsize: :obj:`base.Integer`
+        :param limit_per_host: Максимальное количество соединений к одному хосту (0 - без ограничения).
+        :type limit_per_host: :obj:`base.Integer`
+        :param keep_alive: Переиспользовать ли соединения между запросами.
+        :type keep_alive: :obj:`base.Boolean`
+        :return: Сессия для выполнения запросов.
+        :rtype: :obj:`aiohttp.ClientSession`
+    """
+    if aiohttp is None:
+        raise ImportError("Async client requires aiohttp: pip install aiohttp")
+
+    connector = aiohttp.TCPConnector(limit=pool_maxsize,
+                                     limit_per_host=limit_per_host,
+                                     force_close=not keep_alive)
+    return aiohttp.ClientSession(connector=connector)
+
+
+class _TaskState(_CallState):
+    """
+        Атрибут асинхронного клиента, значение которого хранится отдельно для каждой задачи asyncio.
+        Задачи одного event loop выполняются в одном потоке, поэтому хранить данные вызова
+        в threading.local нельзя: ответ одной задачи подменял бы ответ другой.
+    """
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance._context.get().get(self.name)
+
+    def __set__(self, instance, value):
+        # the mapping is replaced, not changed, so tasks started earlier keep their own copy
+        instance._context.set(dict(instance._context.get(), **{self.name: value}))
+
+
+class AsyncBase(Base):
+    headers = _TaskState()
+    body = _TaskState()
+    data = _TaskState()
+    cookies = _TaskState()
+    files = _TaskState()
+    content = _TaskState()
+    error_desc = _TaskState()
+    response = _TaskState()
+
+    def __init__(self, token: str,
+                 server_url: str,
+                 semaphore: asyncio.Semaphore = None,
+                 session_factory: Callable[[], 'aiohttp.ClientSession'] = None,
+                 **kwargs):
+        self._context = contextvars.ContextVar(f'mattermost_call_{id(self)}', default={})
+        self.semaphore = semaphore
+        self.session_factory = session_factory if session_factory is not None else create_async_session
+        super().__init__(token, server_url, **kwargs)
+
+    def new_session(self):
+        """
+            Сессия aiohttp создается при первом запросе, когда уже запущен event loop,
+            вызовом session_factory (по умолчанию - create_async_session).
+        """
+        return None
+
+    def client_timeout(self):
+        """
+            Переводит timeout клиента (секунды или пара (connect, read)) в таймаут aiohttp.
+
+            :return: Таймаут запроса или None, если используется таймаут сессии.
+            :rtype: :obj:`aiohttp.ClientTimeout`
+        """
+        if self.timeout is None:
+            return None
+        if isinstance(self.timeout, tuple):
+            connect, read = self.timeout
+            return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        return aiohttp.ClientTimeout(total=self.timeout)
+
+    async def send(self, spec: RequestSpec) -> dict:
+        """
+          Выполняет асинхронный запрос по его описанию, отвечая из кэша объектов, если это возможно.
+          Одновременные одинаковые GET-запросы объединяются в один, если задан singleflight.
+          Описание собирается синхронно при вызове метода клиента, поэтому следующий вызов
+          может начинаться до того, как будет дождан результат предыдущего.
+          Ответ (response) и ошибка (error_desc) хранятся отдельно для каждой задачи asyncio;
+          у объединенных запросов они не сохраняются, так как запрос выполняет отдельная задача.
+
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :return: Словарь с результатами запроса.
+          :rtype: :obj:'typing.Dict'
+        """
+
+        key = self.object_cache_key(spec)
+        if key is not None:
+            found, result = self.object_cache.get(key)
+            if found:
+                return result
+
+        flight_key = self.singleflight_key(spec)
+        if flight_key is not None:
+            result = await self.singleflight.do(flight_key, lambda: self.perform(spec))
+        else:
+            result = await self.perform(spec)
+        self.object_cache_store(key, spec, result)
+        return result
+
+    async def perform(self, spec: RequestSpec) -> dict:
+        """
+          Выполняет асинхронный HTTP-запрос по его описанию.
+
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :return: Тело ответа.
+          :rtype: :obj:'typing.Dict'
+          :raises MattermostConnectionError: Соединение не установлено или оборвалось.
+          :raises MattermostTimeoutError: Сервер не ответил вовремя.
+          :raises HTTPError: Сервер ответил ошибкой, тип исключения зависит от статуса.
+        """
+
+        if self.session is None:
+            self.session = self.session_factory()
+
+        cache_key, cached = self.etag_lookup(spec)
+        headers = dict(spec.headers)
+        if cached is not None:
+            headers['If-None-Match'] = cached.etag
+        data = None
+        if spec.files is not None:
+            # files are streamed from memory-mapped views instead of being copied into the body
+            data = MultipartBody(spec.files)
+            headers['Content-Type'] = data.content_type
+            if hasattr(data, 'len'):
+                headers['Content-Length'] = str(data.len)
+        elif spec.content is not None:
+            data = spec.content
+
+        started = time.monotonic()
+        try:
+            if self.semaphore is not None:
+                async with self.semaphore:
+                    return await self._perform(spec, headers, data, cache_key, cached, started)
+            return await self._perform(spec, headers, data, cache_key, cached, started)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+            error_class = MattermostConnectionError
+            if isinstance(err, asyncio.TimeoutError) and not isinstance(err, _CONNECT_TIMEOUT):
+                error_class = MattermostTimeoutError
+            self.error_desc = error_class(f"{spec.method} {spec.url}: {err!r}")
+            logger.debug("Request failed: %s", self.error_desc)
+            raise self.error_desc from err
+        except MattermostError as err:
+            self.error_desc = err
+            raise
+        finally:
+            if spec.files is not None:
+                data.close()
+
+    async def download(self, url: str,
+                       file: Union[str, os.PathLike, BinaryIO],
+                       size: int = None,
+                       sha256: str = None,
+                       progress: Callable[[int, Union[int, None]], None] = None,
+                       max_resumes: int = 10,
+                       chunk_size: int = BLOCK_SIZE) -> dict:
+        """
+          Асинхронно скачивает бинарный ответ сервера потоком в файл с докачкой после обрывов.
+          Параметры и результат те же, что у Base.download. Запись в файл выполняется вне event loop.
+          Скачивание занимает место в общем лимите одновременных запросов, как и perform.
+        """
+
+        if self.semaphore is not None:
+            async with self.semaphore:
+                return await self._download(url, file, size, sha256, progress, max_resumes, chunk_size)
+        return await self._download(url, file, size, sha256, progress, max_resumes, chunk_size)
+
+    async def _download(self, url: str, file, size: int, sha256: str, progress, max_resumes: int,
+                        chunk_size: int) -> dict:
+        if self.session is None:
+            self.session = self.session_factory()
+
+        spec = self.build_request(url, request_type='GET')._replace(stream=True)
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        # an existing .part file is hashed when the sink is opened
+        sink = await loop.run_in_executor(None, DownloadSink, file)
+        try:
+            resumes = 0
+            while True:
+                # byte ranges must address the stored file, not a compressed representation of it
+                headers = dict(spec.headers, **{'Accept-Encoding': 'identity'}, **sink.request_headers())
+                try:
+                    async with await self._http_request(spec, headers, None) as response:
+                        self.response = Response(spec.method, spec.url, response.status, response.headers, b'',
+                                                 time.monotonic() - started)
+                        if response.status >= 300 and not (response.status == 416 and sink.offset):
+                            self.read_response(self.response._replace(content=await response.read()), None, None)
+                        if sink.begin(response.status, response.headers):
+                            async for block in response.content.iter_chunked(chunk_size):
+                                await loop.run_in_executor(None, sink.write, block)
+                                if progress is not None:
+                                    progress(sink.offset, sink.total)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                    error = err
+                else:
+                    if sink.complete:
+                        return await loop.run_in_executor(None, sink.finish, size, sha256)
+                    error = None
+
+                resumes += 1
+                if resumes > max_resumes:
+                    error_class = MattermostConnectionError
+                    if isinstance(error, asyncio.TimeoutError) and not isinstance(error, _CONNECT_TIMEOUT):
+                        error_class = MattermostTimeoutError
+                    raise error_class(f"{spec.method} {spec.url}: download interrupted at {sink.offset} "
+                                      f"of {sink.total} bytes: {error!r}") from error
+                logger.debug("Resuming download of %s at %d bytes after %r", spec.url, sink.offset, error)
+        except MattermostError as err:
+            self.error_desc = err
+            raise
+        finally:
+            sink.close()
+
+    async def _perform(self, spec: RequestSpec, headers: dict, data, cache_key, cached, started: float) -> dict:
+        response = await self._http_request(spec, headers, data)
+        response = Response(spec.method, spec.url, response.status, response.headers, await response.read(),
+                            time.monotonic() - started)
+        return self.read_response(response, cache_key, cached)
+
+    async def _http_request(self, spec: RequestSpec, headers: dict, data) -> 'aiohttp.ClientResponse':
+        """
+          Асинхронный вариант Base._http_request: лимит частоты запросов, автомат и повторы
+          по политике retry_policy, общие для perform и download.
+          Тело ответа читается сразу, если запрос не потоковый (spec.stream), поэтому обрыв
+          соединения при чтении тела повторяется, как любой сбой сети. Потоковый ответ
+          нужно закрыть после чтения.
+
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :param headers: Заголовки запроса.
+          :param data: Тело запроса, если оно не JSON.
+          :return: Ответ сервера.
+          :rtype: :obj:`aiohttp.ClientResponse`
+        """
+
+        circuit = self.circuit_breaker.key(spec.url) if self.circuit_breaker is not None else None
+        limited = 0
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.acquire()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            # the half-open probe slot is taken only once the request is about to be sent
+            if circuit is not None:
+                self.circuit_breaker.before(circuit)
+            try:
+                response = await self.session.request(method=spec.method,
+                                                      url=spec.url,
+                                                      headers=headers,
+                                                      params=spec.params,
+                                                      json=spec.json if data is None else None,
+                                                      data=data,
+                                                      cookies=spec.cookies,
+                                                      timeout=self.client_timeout())
+                if not spec.stream:
+                    await response.read()
+            except Exception as err:
+                if circuit is not None:
+                    self.circuit_breaker.record(circuit, success=False)
+                delay = self.retry_delay(spec, attempt, error=err)
+                if delay is None:
+                    raise
+            except BaseException:
+                # a cancelled probe tells nothing about the server
+                if circuit is not None:
+                    self.circuit_breaker.release(circuit)
+                raise
+            else:
+                if circuit is not None:
+                    self.circuit_breaker.record(circuit, success=response.status < 500)
+                if (self.rate_limiter is not None
+                        and self.rate_limiter.update(response.status, response.headers)
+                        and spec.files is None
+                        and limited < self.rate_limiter.max_retries):
+                    limited += 1
+                    # a streamed response holds its connection until it is released
+                    response.release()
+                    continue
+                delay = self.retry_delay(spec, attempt, response.status, response.headers)
+                if delay is None:
+                    return response
+                response.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @staticmethod
+    async def paginate(fetch_page: Callable[[int], Awaitable[list]],
+                       per_page: int,
+                       page: int = 0) -> AsyncIterator[list]:
+        """
+          Асинхронный вариант Base.paginate: fetch_page возвращает awaitable со списком элементов страницы.
+
+          :param fetch_page: Функция, возвращающая awaitable со списком элементов страницы по ее номеру.
+          :param per_page: Размер страницы, запрошенный у сервера.
+          :type per_page: :obj:`base.Integer`
+          :param page: Номер первой страницы.
+          :type page: :obj:`base.Integer`
+          :return: Асинхронный итератор по непустым страницам.
+        """
+        while True:
+            items = await fetch_page(page)
+            if items:
+                yield items
+            if len(items) < per_page:
+                return
+            page += 1
+
+    @staticmethod
+    def prefetch_pages(pages: AsyncIterator[list], depth: int) -> AsyncIterator[list]:
+        """
+          Асинхронный вариант Base.prefetch_pages: следующие страницы запрашивает отдельная задача asyncio.
+
+          :param pages: Асинхронный итератор по страницам.
+          :param depth: Сколько страниц можно получить заранее, не меньше 1.
+          :type depth: :obj:`base.Integer`
+          :return: Асинхронный итератор по тем же страницам.
+          :raises ValueError: depth меньше 1.
+        """
+        if depth < 1:
+            raise ValueError(f"Prefetch depth must be at least 1, got {depth}")
+        return AsyncBase._prefetched_pages(pages, depth)
+
+    @staticmethod
+    async def _prefetched_pages(pages: AsyncIterator[list], depth: int) -> AsyncIterator[list]:
+        buffer = asyncio.Queue(maxsize=depth)
+        done = object()
+
+        async def produce() -> None:
+            try:
+                async for page in pages:
+                    await buffer.put(page)
+            except Exception as err:
+                await buffer.put((done, err))
+                return
+            await buffer.put((done, None))
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await buffer.get()
+                if isinstance(item, tuple) and item[0] is done:
+                    if item[1] is not None:
+                        raise item[1]
+                    return
+                yield item
+        finally:
+            producer.cancel()
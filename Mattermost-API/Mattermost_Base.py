@@ -1,19 +1,148 @@
-from typing import Union
+from typing import Union, NamedTuple, Callable, Iterator, BinaryIO
+import json
+import logging
 import os
+import queue
+import threading
+import time
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from Mattermost_Cache import ETagCache, ObjectCache
+from Mattermost_CircuitBreaker import CircuitBreaker
+from Mattermost_Errors import (Response, MattermostError, MattermostConnectionError, MattermostTimeoutError,
+                               error_for_response)
+from Mattermost_Files import BLOCK_SIZE, FileLike, MultipartBody, DownloadSink
+from Mattermost_RateLimit import RateLimiter
+from Mattermost_Retry import RetryPolicy
+from Mattermost_Singleflight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TYPES = {
+    'GET': 'GET',
+    'POST': 'POST',
+    'PUT': 'PUT',
+    'DELETE': 'DELETE',
+    'DEL': 'DELETE',
+    'PATCH': 'PATCH',
+}
+
+
+class RequestSpec(NamedTuple):
+    """
+        Неизменяемое описание одного запроса.
+    """
+    method: str
+    url: str
+    headers: dict
+    params: dict = None
+    json: dict = None
+    cookies: dict = None
+    files: dict = None
+    content: Union[bytes, memoryview] = None
+    cache: tuple = None
+    invalidate: tuple = None
+    stream: bool = False
+
+
+class _CallState:
+    """
+        Атрибут клиента, значение которого хранится отдельно для каждого потока.
+        Позволяет использовать один экземпляр клиента из нескольких потоков:
+        данные, накопленные одним вызовом, не видны вызовам из других потоков.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return getattr(instance._local, self.name, None)
+
+    def __set__(self, instance, value):
+        setattr(instance._local, self.name, value)
+
+
+def create_session(pool_connections: int = 10,
+                   pool_maxsize: int = 10,
+                   pool_block: bool = False,
+                   keep_alive: bool = True) -> requests.Session:
+    """
+        Создает сессию с пулом keep-alive соединений.
+
+        :param pool_connections: Количество хостов, для которых кэшируются пулы соединений.
+        :type pool_connections: :obj:`base.Integer`
+        :param pool_maxsize: Максимальное количество соединений к одному хосту.
+        :type pool_maxsize: :obj:`base.Integer`
+        :param pool_block: Ждать освобождения соединения, если пул хоста исчерпан,
+        вместо открытия дополнительного соединения.
+        :type pool_block: :obj:`base.Boolean`
+        :param keep_alive: Переиспользовать ли соединения между запросами.
+        :type keep_alive: :obj:`base.Boolean`
+        :return: Сессия для выполнения запросов.
+        :rtype: :obj:`requests.Session`
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=pool_block)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not keep_alive:
+        session.headers.update({'Connection': 'close'})
+    return session
 
 
 class Base:
-    def __init__(self, token: str, server_url: str, version: str = "v4"):
+    headers = _CallState()
+    body = _CallState()
+    data = _CallState()
+    cookies = _CallState()
+    files = _CallState()
+    content = _CallState()
+    error_desc = _CallState()
+    response = _CallState()
+
+    def __init__(self, token: str,
+                 server_url: str,
+                 version: str = "v4",
+                 session: requests.Session = None,
+                 etag_cache: ETagCache = None,
+                 object_cache: ObjectCache = None,
+                 singleflight: SingleFlight = None,
+                 timeout: Union[float, tuple] = None,
+                 rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None):
+        self._local = threading.local()
         self.token = f"Bearer {token}"
         self.headers = {'Authorization': f'{self.token}'}
         self.base_url = server_url.rstrip('/') + '/api/' + version.rstrip('/')
+        self.session = session if session is not None else self.new_session()
+        self.etag_cache = etag_cache
+        self.object_cache = object_cache
+        self.singleflight = singleflight
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
         self.body = None
         self.data = None
         self.cookies = None
         self.error_desc = None
+        self.response = None
         self.files = None
+        self.content = None
+
+    def new_session(self):
+        """
+            Создает сессию для клиента, которому не передали общую сессию.
+        """
+        return create_session()
 
     def reset(self) -> None:
         """
@@ -22,6 +151,10 @@ class Base:
         self.body = None
         self.data = None
         self.cookies = None
+        self.files = None
+        self.content = None
+        self.error_desc = None
+        self.response = None
         self.headers = {'Authorization': f'{self.token}'}
 
     def add_cookie(self, key: str, value: str) -> None:
@@ -52,6 +185,21 @@ class Base:
             self.data = {}
         self.data.update({key: value})
 
+    def query_params(self) -> dict:
+        """
+            Возвращает query Parameters в виде, пригодном для строки запроса.
+            Логические значения передаются как true/false, как их ожидает сервер.
+
+            :return: Словарь query Parameters.
+            :rtype: :obj:'typing.Dict'
+        """
+        params = {}
+        for key, value in self.data.items():
+            if isinstance(value, bool):
+                value = 'true' if value else 'false'
+            params[key] = value
+        return params
+
     def add_application_json_header(self) -> None:
         """
             Добавляет заголовок в запрос для отправки JSON.
@@ -68,6 +216,14 @@ class Base:
             self.headers = {}
         self.headers.update({'Content-Type': 'application/x-www-form-urlencoded'})
 
+    def add_application_octet_stream_header(self) -> None:
+        """
+            Добавляет заголовок в запрос для отправки бинарных данных.
+        """
+        if self.headers is None:
+            self.headers = {}
+        self.headers.update({'Content-Type': 'application/octet-stream'})
+
     def add_multipart_form_data_header(self) -> None:
         """
             Добавляет заголовок в запрос для отправки multipart/form-data.
@@ -90,34 +246,46 @@ class Base:
             self.body = {}
         self.body.update({key: value})
 
-    def add_file(self, file_path: str) -> None:
+    def set_content(self, content: Union[bytes, memoryview]) -> None:
         """
-        Добавляет файл к телу запроса.
+          Задает бинарное тело запроса, которое отправляется как есть.
 
-        :param file_path: Полный путь до файла.
+          :param content: Тело запроса.
         """
+        self.content = content
 
-        data = None
+    def add_file(self, file_path: FileLike, name: str = None, filename: str = None) -> None:
+        """
+        Добавляет файл к телу запроса multipart/form-data.
+        Файл не читается в память: при отправке он отображается в память (mmap)
+        и передается в сокет без промежуточных копий.
 
-        try:
-            with open(file_path, 'r') as f:
-                data = f.read()
-        except Exception as err:
-            return
+        :param file_path: Полный путь до файла, открытый бинарный файловый объект, bytes, memoryview или mmap.
+        :param name: Имя поля формы. По умолчанию: имя файла.
+        :type name: :obj:`base.String`
+        :param filename: Имя файла. По умолчанию: имя файла из пути или атрибута name файлового объекта.
+        :type filename: :obj:`base.String`
+        """
+
+        if filename is None and isinstance(file_path, (str, os.PathLike)):
+            filename = os.path.basename(file_path)
+        elif filename is None and isinstance(getattr(file_path, 'name', None), str):
+            filename = os.path.basename(file_path.name)
 
         if self.files is None:
             self.files = {}
 
-        filename = os.path.basename(file_path)
-
-        self.files.update({filename: (filename, data)})
+        self.files.update({name or filename or 'file': (filename, file_path)})
 
     def request(self, url: str,
                 params: bool = None,
                 body: bool = None,
                 cookies: bool = None,
                 files: bool = None,
-                request_type: str = 'GET') -> dict:
+                request_type: str = 'GET',
+                cache: tuple = None,
+                invalidate: tuple = None,
+                content: bool = None) -> dict:
         """
           Делает запрос с указанными параметрами по URL
 
@@ -132,36 +300,468 @@ class Base:
           :param files: Прикрепленные файлы.
           :param request_type: Метод запроса.
           :type request_type: :obj:`base.String`
+          :param cache: Ресурс (вид, идентификатор), под которым результат можно хранить в кэше объектов.
+          :param invalidate: Начало ключа записей кэша объектов, которые устаревают после запроса.
+          :param content: Передавать ли в запросе бинарное тело.
+          :type content: :obj:`base.Boolean`
           :return: Словарь с результатами запроса.
           :rtype: :obj:'typing.Dict'
         """
 
-        requests_types = {
-            'GET': requests.get,
-            'POST': requests.post,
-            'PUT': requests.put,
-            'DELETE': requests.delete,
-            'PATCH': requests.patch,
-        }
+        return self.send(self.build_request(url,
+                                            params=params,
+                                            body=body,
+                                            cookies=cookies,
+                                            files=files,
+                                            request_type=request_type,
+                                            cache=cache,
+                                            invalidate=invalidate,
+                                            content=content))
+
+    def build_request(self, url: str,
+                      params: bool = None,
+                      body: bool = None,
+                      cookies: bool = None,
+                      files: bool = None,
+                      request_type: str = 'GET',
+                      cache: tuple = None,
+                      invalidate: tuple = None,
+                      content: bool = None) -> RequestSpec:
+        """
+          Собирает описание запроса из данных, накопленных текущим потоком.
+          Словари копируются, поэтому последующие вызовы клиента не меняют уже собранный запрос.
+
+          :param url: URL запроса.
+          :type url: :obj:`base.String`
+          :param params: Передавать ли в запросе query Parameters.
+          :type params: :obj:`base.Boolean`
+          :param body: Передавать ли в запросе json Body.
+          :type body: :obj:`base.Boolean`
+          :param cookies: Передавать ли в запросе cookies.
+          :type cookies: :obj:`base.Boolean`
+          :param files: Прикрепленные файлы.
+          :param request_type: Метод запроса.
+          :type request_type: :obj:`base.String`
+          :param cache: Ресурс (вид, идентификатор), под которым результат можно хранить в кэше объектов.
+          :param invalidate: Начало ключа записей кэша объектов, которые устаревают после запроса.
+          :param content: Передавать ли в запросе бинарное тело.
+          :type content: :obj:`base.Boolean`
+          :return: Описание запроса.
+          :rtype: :obj:`RequestSpec`
+        """
 
+        headers = {'Authorization': f'{self.token}'}
+        headers.update(self.headers or {})
+
+        return RequestSpec(method=REQUEST_TYPES.get(request_type, request_type),
+                           url=url,
+                           headers=headers,
+                           params=self.query_params() if params is not None and self.data is not None else None,
+                           json=dict(self.body) if body is not None and self.body is not None else None,
+                           cookies=dict(self.cookies) if cookies is not None and self.cookies is not None else None,
+                           files=dict(self.files) if files is not None and self.files is not None else None,
+                           content=self.content if content is not None else None,
+                           cache=cache,
+                           invalidate=invalidate)
+
+    def etag_lookup(self, spec: RequestSpec) -> tuple:
+        """
+          Ищет закэшированный ответ для условного GET-запроса.
+
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :return: Ключ кэша (None, если запрос не кэшируется) и запись кэша (None, если ее нет).
+        """
+        if self.etag_cache is None or spec.method != 'GET':
+            return None, None
+        # the same URL can answer differently for another token
+        key = (spec.headers.get('Authorization'),) + ETagCache.key(spec.url, spec.params)
+        return key, self.etag_cache.get(key)
+
+    def etag_store(self, key: tuple, etag: str, content: bytes) -> None:
+        """
+          Сохраняет полный ответ на кэшируемый GET-запрос.
+
+          :param key: Ключ кэша, полученный от etag_lookup.
+          :param etag: Значение заголовка ETag или None.
+          :param content: Тело ответа.
+        """
+        if key is None:
+            return
+        self.etag_cache.record(hit=False)
+        if etag:
+            self.etag_cache.put(key, etag, content)
+
+    def object_cache_key(self, spec: RequestSpec) -> Union[tuple, None]:
+        """
+          Возвращает ключ кэша объектов для запроса или None, если результат не кэшируется.
+          Ключ начинается с вида ресурса, чтобы работала инвалидация по префиксу, и включает
+          токен и полный URL: клиенты разных пользователей и серверов не видят записи друг друга.
+
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :return: Ключ кэша объектов.
+        """
+        if self.object_cache is None or spec.cache is None:
+            return None
+        return tuple(spec.cache) + (spec.headers.get('Authorization'),) + ETagCache.key(spec.url, spec.params)
+
+    def object_cache_store(self, key: tuple, spec: RequestSpec, result) -> None:
+        """
+          Сохраняет успешный результат в кэш объектов и удаляет устаревшие записи.
+
+          :param key: Ключ кэша объектов, полученный от object_cache_key.
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :param result: Результат запроса.
+        """
+        if self.object_cache is None:
+            return
+        if spec.invalidate is not None:
+            self.object_cache.invalidate(*spec.invalidate)
+        if key is not None and result:
+            self.object_cache.put(key, result)
+
+    def singleflight_key(self, spec: RequestSpec) -> Union[tuple, None]:
+        """
+          Возвращает ключ для объединения одинаковых запросов или None, если запрос нельзя объединять.
+          Объединяются только GET-запросы.
+
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :return: Ключ запроса.
+        """
+        if self.singleflight is None or spec.method != 'GET':
+            return None
+        return (spec.headers.get('Authorization'),) + ETagCache.key(spec.url, spec.params)
+
+    def send(self, spec: RequestSpec) -> dict:
+        """
+          Выполняет запрос по его описанию, отвечая из кэша объектов, если это возможно.
+          Одновременные одинаковые GET-запросы объединяются в один, если задан singleflight.
+
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :return: Словарь с результатами запроса.
+          :rtype: :obj:'typing.Dict'
+        """
+
+        key = self.object_cache_key(spec)
+        if key is not None:
+            found, result = self.object_cache.get(key)
+            if found:
+                return result
+
+        flight_key = self.singleflight_key(spec)
+        if flight_key is not None:
+            result = self.singleflight.do(flight_key, lambda: self.perform(spec))
+        else:
+            result = self.perform(spec)
+        self.object_cache_store(key, spec, result)
+        return result
+
+    def perform(self, spec: RequestSpec) -> dict:
+        """
+          Выполняет HTTP-запрос по его описанию.
+          Ответ сервера сохраняется в response, ошибка - в error_desc.
+
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :return: Тело ответа.
+          :rtype: :obj:'typing.Dict'
+          :raises MattermostConnectionError: Соединение не установлено или оборвалось.
+          :raises MattermostTimeoutError: Сервер не ответил вовремя.
+          :raises HTTPError: Сервер ответил ошибкой, тип исключения зависит от статуса.
+        """
+
+        cache_key, cached = self.etag_lookup(spec)
+        headers = spec.headers if cached is None else dict(spec.headers, **{'If-None-Match': cached.etag})
+
+        started = time.monotonic()
         try:
-            data = self.data if params is not None else None
-            json = self.body if body is not None else None
-            cookies = self.cookies if cookies is not None else None
-            files = self.files if files is not None else None
-
-            response = requests_types[request_type](url=url,
-                                                    headers=self.headers,
-                                                    json=json,
-                                                    data=data,
-                                                    cookies=cookies,
-                                                    files=files)
-            if response.status_code in (200, 201, 204):
-                return response.json()
-            elif response.status_code == 401:
-                print("UnauthorizedError", response.json()['message'])
-        except Exception as err:
+            raw = self.http_request(spec, headers)
+        except requests.RequestException as err:
+            error_class = MattermostTimeoutError if isinstance(err, requests.ReadTimeout) else MattermostConnectionError
+            self.error_desc = error_class(f"{spec.method} {spec.url}: {err}")
+            logger.debug("Request failed: %s", self.error_desc)
+            raise self.error_desc from err
+        except MattermostError as err:
             self.error_desc = err
+            raise
+
+        response = Response(spec.method, spec.url, raw.status_code, raw.headers, raw.content, time.monotonic() - started)
+        return self.read_response(response, cache_key, cached)
+
+    def read_response(self, response: Response, cache_key, cached) -> dict:
+        """
+          Разбирает ответ сервера.
 
-        print(f"Request ERROR: {self.error_desc}")
-        return {}
+          :param response: Ответ сервера.
+          :type response: :obj:`Response`
+          :param cache_key: Ключ запроса в etag_cache.
+          :param cached: Закэшированный ответ, с ETag которого был отправлен запрос.
+          :return: Тело ответа.
+          :rtype: :obj:'typing.Dict'
+        """
+
+        self.response = response
+        if response.status == 304 and cached is not None:
+            self.etag_cache.record(hit=True)
+            return json.loads(cached.content)
+        if 200 <= response.status < 300:
+            try:
+                result = response.json()
+            except ValueError as err:
+                self.error_desc = MattermostError(f"{response.method} {response.url}: invalid JSON in response", response)
+                raise self.error_desc from err
+            self.etag_store(cache_key, response.headers.get('ETag'), response.content)
+            return result
+
+        self.error_desc = error_for_response(response)
+        logger.debug("Request failed: %s", self.error_desc)
+        raise self.error_desc
+
+    def download(self, url: str,
+                 file: Union[str, os.PathLike, BinaryIO],
+                 size: int = None,
+                 sha256: str = None,
+                 progress: Callable[[int, Union[int, None]], None] = None,
+                 max_resumes: int = 10,
+                 chunk_size: int = BLOCK_SIZE) -> dict:
+        """
+          Скачивает бинарный ответ сервера (архив, отчет) потоком в файл, не загружая его в память.
+          После обрыва соединения или таймаута скачивание продолжается с места обрыва запросом
+          с заголовком Range; If-Range гарантирует, что части не будут взяты из разных версий файла.
+          Файл по пути скачивается в <путь>.part и переименовывается после проверки размера
+          и контрольной суммы, поэтому прерванное скачивание можно продолжить повторным вызовом.
+
+          :param url: URL запроса.
+          :type url: :obj:`base.String`
+          :param file: Путь к файлу или бинарный файловый объект, открытый на запись.
+          :param size: Ожидаемый размер файла в байтах.
+          :type size: :obj:`base.Integer`
+          :param sha256: Ожидаемый SHA-256 содержимого (hex).
+          :type sha256: :obj:`base.String`
+          :param progress: Функция, вызываемая после каждого блока с аргументами
+          (скачано байт, размер файла или None, если сервер его не сообщил).
+          :param max_resumes: Сколько раз продолжать скачивание после обрывов.
+          :type max_resumes: :obj:`base.Integer`
+          :param chunk_size: Размер блока записи в байтах.
+          :type chunk_size: :obj:`base.Integer`
+          :return: Путь (для файла по пути), размер и SHA-256 скачанного файла.
+          :rtype: :obj:'typing.Dict'
+          :raises MattermostConnectionError: Скачивание прерывалось больше max_resumes раз.
+          :raises HTTPError: Сервер ответил ошибкой, тип исключения зависит от статуса.
+          :raises MattermostError: Размер или контрольная сумма скачанного файла не совпадают.
+        """
+
+        spec = self.build_request(url, request_type='GET')._replace(stream=True)
+        started = time.monotonic()
+        try:
+            with DownloadSink(file) as sink:
+                resumes = 0
+                while True:
+                    # byte ranges must address the stored file, not a compressed representation of it
+                    headers = dict(spec.headers, **{'Accept-Encoding': 'identity'}, **sink.request_headers())
+                    try:
+                        with self.http_request(spec, headers) as raw:
+                            self.response = Response(spec.method, spec.url, raw.status_code, raw.headers, b'',
+                                                     time.monotonic() - started)
+                            if raw.status_code >= 300 and not (raw.status_code == 416 and sink.offset):
+                                self.read_response(self.response._replace(content=raw.content), None, None)
+                            if sink.begin(raw.status_code, raw.headers):
+                                for block in raw.iter_content(chunk_size):
+                                    sink.write(block)
+                                    if progress is not None:
+                                        progress(sink.offset, sink.total)
+                    except requests.RequestException as err:
+                        error = err
+                    else:
+                        if sink.complete:
+                            return sink.finish(size, sha256)
+                        error = None
+
+                    resumes += 1
+                    if resumes > max_resumes:
+                        error_class = MattermostTimeoutError if isinstance(error, requests.Timeout) else MattermostConnectionError
+                        raise error_class(f"{spec.method} {spec.url}: download interrupted at {sink.offset} "
+                                          f"of {sink.total} bytes: {error}") from error
+                    logger.debug("Resuming download of %s at %d bytes after %r", spec.url, sink.offset, error)
+        except MattermostError as err:
+            self.error_desc = err
+            raise
+
+    def http_request(self, spec: RequestSpec, headers: dict) -> requests.Response:
+        """
+          Отправляет HTTP-запрос, соблюдая лимит частоты запросов, если задан rate_limiter.
+          Если задан circuit_breaker, запрос к группе эндпоинтов с разомкнутым автоматом не отправляется.
+          Запрос, отклоненный сервером с ответом 429, повторяется после паузы.
+          Запрос, не выполненный из-за сбоя сети или сервера, повторяется по политике retry_policy.
+
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :param headers: Заголовки запроса.
+          :return: Ответ сервера.
+          :rtype: :obj:`requests.Response`
+        """
+
+        data = spec.content
+        if spec.files is not None:
+            # files are streamed from memory-mapped views instead of being copied into the body
+            data = MultipartBody(spec.files)
+            headers = dict(headers, **{'Content-Type': data.content_type})
+        try:
+            return self._http_request(spec, headers, data)
+        finally:
+            if spec.files is not None:
+                data.close()
+
+    def _http_request(self, spec: RequestSpec, headers: dict, data) -> requests.Response:
+        circuit = self.circuit_breaker.key(spec.url) if self.circuit_breaker is not None else None
+        limited = 0
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.acquire()
+                if delay > 0:
+                    time.sleep(delay)
+            # the half-open probe slot is taken only once the request is about to be sent
+            if circuit is not None:
+                self.circuit_breaker.before(circuit)
+            try:
+                response = self.session.request(method=spec.method,
+                                                url=spec.url,
+                                                headers=headers,
+                                                json=spec.json,
+                                                params=spec.params,
+                                                cookies=spec.cookies,
+                                                data=data,
+                                                timeout=self.timeout,
+                                                stream=spec.stream)
+            except Exception as err:
+                if circuit is not None:
+                    self.circuit_breaker.record(circuit, success=False)
+                delay = self.retry_delay(spec, attempt, error=err)
+                if delay is None:
+                    raise
+            except BaseException:
+                # KeyboardInterrupt and the like tell nothing about the server
+                if circuit is not None:
+                    self.circuit_breaker.release(circuit)
+                raise
+            else:
+                if circuit is not None:
+                    self.circuit_breaker.record(circuit, success=response.status_code < 500)
+                if (self.rate_limiter is not None
+                        and self.rate_limiter.update(response.status_code, response.headers)
+                        and spec.files is None
+                        and limited < self.rate_limiter.max_retries):
+                    limited += 1
+                    # a streamed response holds its connection until it is closed
+                    response.close()
+                    continue
+                delay = self.retry_delay(spec, attempt, response.status_code, response.headers)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def retry_delay(self,
+                    spec: RequestSpec,
+                    attempt: int,
+                    status: int = None,
+                    headers=None,
+                    error: Exception = None) -> Union[float, None]:
+        """
+          Решает по политике retry_policy, нужно ли повторить запрос.
+
+          :param spec: Описание запроса.
+          :type spec: :obj:`RequestSpec`
+          :param attempt: Номер попытки, начиная с 0.
+          :type attempt: :obj:`base.Integer`
+          :param status: HTTP-статус ответа, если ответ получен.
+          :param headers: Заголовки ответа.
+          :param error: Исключение, если ответ не получен.
+          :return: Задержка перед повтором в секундах или None, если повторять не нужно.
+        """
+
+        # a streamed multipart body has already been read, so such a request can not be sent again
+        if self.retry_policy is None or spec.files is not None:
+            return None
+        return self.retry_policy.retry_delay(spec.method, attempt, status=status, headers=headers, error=error)
+
+    @staticmethod
+    def paginate(fetch_page: Callable[[int], list], per_page: int, page: int = 0) -> Iterator[list]:
+        """
+          Последовательно запрашивает страницы, пока сервер не вернет неполную страницу.
+
+          :param fetch_page: Функция, возвращающая список элементов страницы по ее номеру.
+          :param per_page: Размер страницы, запрошенный у сервера.
+          :type per_page: :obj:`base.Integer`
+          :param page: Номер первой страницы.
+          :type page: :obj:`base.Integer`
+          :return: Итератор по непустым страницам.
+        """
+        while True:
+            items = fetch_page(page)
+            if items:
+                yield items
+            if len(items) < per_page:
+                return
+            page += 1
+
+    @staticmethod
+    def prefetch_pages(pages: Iterator[list], depth: int) -> Iterator[list]:
+        """
+          Запрашивает следующие страницы в фоновом потоке, пока обрабатывается текущая.
+          В памяти одновременно находится не больше depth готовых страниц.
+          Ошибка при получении страницы пробрасывается потребителю.
+
+          :param pages: Итератор по страницам.
+          :param depth: Сколько страниц можно получить заранее, не меньше 1.
+          :type depth: :obj:`base.Integer`
+          :return: Итератор по тем же страницам.
+          :raises ValueError: depth меньше 1.
+        """
+        # Queue(maxsize=0) is unbounded, so a non-positive depth would buffer every page
+        if depth < 1:
+            raise ValueError(f"Prefetch depth must be at least 1, got {depth}")
+        return Base._prefetched_pages(pages, depth)
+
+    @staticmethod
+    def _prefetched_pages(pages: Iterator[list], depth: int) -> Iterator[list]:
+        buffer = queue.Queue(maxsize=depth)
+        stopped = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            while not stopped.is_set():
+                try:
+                    buffer.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce() -> None:
+            try:
+                for page in pages:
+                    if not put(page):
+                        return
+            except Exception as err:
+                put((done, err))
+                return
+            put((done, None))
+
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                item = buffer.get()
+                if isinstance(item, tuple) and item[0] is done:
+                    if item[1] is not None:
+                        raise item[1]
+                    return
+                yield item
+        finally:
+            stopped.set()
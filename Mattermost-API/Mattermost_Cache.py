@@ -0,0 +1,202 @@
+from collections import OrderedDict
+from typing import NamedTuple, Union
+import copy
+import json
+import threading
+import time
+
+
+class ETagEntry(NamedTuple):
+    """
+        Закэшированный ответ: ETag и исходное тело ответа.
+    """
+    etag: str
+    content: bytes
+
+
+class ETagCache:
+    def __init__(self, max_entries: int = 1024):
+        """
+            Кэш ответов GET-запросов для условных запросов с If-None-Match.
+            Хранит ETag и тело последнего ответа для каждого токена, URL и набора query Parameters,
+            при переполнении вытесняет давно не использованные записи.
+
+            :param max_entries: Максимальное количество записей.
+            :type max_entries: :obj:`base.Integer`
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str, params: dict = None) -> tuple:
+        """
+            Возвращает ключ кэша для запроса.
+
+            :param url: URL запроса.
+            :type url: :obj:`base.String`
+            :param params: query Parameters запроса.
+            :return: Ключ кэша.
+        """
+        return url, json.dumps(params, sort_keys=True, default=str) if params else ''
+
+    def get(self, key: tuple) -> Union[ETagEntry, None]:
+        """
+            Возвращает запись кэша по ключу.
+
+            :param key: Ключ кэша.
+            :return: Запись кэша или None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, etag: str, content: bytes) -> None:
+        """
+            Сохраняет ETag и тело ответа.
+
+            :param key: Ключ кэша.
+            :param etag: Значение заголовка ETag.
+            :type etag: :obj:`base.String`
+            :param content: Тело ответа.
+        """
+        with self._lock:
+            self._entries[key] = ETagEntry(etag, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record(self, hit: bool) -> None:
+        """
+            Учитывает результат условного запроса в статистике.
+
+            :param hit: Ответил ли сервер 304 Not Modified.
+            :type hit: :obj:`base.Boolean`
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self) -> None:
+        """
+            Удаляет все записи.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+DEFAULT_TTLS = {
+    'bot': 300,
+    'remote_cluster': 3600,
+    'ancillary_permissions': 3600,
+    'terms_of_service': 3600,
+}
+
+
+class ObjectCache:
+    def __init__(self, max_entries: int = 1024, ttls: dict = None, default_ttl: float = None):
+        """
+            Кэш результатов запросов в памяти процесса с ограниченным размером и временем жизни записей.
+            Время жизни задается отдельно для каждого вида ресурса (bot, remote_cluster, ...).
+            Ресурсы без заданного времени жизни не кэшируются.
+            При переполнении вытесняются давно не использованные записи.
+
+            :param max_entries: Максимальное количество записей.
+            :type max_entries: :obj:`base.Integer`
+            :param ttls: Время жизни записей в секундах по видам ресурсов, дополняет DEFAULT_TTLS.
+            :param default_ttl: Время жизни для ресурсов, не указанных в ttls (None - не кэшировать).
+        """
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ttl(self, resource: str) -> Union[float, None]:
+        """
+            Возвращает время жизни записей для вида ресурса.
+
+            :param resource: Вид ресурса.
+            :type resource: :obj:`base.String`
+            :return: Время жизни в секундах или None, если ресурс не кэшируется.
+        """
+        return self.ttls.get(resource, self.default_ttl)
+
+    def get(self, key: tuple) -> tuple:
+        """
+            Возвращает значение по ключу, если запись есть и не устарела.
+
+            :param key: Ключ, начинающийся с вида ресурса.
+            :return: Пара (найдено ли значение, копия значения).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(entry[1])
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: tuple, value) -> None:
+        """
+            Сохраняет значение, если для его вида ресурса задано время жизни.
+
+            :param key: Ключ, начинающийся с вида ресурса.
+            :param value: Значение.
+        """
+        ttl = self.ttl(key[0])
+        if not ttl:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *prefix) -> int:
+        """
+            Удаляет записи, ключ которых начинается с prefix.
+            Например, invalidate('bot', bot_user_id) удаляет все закэшированные варианты одного бота,
+            а invalidate('bot') - всех ботов.
+
+            :param prefix: Начало ключа.
+            :return: Количество удаленных записей.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[:len(prefix)] == prefix]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """
+            Удаляет все записи.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+            Возвращает статистику попаданий в кэш.
+
+            :return: Словарь с количеством попаданий, промахов, вытеснений и текущим размером.
+            :rtype: :obj:'typing.Dict'
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'size': len(self._entries)}
@@ -0,0 +1,203 @@
+from typing import Callable
+from urllib.parse import urlsplit
+import threading
+import time
+
+from Mattermost_Errors import CircuitOpenError
+
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class Circuit:
+    """
+        Состояние одного автомата: хост и группа эндпоинтов.
+    """
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.successes = 0
+        self.probes = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+
+
+class CircuitBreaker:
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1,
+                 success_threshold: int = 1,
+                 on_state_change: Callable[[tuple, str, str], None] = None):
+        """
+            Автоматический выключатель запросов к серверу, отдельный для каждого хоста
+            и группы эндпоинтов (первый сегмент пути после /api/v4, например posts или bots).
+            После failure_threshold сбоев подряд (обрыв соединения, таймаут, ответ 5xx)
+            автомат размыкается: запросы этой группы сразу завершаются CircuitOpenError,
+            не занимая соединения и потоки. Через recovery_timeout секунд автомат
+            пропускает до half_open_max_calls пробных запросов: после success_threshold
+            успешных он замыкается, после сбоя снова размыкается.
+            Ответы 4xx сбоем не считаются.
+
+            :param failure_threshold: Количество сбоев подряд, после которого автомат размыкается.
+            :type failure_threshold: :obj:`base.Integer`
+            :param recovery_timeout: Через сколько секунд после размыкания пропустить пробный запрос.
+            :type recovery_timeout: :obj:`base.Float`
+            :param half_open_max_calls: Количество одновременных пробных запросов.
+            :type half_open_max_calls: :obj:`base.Integer`
+            :param success_threshold: Количество успешных пробных запросов для замыкания.
+            :type success_threshold: :obj:`base.Integer`
+            :param on_state_change: Функция, вызываемая при смене состояния с аргументами
+            (ключ автомата, старое состояние, новое состояние).
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self._listeners = [on_state_change] if on_state_change is not None else []
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url: str) -> tuple:
+        """
+            Возвращает ключ автомата для URL запроса.
+
+            :param url: URL запроса.
+            :type url: :obj:`base.String`
+            :return: Пара (хост, группа эндпоинтов).
+        """
+        parts = urlsplit(url)
+        segments = [segment for segment in parts.path.split('/') if segment]
+        if len(segments) >= 2 and segments[0] == 'api':
+            segments = segments[2:]
+        return parts.netloc, segments[0] if segments else ''
+
+    def add_listener(self, callback: Callable[[tuple, str, str], None]) -> None:
+        """
+            Добавляет функцию, вызываемую при смене состояния автомата.
+
+            :param callback: Функция с аргументами (ключ автомата, старое состояние, новое состояние).
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def before(self, key: tuple) -> None:
+        """
+            Проверяет, можно ли отправить запрос.
+
+            :param key: Ключ автомата.
+            :raises CircuitOpenError: Автомат разомкнут.
+        """
+        changed = None
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                circuit = self._circuits[key] = Circuit()
+            if circuit.state == OPEN:
+                retry_in = circuit.opened_at + self.recovery_timeout - time.monotonic()
+                if retry_in > 0:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(f"Circuit {key[0]}/{key[1]} is open, retry in {retry_in:.1f}s", retry_in)
+                changed = self._set_state(key, circuit, HALF_OPEN)
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.half_open_max_calls:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(f"Circuit {key[0]}/{key[1]} is half-open, probe in flight", 0.0)
+                circuit.probes += 1
+        self._notify(changed)
+
+    def record(self, key: tuple, success: bool) -> None:
+        """
+            Учитывает результат запроса.
+
+            :param key: Ключ автомата.
+            :param success: Успешен ли запрос: получен ответ не 5xx.
+            :type success: :obj:`base.Boolean`
+        """
+        changed = None
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                circuit = self._circuits[key] = Circuit()
+            if circuit.state == HALF_OPEN:
+                circuit.probes = max(0, circuit.probes - 1)
+                if not success:
+                    changed = self._set_state(key, circuit, OPEN)
+                else:
+                    circuit.successes += 1
+                    if circuit.successes >= self.success_threshold:
+                        changed = self._set_state(key, circuit, CLOSED)
+            elif success:
+                circuit.failures = 0
+            else:
+                circuit.failures += 1
+                if circuit.state == CLOSED and circuit.failures >= self.failure_threshold:
+                    changed = self._set_state(key, circuit, OPEN)
+        self._notify(changed)
+
+    def release(self, key: tuple) -> None:
+        """
+            Освобождает место пробного запроса, результат которого неизвестен (например, запрос отменен).
+
+            :param key: Ключ автомата.
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is not None and circuit.state == HALF_OPEN:
+                circuit.probes = max(0, circuit.probes - 1)
+
+    def state(self, key: tuple) -> str:
+        """
+            Возвращает состояние автомата.
+
+            :param key: Ключ автомата.
+            :return: closed, open или half_open.
+            :rtype: :obj:`base.String`
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return circuit.state if circuit is not None else CLOSED
+
+    def reset(self, key: tuple = None) -> None:
+        """
+            Замыкает автомат или все автоматы.
+
+            :param key: Ключ автомата. Если не указан, сбрасываются все автоматы.
+        """
+        with self._lock:
+            keys = [key] if key is not None else list(self._circuits)
+            changed = [self._set_state(k, self._circuits[k], CLOSED) for k in keys if k in self._circuits]
+        for change in changed:
+            self._notify(change)
+
+    def stats(self) -> dict:
+        """
+            Возвращает состояние всех автоматов.
+
+            :return: Словарь {(хост, группа): {'state', 'failures', 'rejected'}}.
+            :rtype: :obj:'typing.Dict'
+        """
+        with self._lock:
+            return {key: {'state': circuit.state, 'failures': circuit.failures, 'rejected': circuit.rejected}
+                    for key, circuit in self._circuits.items()}
+
+    def _set_state(self, key: tuple, circuit: Circuit, state: str):
+        old = circuit.state
+        circuit.state = state
+        circuit.failures = 0
+        circuit.successes = 0
+        circuit.probes = 0
+        if state == OPEN:
+            circuit.opened_at = time.monotonic()
+        return (key, old, state) if old != state else None
+
+    def _notify(self, change) -> None:
+        # callbacks run outside the lock, so they may use the breaker themselves
+        if change is None:
+            return
+        for callback in list(self._listeners):
+            callback(*change)
@@ -0,0 +1,165 @@
+from typing import NamedTuple, Union
+import json
+
+
+class Response(NamedTuple):
+    """
+        Ответ сервера: HTTP-статус, заголовки, тело и время выполнения запроса.
+    """
+    method: str
+    url: str
+    status: int
+    headers: dict
+    content: bytes
+    elapsed: float
+
+    def json(self):
+        """
+            Разбирает тело ответа как JSON.
+
+            :return: Тело ответа или пустой словарь, если тело пустое (например, для ответа 204).
+        """
+        if not self.content:
+            return {}
+        return json.loads(self.content)
+
+
+class MattermostError(Exception):
+    def __init__(self, message: str, response: Response = None):
+        """
+            Базовое исключение клиента.
+
+            :param message: Описание ошибки.
+            :type message: :obj:`base.String`
+            :param response: Ответ сервера, если он был получен.
+            :type response: :obj:`Response`
+        """
+        super().__init__(message)
+        self.message = message
+        self.response = response
+
+
+class MattermostConnectionError(MattermostError):
+    """
+        Не удалось установить соединение с сервером или оно оборвалось.
+    """
+
+
+class MattermostTimeoutError(MattermostConnectionError):
+    """
+        Сервер не ответил за отведенное время. Неизвестно, выполнил ли он запрос.
+    """
+
+
+class CircuitOpenError(MattermostConnectionError):
+    def __init__(self, message: str, retry_in: float):
+        """
+            Запрос не отправлен: автомат для этой группы эндпоинтов разомкнут после серии сбоев.
+
+            :param message: Описание ошибки.
+            :type message: :obj:`base.String`
+            :param retry_in: Через сколько секунд автомат пропустит пробный запрос.
+            :type retry_in: :obj:`base.Float`
+        """
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+class HTTPError(MattermostError):
+    def __init__(self, message: str, response: Response = None, status: int = None):
+        """
+            Сервер ответил ошибкой.
+
+            :param message: Описание ошибки.
+            :type message: :obj:`base.String`
+            :param response: Ответ сервера.
+            :type response: :obj:`Response`
+            :param status: HTTP-статус, если ответа нет (ошибка определена без запроса к серверу).
+            :type status: :obj:`base.Integer`
+        """
+        super().__init__(message, response)
+        self.status = response.status if response is not None else status
+        self.error_id = None
+        if response is not None:
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+            if isinstance(body, dict):
+                self.error_id = body.get('id')
+
+
+class BadRequestError(HTTPError):
+    """
+        400: некорректные параметры запроса.
+    """
+
+
+class UnauthorizedError(HTTPError):
+    """
+        401: токен доступа отсутствует или недействителен.
+    """
+
+
+class ForbiddenError(HTTPError):
+    """
+        403: недостаточно прав.
+    """
+
+
+class NotFoundError(HTTPError):
+    """
+        404: ресурс не найден.
+    """
+
+
+class RateLimitError(HTTPError):
+    """
+        429: превышен лимит частоты запросов.
+    """
+
+    @property
+    def retry_after(self) -> Union[float, None]:
+        """
+            Через сколько секунд можно повторить запрос, по заголовку Retry-After.
+        """
+        value = self.response.headers.get('Retry-After') if self.response is not None else None
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+
+class ServerError(HTTPError):
+    """
+        5xx: ошибка на стороне сервера.
+    """
+
+
+HTTP_ERRORS = {
+    400: BadRequestError,
+    401: UnauthorizedError,
+    403: ForbiddenError,
+    404: NotFoundError,
+    429: RateLimitError,
+}
+
+
+def error_for_response(response: Response) -> HTTPError:
+    """
+        Создает исключение, соответствующее ответу сервера с ошибкой.
+
+        :param response: Ответ сервера.
+        :type response: :obj:`Response`
+        :return: Исключение.
+        :rtype: :obj:`HTTPError`
+    """
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    message = body.get('message') if isinstance(body, dict) else None
+    if not message:
+        message = response.content[:200].decode('utf-8', 'replace') or 'no response body'
+    error_class = HTTP_ERRORS.get(response.status, ServerError if response.status >= 500 else HTTPError)
+    return error_class(f"{response.method} {response.url}: {response.status} {message}", response)
@@ -0,0 +1,421 @@
+from typing import Union, BinaryIO
+import asyncio
+import hashlib
+import io
+import mimetypes
+import mmap
+import os
+import uuid
+
+from Mattermost_Errors import MattermostError
+
+
+FileLike = Union[str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap, BinaryIO]
+
+BLOCK_SIZE = 1024 * 1024
+
+
+class FileSource:
+    def __init__(self, file: FileLike, filename: str = None):
+        """
+            Содержимое файла для отправки без промежуточного копирования.
+            Путь к файлу и файловый объект на диске отображаются в память (mmap),
+            bytes, memoryview и mmap используются как есть; содержимое передается
+            в сокет срезами memoryview. Файловые объекты, которые нельзя отобразить
+            в память (каналы, сокеты), читаются блоками.
+            Файл, открытый по пути, закрывается в close(); переданный файловый объект
+            остается открытым, его позиция не меняется, если он отображен в память.
+
+            :param file: Путь к файлу, бинарный файловый объект, bytes, memoryview или mmap.
+            :param filename: Имя файла. По умолчанию: имя файла из пути или атрибута name.
+            :type filename: :obj:`base.String`
+        """
+        self.view = None
+        self.stream = None
+        self.size = None
+        self._file = None
+        self._map = None
+
+        if isinstance(file, (str, os.PathLike)):
+            self.filename = filename or os.path.basename(file)
+            self._file = open(file, 'rb')
+            self._map_file(self._file, 0)
+        elif isinstance(file, (bytes, bytearray, memoryview, mmap.mmap)):
+            self.filename = filename or 'file'
+            self.view = memoryview(file).cast('B')
+        elif hasattr(file, 'read'):
+            name = getattr(file, 'name', None)
+            self.filename = filename or (os.path.basename(name) if isinstance(name, (str, bytes)) else 'file')
+            if isinstance(self.filename, bytes):
+                self.filename = os.fsdecode(self.filename)
+            if isinstance(file, io.BytesIO):
+                self.view = file.getbuffer()[file.tell():]
+            elif not self._try_map_file(file):
+                self.stream = file
+                self.size = self._stream_size(file)
+        else:
+            raise TypeError(f"Unsupported file type: {type(file).__name__}")
+
+        if self.view is not None:
+            self.size = len(self.view)
+
+    def _try_map_file(self, file) -> bool:
+        try:
+            position = file.tell()
+            file.fileno()
+        except (OSError, AttributeError, ValueError):
+            return False
+        try:
+            self._map_file(file, position)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def _map_file(self, file, position: int) -> None:
+        size = os.fstat(file.fileno()).st_size
+        if size <= position:
+            # an empty file can not be mapped
+            self.view = memoryview(b'')
+            return
+        self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self._map)[position:]
+
+    @staticmethod
+    def _stream_size(file) -> Union[int, None]:
+        try:
+            if not file.seekable():
+                return None
+            position = file.tell()
+            size = file.seek(0, io.SEEK_END) - position
+            file.seek(position)
+            return size
+        except (OSError, AttributeError, ValueError):
+            return None
+
+    @property
+    def content_type(self) -> str:
+        """
+            MIME-тип файла по его имени.
+        """
+        return mimetypes.guess_type(self.filename)[0] or 'application/octet-stream'
+
+    def close(self) -> None:
+        """
+            Освобождает отображение файла в память и закрывает файл, открытый по пути.
+        """
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # a slice is still referenced by the transport, the mapping is freed with it
+                pass
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _quote(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+
+class MultipartBody:
+    def __init__(self, files: dict):
+        """
+            Потоковое тело запроса multipart/form-data.
+            Заголовки частей формируются заранее, содержимое файлов передается
+            срезами memoryview по мере отправки, поэтому файл не копируется в память
+            целиком. Длина тела известна заранее, если известны размеры всех файлов,
+            иначе тело отправляется с Transfer-Encoding: chunked.
+
+            :param files: Словарь {имя поля формы: (имя файла, файл)}, файл в любом виде,
+            который принимает FileSource.
+            :type files: :obj:'typing.Dict'
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self.sources = []
+        self._segments = []
+        self._index = 0
+        self._offset = 0
+
+        try:
+            for name, (filename, file) in files.items():
+                source = FileSource(file, filename)
+                self.sources.append(source)
+                head = (f'--{self.boundary}\r\n'
+                        f'Content-Disposition: form-data; name="{_quote(name)}"; filename="{_quote(source.filename)}"\r\n'
+                        f'Content-Type: {source.content_type}\r\n\r\n')
+                self._segments.append(memoryview(head.encode('utf-8')))
+                self._segments.append(source.view if source.view is not None else source.stream)
+                self._segments.append(memoryview(b'\r\n'))
+            self._segments.append(memoryview(f'--{self.boundary}--\r\n'.encode('ascii')))
+        except BaseException:
+            self.close()
+            raise
+
+        if all(source.size is not None for source in self.sources):
+            # requests takes the body length from the len attribute
+            self.len = sum(len(segment) for segment in self._segments if isinstance(segment, memoryview))
+            self.len += sum(source.size for source in self.sources if source.view is None)
+
+    def read(self, size: int = -1) -> Union[memoryview, bytes]:
+        """
+            Возвращает следующий блок тела, не больше size байт.
+            Блок содержимого файла, отображенного в память, - это срез memoryview без копирования.
+
+            :param size: Максимальный размер блока. По умолчанию: все оставшееся тело.
+            :type size: :obj:`base.Integer`
+            :return: Блок тела или пустой блок в конце тела.
+        """
+        if size is None or size < 0:
+            return b''.join(bytes(block) for block in iter(lambda: self.read(BLOCK_SIZE), b''))
+        while self._index < len(self._segments):
+            segment = self._segments[self._index]
+            if isinstance(segment, memoryview):
+                if self._offset < len(segment):
+                    end = min(len(segment), self._offset + size)
+                    block = segment[self._offset:end]
+                    self._offset = end
+                    return block
+            else:
+                block = segment.read(size)
+                if block:
+                    return block
+            self._index += 1
+            self._offset = 0
+        return b''
+
+    def __iter__(self):
+        return iter(lambda: self.read(BLOCK_SIZE), b'')
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # page faults of a mapped file and stream reads block, so they run off the event loop
+            block = await loop.run_in_executor(None, self.read, BLOCK_SIZE)
+            if not block:
+                return
+            yield block
+
+    def close(self) -> None:
+        """
+            Освобождает файлы, открытые для отправки.
+        """
+        self._segments = []
+        for source in self.sources:
+            source.close()
+
+
+class DownloadSink:
+    def __init__(self, file: Union[str, os.PathLike, BinaryIO]):
+        """
+            Приемник скачиваемого файла с докачкой.
+            Файл по пути скачивается во временный файл <путь>.part, который переименовывается
+            после проверки. .part создается только при первом ответе с данными (200 или 206),
+            так что ответ с ошибкой не оставляет на диске пустой файл. Если скачивание прервалось,
+            .part остается на диске, и следующий вызов докачивает его с места обрыва. Валидатор для If-Range
+            (ETag или Last-Modified) сохраняется рядом, в <путь>.part.validator, поэтому и при докачке
+            повторным вызовом части не будут взяты из разных версий файла.
+            Файловый объект дописывается с текущей позиции; начать заново (если сервер
+            не поддерживает Range) можно, только если он seekable.
+            SHA-256 содержимого считается по ходу записи.
+
+            :param file: Путь к файлу или бинарный файловый объект, открытый на запись.
+        """
+        self.path = None
+        self.offset = 0
+        self.total = None
+        self.validator = None
+        self._digest = hashlib.sha256()
+        self._owned = isinstance(file, (str, os.PathLike))
+
+        if self._owned:
+            self.path = os.fspath(file)
+            self._file = None
+            self._start = 0
+            if os.path.exists(self.path + '.part'):
+                self._open()
+                self._file.seek(0)
+                for block in iter(lambda: self._file.read(BLOCK_SIZE), b''):
+                    self._digest.update(block)
+                    self.offset += len(block)
+                try:
+                    with open(self.path + '.part.validator', encoding='utf-8') as validator:
+                        self.validator = validator.read() or None
+                except FileNotFoundError:
+                    pass
+        else:
+            self._file = file
+            try:
+                self._start = file.tell()
+            except (OSError, AttributeError):
+                self._start = None
+
+    def request_headers(self) -> dict:
+        """
+            Возвращает заголовки запроса для докачки с текущего места.
+
+            :return: Заголовки Range и If-Range или пустой словарь, если ничего не скачано.
+            :rtype: :obj:'typing.Dict'
+        """
+        if not self.offset:
+            return {}
+        headers = {'Range': f'bytes={self.offset}-'}
+        if self.validator is not None:
+            headers['If-Range'] = self.validator
+        return headers
+
+    def begin(self, status: int, headers) -> bool:
+        """
+            Разбирает заголовки ответа на запрос данных.
+            Если сервер вернул файл целиком вместо запрошенной части (или файл изменился),
+            скачанное отбрасывается и запись начинается заново.
+
+            :param status: HTTP-статус ответа.
+            :type status: :obj:`base.Integer`
+            :param headers: Заголовки ответа.
+            :return: Нужно ли читать тело ответа: False, если файл уже скачан полностью.
+            :rtype: :obj:`base.Boolean`
+            :raises MattermostError: Ответ не соответствует запрошенной части файла.
+        """
+        content_range = headers.get('Content-Range')
+        if status == 416:
+            # the part file is already complete: the server reports its size as bytes */<size>
+            total = _range_total(content_range)
+            if total is None or total != self.offset:
+                raise MattermostError(f"Requested range is not satisfiable: {content_range}")
+            self.total = total
+            return False
+
+        if status == 206:
+            start = _range_start(content_range)
+            if start != self.offset:
+                raise MattermostError(f"Unexpected Content-Range {content_range}, expected start {self.offset}")
+            self.total = _range_total(content_range)
+        else:
+            if self.offset:
+                self.restart()
+            length = headers.get('Content-Length')
+            self.total = int(length) if length is not None and length.isdigit() else None
+
+        etag = headers.get('ETag')
+        # If-Range accepts only a strong validator
+        self.validator = etag if etag and not etag.startswith('W/') else headers.get('Last-Modified')
+        if self._file is None:
+            self._open()
+        if self._owned:
+            with open(self.path + '.part.validator', 'w', encoding='utf-8') as validator:
+                validator.write(self.validator or '')
+        return True
+
+    def _open(self) -> None:
+        self._file = open(self.path + '.part', 'ab+')
+
+    def _remove_validator(self) -> None:
+        try:
+            os.remove(self.path + '.part.validator')
+        except FileNotFoundError:
+            pass
+
+    def restart(self) -> None:
+        """
+            Отбрасывает скачанное и начинает запись заново.
+
+            :raises MattermostError: Файловый объект не поддерживает перемотку.
+        """
+        if self._start is None:
+            raise MattermostError("Server does not support resuming and the sink can not be rewound")
+        self._file.seek(self._start)
+        self._file.truncate()
+        self._digest = hashlib.sha256()
+        self.offset = 0
+
+    def write(self, block: bytes) -> None:
+        """
+            Записывает очередной блок данных.
+
+            :param block: Блок данных.
+        """
+        self._file.write(block)
+        self._digest.update(block)
+        self.offset += len(block)
+
+    @property
+    def complete(self) -> bool:
+        """
+            Скачан ли файл полностью. Если размер неизвестен, файл считается скачанным после конца тела.
+        """
+        return self.total is None or self.offset >= self.total
+
+    def finish(self, size: int = None, sha256: str = None) -> dict:
+        """
+            Проверяет скачанный файл и, для файла по пути, переименовывает .part в итоговое имя.
+            Если проверка не прошла, .part удаляется: докачивать испорченный файл нельзя.
+
+            :param size: Ожидаемый размер файла в байтах.
+            :type size: :obj:`base.Integer`
+            :param sha256: Ожидаемый SHA-256 содержимого (hex).
+            :type sha256: :obj:`base.String`
+            :return: Путь (для файла по пути), размер и SHA-256 скачанного файла.
+            :rtype: :obj:'typing.Dict'
+            :raises MattermostError: Размер или контрольная сумма не совпадают.
+        """
+        digest = self._digest.hexdigest()
+        error = None
+        if self.total is not None and self.offset != self.total:
+            error = f"Downloaded {self.offset} bytes, server reported {self.total}"
+        elif size is not None and self.offset != size:
+            error = f"Downloaded {self.offset} bytes, expected {size}"
+        elif sha256 is not None and digest != sha256.lower():
+            error = f"SHA-256 mismatch: got {digest}, expected {sha256.lower()}"
+        if error is not None:
+            if self._owned and self._file is not None:
+                self._file.close()
+                os.remove(self.path + '.part')
+                self._remove_validator()
+            raise MattermostError(error)
+
+        self._file.flush()
+        if self._owned:
+            self._file.close()
+            os.replace(self.path + '.part', self.path)
+            self._remove_validator()
+        return {'path': self.path, 'size': self.offset, 'sha256': digest}
+
+    def close(self) -> None:
+        """
+            Закрывает файл, открытый по пути. Недокачанный .part остается для докачки.
+        """
+        if self._owned and self._file is not None and not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _range_start(content_range: str) -> Union[int, None]:
+    # bytes <start>-<end>/<size>
+    try:
+        return int(content_range.split()[1].split('-')[0])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def _range_total(content_range: str) -> Union[int, None]:
+    try:
+        return int(content_range.rsplit('/', 1)[1])
+    except (AttributeError, IndexError, ValueError):
+        return None
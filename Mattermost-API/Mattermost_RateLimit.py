@@ -0,0 +1,184 @@
+from typing import Union
+import threading
+import time
+
+
+def _header_number(headers, name: str) -> Union[float, None]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    def __init__(self, rate: float = None, burst: int = None, headroom: float = 0.9, max_retries: int = 5):
+        """
+            Ограничитель частоты запросов (token bucket) для одного токена доступа.
+            Лимиты узнаются из заголовков ответов сервера X-RateLimit-Limit,
+            X-RateLimit-Remaining и X-RateLimit-Reset, пока они неизвестны, запросы не задерживаются.
+            Вызовы, превышающие лимит, не отклоняются, а встают в очередь: каждый получает
+            время, которое нужно подождать перед отправкой.
+            Ответ 429 приостанавливает отправку на Retry-After секунд, после чего запрос повторяется.
+
+            :param rate: Допустимое количество запросов в секунду. По умолчанию определяется по ответам сервера.
+            :type rate: :obj:`base.Float`
+            :param burst: Количество запросов, которые можно отправить подряд без задержки.
+            По умолчанию X-RateLimit-Limit.
+            :type burst: :obj:`base.Integer`
+            :param headroom: Доля лимита, которую разрешено использовать.
+            :type headroom: :obj:`base.Float`
+            :param max_retries: Сколько раз повторять запрос, получивший 429.
+            :type max_retries: :obj:`base.Integer`
+        """
+        self.rate = rate
+        self.burst = burst
+        self.headroom = headroom
+        self.max_retries = max_retries
+        self.learned_rate = None
+        self.limit = None
+        self.throttled = 0
+        self.waited = 0.0
+        self.rejected = 0
+        self.window = 1.0
+        self._served = 0
+        self._sample = None
+        self._tokens = None
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def effective_rate(self) -> Union[float, None]:
+        """
+            Возвращает частоту, с которой отправляются запросы.
+
+            :return: Количество запросов в секунду или None, если лимит еще неизвестен.
+        """
+        rate = self.rate if self.rate is not None else self.learned_rate
+        return rate * self.headroom if rate else None
+
+    def capacity(self, rate: float) -> float:
+        """
+            Возвращает размер корзины токенов.
+
+            :param rate: Частота запросов.
+            :type rate: :obj:`base.Float`
+            :return: Количество запросов, которые можно отправить подряд.
+        """
+        burst = self.burst if self.burst is not None else self.limit
+        if burst is None:
+            burst = rate
+        return max(1.0, burst * self.headroom)
+
+    def acquire(self) -> float:
+        """
+            Резервирует право на отправку одного запроса.
+
+            :return: Сколько секунд нужно подождать перед отправкой.
+            :rtype: :obj:`base.Float`
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._blocked_until - now)
+            rate = self._refill(now)
+            if rate is not None:
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / rate)
+            if wait > 0:
+                self.throttled += 1
+                self.waited += wait
+            return wait
+
+    def update(self, status: int, headers) -> bool:
+        """
+            Учитывает ответ сервера: уточняет лимиты по заголовкам X-RateLimit-*
+            и приостанавливает отправку после ответа 429.
+
+            :param status: HTTP-статус ответа.
+            :type status: :obj:`base.Integer`
+            :param headers: Заголовки ответа.
+            :return: True, если запрос был отклонен из-за превышения лимита и его нужно повторить.
+            :rtype: :obj:`base.Boolean`
+        """
+        limit = _header_number(headers, 'X-RateLimit-Limit')
+        remaining = _header_number(headers, 'X-RateLimit-Remaining')
+        reset = _header_number(headers, 'X-RateLimit-Reset')
+        retry_after = _header_number(headers, 'Retry-After')
+
+        with self._lock:
+            now = time.monotonic()
+            if limit:
+                self.limit = limit
+                if status != 429 and remaining is not None:
+                    self._learn(now, limit, remaining, reset)
+
+            pause = None
+            if status == 429:
+                self.rejected += 1
+                pause = retry_after if retry_after is not None else (reset if reset is not None else 1.0)
+            elif remaining is not None and remaining < 1:
+                pause = 0.0
+
+            rate = self._refill(now)
+            if rate is not None and remaining is not None:
+                # trust the server's count, but keep the reservations already handed out
+                self._tokens = min(self._tokens, remaining * self.headroom)
+            if pause is not None:
+                if rate is not None:
+                    self._tokens = min(self._tokens, -pause * rate)
+                else:
+                    self._blocked_until = max(self._blocked_until, now + (pause or reset or 1.0))
+            return status == 429
+
+    def stats(self) -> dict:
+        """
+            Возвращает статистику ограничителя.
+
+            :return: Текущая частота, количество задержанных запросов, суммарное время ожидания
+            и количество ответов 429.
+            :rtype: :obj:'typing.Dict'
+        """
+        with self._lock:
+            return {'rate': self.effective_rate(),
+                    'throttled': self.throttled,
+                    'waited': self.waited,
+                    'rejected': self.rejected}
+
+    def _learn(self, now: float, limit: float, remaining: float, reset: Union[float, None]) -> None:
+        # Remaining rises by the refill and falls by one per request the server has counted,
+        # so over a window refill = remaining delta + responses received.
+        # A full bucket hides the refill, such windows tell nothing.
+        self._served += 1
+        saturated = remaining >= limit - 1
+        if self._sample is None:
+            self._sample = (now, remaining, self._served, saturated)
+        elif now - self._sample[0] >= self.window:
+            started, remaining_before, served_before, saturated_before = self._sample
+            if not saturated_before and not saturated:
+                estimate = (remaining - remaining_before + self._served - served_before) / (now - started)
+                if estimate > 0:
+                    self.learned_rate = estimate
+            self._sample = (now, remaining, self._served, saturated)
+
+        # the bucket is refilled from remaining to limit in reset seconds, reset is rounded up,
+        # so this is a lower bound of the rate
+        if reset and remaining < limit:
+            bound = (limit - remaining) / reset
+            if self.learned_rate is None or bound > self.learned_rate:
+                self.learned_rate = bound
+
+    def _refill(self, now: float) -> Union[float, None]:
+        rate = self.effective_rate()
+        if rate is None:
+            self._last = now
+            return None
+        capacity = self.capacity(rate)
+        if self._tokens is None:
+            self._tokens = capacity
+        else:
+            self._tokens = min(capacity, self._tokens + (now - self._last) * rate)
+        self._last = now
+        return rate
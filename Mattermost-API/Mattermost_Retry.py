@@ -0,0 +1,185 @@
+from typing import Union
+import asyncio
+import random
+import sys
+import threading
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+# Виды ошибок:
+# connect - соединение не установлено, запрос до сервера не дошел;
+# connection - соединение оборвалось, неизвестно, выполнил ли сервер запрос;
+# timeout - сервер не ответил вовремя, неизвестно, выполнил ли он запрос;
+# server - ответ 5xx; rate_limit - ответ 429; client - остальные ответы 4xx.
+SAFE_KINDS = ('connect', 'rate_limit')
+
+
+def classify_error(error: Exception) -> Union[str, None]:
+    """
+        Определяет вид ошибки, возникшей при отправке запроса.
+
+        :param error: Исключение requests или aiohttp.
+        :return: Вид ошибки или None, если ошибка не связана с сетью.
+        :rtype: :obj:`base.String`
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return 'connect'
+    if isinstance(error, requests.ConnectionError):
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return 'connect' if isinstance(reason, NewConnectionError) else 'connection'
+    if isinstance(error, requests.Timeout):
+        return 'timeout'
+    # aiohttp is not imported here: the synchronous client should not pay for it at startup,
+    # and an aiohttp error can only come from an already imported aiohttp
+    aiohttp = sys.modules.get('aiohttp')
+    if aiohttp is not None:
+        if isinstance(error, (aiohttp.ClientConnectorError, getattr(aiohttp, 'ConnectionTimeoutError', ()))):
+            return 'connect'
+        # before Python 3.11 asyncio.TimeoutError is not a subclass of TimeoutError
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+            return 'timeout'
+        if isinstance(error, aiohttp.ClientConnectionError):
+            return 'connection'
+    return None
+
+
+def classify_status(status: int) -> Union[str, None]:
+    """
+        Определяет вид ошибки по HTTP-статусу ответа.
+
+        :param status: HTTP-статус ответа.
+        :type status: :obj:`base.Integer`
+        :return: Вид ошибки или None для успешного ответа.
+        :rtype: :obj:`base.String`
+    """
+    if status == 429:
+        return 'rate_limit'
+    if status >= 500:
+        return 'server'
+    if status >= 400:
+        return 'client'
+    return None
+
+
+class RetryPolicy:
+    def __init__(self,
+                 max_retries: int = 3,
+                 backoff: float = 0.2,
+                 max_backoff: float = 10.0,
+                 retry_statuses: tuple = (500, 502, 503, 504),
+                 retry_non_idempotent: bool = False,
+                 budget_ratio: float = 0.2,
+                 budget_max: int = 10):
+        """
+            Политика повторной отправки запросов: экспоненциальная задержка со случайным
+            разбросом (full jitter) и общий бюджет повторов.
+            Идемпотентные запросы (GET, PUT, DELETE, ...) повторяются после обрыва соединения,
+            таймаута, ответов 429 и retry_statuses. POST и PATCH повторяются только если
+            retry_non_idempotent, либо когда запрос гарантированно не дошел до сервера
+            (соединение не установлено) или был отклонен с ответом 429.
+            Ответы 4xx не повторяются.
+            Бюджет не дает повторам умножать нагрузку на сервер во время сбоя: каждый запрос
+            пополняет его на budget_ratio, каждый повтор расходует единицу.
+
+            :param max_retries: Максимальное количество повторов одного запроса.
+            :type max_retries: :obj:`base.Integer`
+            :param backoff: Базовая задержка перед повтором в секундах, удваивается с каждой попыткой.
+            :type backoff: :obj:`base.Float`
+            :param max_backoff: Максимальная задержка перед повтором в секундах.
+            :type max_backoff: :obj:`base.Float`
+            :param retry_statuses: Ответы 5xx, после которых запрос повторяется.
+            :param retry_non_idempotent: Повторять ли POST и PATCH после таймаутов, обрывов и ответов 5xx.
+            :type retry_non_idempotent: :obj:`base.Boolean`
+            :param budget_ratio: Доля повторов от количества запросов.
+            :type budget_ratio: :obj:`base.Float`
+            :param budget_max: Максимальный запас повторов, накопленный бюджетом.
+            :type budget_max: :obj:`base.Integer`
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+        self.retry_non_idempotent = retry_non_idempotent
+        self.budget_ratio = budget_ratio
+        self.budget_max = budget_max
+        self.requests = 0
+        self.retries = 0
+        self.retries_by_kind = {}
+        self.gave_up = 0
+        self.budget_exhausted = 0
+        self._budget = float(budget_max)
+        self._lock = threading.Lock()
+
+    def retry_delay(self,
+                    method: str,
+                    attempt: int,
+                    status: int = None,
+                    headers=None,
+                    error: Exception = None) -> Union[float, None]:
+        """
+            Решает, нужно ли повторить запрос после очередной попытки.
+
+            :param method: HTTP-метод запроса.
+            :type method: :obj:`base.String`
+            :param attempt: Номер попытки, начиная с 0.
+            :type attempt: :obj:`base.Integer`
+            :param status: HTTP-статус ответа, если ответ получен.
+            :type status: :obj:`base.Integer`
+            :param headers: Заголовки ответа.
+            :param error: Исключение, если ответ не получен.
+            :return: Задержка перед повтором в секундах или None, если повторять не нужно.
+            :rtype: :obj:`base.Float`
+        """
+        kind = classify_error(error) if error is not None else classify_status(status)
+
+        with self._lock:
+            if attempt == 0:
+                self.requests += 1
+                self._budget = min(self._budget + self.budget_ratio, self.budget_max)
+            if kind is None or not self._retryable(method, kind, status):
+                return None
+            if attempt >= self.max_retries:
+                self.gave_up += 1
+                return None
+            if self._budget < 1:
+                self.budget_exhausted += 1
+                self.gave_up += 1
+                return None
+            self._budget -= 1
+            self.retries += 1
+            self.retries_by_kind[kind] = self.retries_by_kind.get(kind, 0) + 1
+
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = headers.get('Retry-After') if headers is not None else None
+        if retry_after is not None:
+            try:
+                delay = max(delay, min(self.max_backoff, float(retry_after)))
+            except ValueError:
+                pass
+        return delay
+
+    def stats(self) -> dict:
+        """
+            Возвращает статистику повторов.
+
+            :return: Количество запросов, повторов (всего и по видам ошибок), запросов,
+            от повтора которых пришлось отказаться, и отказов из-за исчерпания бюджета.
+            :rtype: :obj:'typing.Dict'
+        """
+        with self._lock:
+            return {'requests': self.requests,
+                    'retries': self.retries,
+                    'retries_by_kind': dict(self.retries_by_kind),
+                    'gave_up': self.gave_up,
+                    'budget_exhausted': self.budget_exhausted}
+
+    def _retryable(self, method: str, kind: str, status: int) -> bool:
+        if kind == 'client':
+            return False
+        if kind == 'server' and status not in self.retry_statuses:
+            return False
+        return kind in SAFE_KINDS or method in IDEMPOTENT_METHODS or self.retry_non_idempotent
@@ -0,0 +1,103 @@
+from concurrent.futures import Future
+from typing import Callable, Awaitable
+import asyncio
+import copy
+import threading
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+            Объединение одновременных одинаковых запросов из разных потоков.
+            Пока запрос с некоторым ключом выполняется, остальные вызовы с тем же ключом
+            не отправляют свой запрос, а ждут и получают копию его результата.
+        """
+        self.executed = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: tuple, fn: Callable):
+        """
+            Выполняет fn или присоединяется к уже выполняющемуся вызову с тем же ключом.
+
+            :param key: Ключ запроса.
+            :param fn: Функция, выполняющая запрос.
+            :return: Результат fn.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return copy.deepcopy(call.result())
+
+        try:
+            result = fn()
+        except BaseException as err:
+            call.set_exception(err)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> dict:
+        """
+            Возвращает статистику объединения запросов.
+
+            :return: Количество выполненных запросов и запросов, которые не пришлось отправлять.
+            :rtype: :obj:'typing.Dict'
+        """
+        with self._lock:
+            return {'executed': self.executed, 'coalesced': self.coalesced}
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        """
+            Объединение одновременных одинаковых запросов внутри одного event loop.
+            Запрос выполняется в отдельной задаче, поэтому отмена одного из ожидающих
+            не отменяет запрос для остальных.
+        """
+        self.executed = 0
+        self.coalesced = 0
+        self._calls = {}
+
+    async def do(self, key: tuple, fn: Callable[[], Awaitable]):
+        """
+            Выполняет fn или присоединяется к уже выполняющемуся вызову с тем же ключом.
+
+            :param key: Ключ запроса.
+            :param fn: Функция, возвращающая корутину запроса.
+            :return: Результат корутины.
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = self._calls[key] = asyncio.ensure_future(fn())
+        task.add_done_callback(lambda done: self._forget(key, done))
+        self.executed += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: tuple, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        """
+            Возвращает статистику объединения запросов.
+
+            :return: Количество выполненных запросов и запросов, которые не пришлось отправлять.
+            :rtype: :obj:'typing.Dict'
+        """
+        return {'executed': self.executed, 'coalesced': self.coalesced}
@@ -1,25 +1,17 @@
-from . import mattermost
-from . import Mattermost_Base
-from . import mm_uploads_api
-from . import mm_bleve_api
-from . import mm_compliance_api
-from . import mm_elasticsearch_api
-from . import mm_exports_api
-from . import mm_imports_api
-from . import mm_int_actions_api
-from . import mm_opengraph_api
-from . import mm_permissions_api
-from . import mm_terms_of_service_api
-from . import mm_usage_api
-from . import mm_threads_api
-from . import mm_posts_api
-from . import mm_bots_api
-from . import mm_shared_channels_api
+import importlib
 
 
 __all__ = (
     'mattermost',
+    'mattermost_async',
     'Mattermost_Base',
+    'Mattermost_AsyncBase',
+    'Mattermost_Cache',
+    'Mattermost_CircuitBreaker',
+    'Mattermost_Errors',
+    'Mattermost_RateLimit',
+    'Mattermost_Retry',
+    'Mattermost_Singleflight',
     'mm_uploads_api',
     'mm_bleve_api',
     'mm_compliance_api',
@@ -34,5 +26,19 @@ __all__ = (
     'mm_threads_api',
     'mm_posts_api',
     'mm_bots_api',
-    'mm_shared_channels_api'
+    'mm_shared_channels_api',
+    'mm_channel_sync',
+    'mm_post_store',
+    'mm_post_loader',
+    'mm_publisher',
+    'mm_attachments',
+    'mm_upload_cache',
+    'mm_spool'
 )
+
+
+def __getattr__(name: str):
+    # Submodules are imported on first access to keep package import cheap.
+    if name in __all__:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,82 +1,194 @@
-from mm_uploads_api import Uploads
-from mm_bleve_api import Bleve
-from mm_compliance_api import Compliance
-from mm_elasticsearch_api import Elasticsearch
-from mm_exports_api import  Exports
-from mm_imports_api import Imports
-from mm_int_actions_api import IntegrationActions
-from mm_opengraph_api import Opengraph
-from mm_permissions_api import Permissions
-from mm_terms_of_service_api import TermsOfService
-from mm_usage_api import Usage
-from mm_shared_channels_api import SharedChannels
-from mm_threads_api import Threads
-from mm_posts_api import Posts
-from mm_bots_api import Bots
+from functools import cached_property
+import importlib
+
+from Mattermost_Base import create_session
+from Mattermost_Cache import ETagCache, ObjectCache
+from Mattermost_CircuitBreaker import CircuitBreaker
+from Mattermost_RateLimit import RateLimiter
+from Mattermost_Retry import RetryPolicy
+from Mattermost_Singleflight import SingleFlight
+
+
+_CLIENT_MODULES = {
+    'Uploads': 'mm_uploads_api',
+    'Bleve': 'mm_bleve_api',
+    'Compliance': 'mm_compliance_api',
+    'Elasticsearch': 'mm_elasticsearch_api',
+    'Exports': 'mm_exports_api',
+    'Imports': 'mm_imports_api',
+    'IntegrationActions': 'mm_int_actions_api',
+    'Opengraph': 'mm_opengraph_api',
+    'Permissions': 'mm_permissions_api',
+    'TermsOfService': 'mm_terms_of_service_api',
+    'Usage': 'mm_usage_api',
+    'SharedChannels': 'mm_shared_channels_api',
+    'Threads': 'mm_threads_api',
+    'Posts': 'mm_posts_api',
+    'Bots': 'mm_bots_api',
+}
+
+
+def _load_client_class(name: str):
+    # API modules are imported on first use only, so short-lived scripts
+    # pay just for the sub-clients they touch.
+    return getattr(importlib.import_module(_CLIENT_MODULES[name]), name)
+
+
+def __getattr__(name: str):
+    if name in _CLIENT_MODULES:
+        return _load_client_class(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class MattermostAPI:
-    def __init__(self, token: str, server_url: str):
+    def __init__(self, token: str,
+                 server_url: str,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 pool_block: bool = False,
+                 keep_alive: bool = True,
+                 session=None,
+                 post_store=None,
+                 upload_cache=None,
+                 etag_cache: ETagCache = None,
+                 object_cache: ObjectCache = None,
+                 singleflight: SingleFlight = None,
+                 timeout=None,
+                 rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None):
+        """
+        Mattermost API client. All sub-clients share one pooled HTTP session,
+        so connections are reused between calls. Each sub-client is created
+        on first access and reused afterwards.
+
+        :param token: Access token.
+        :param server_url: Mattermost server URL.
+        :param pool_connections: Number of per-host connection pools to cache.
+        :param pool_maxsize: Maximum number of connections kept per host.
+        :param pool_block: Wait for a free connection instead of opening extra ones when the pool is exhausted.
+        :param keep_alive: Reuse connections between calls.
+        :param session: Ready-made requests.Session to use instead of creating a new one.
+        :param post_store: PostStore that the posts sub-client reads through and writes to.
+        :param upload_cache: UploadCache that the uploads sub-client reuses not yet attached files from.
+        :param etag_cache: ETagCache for conditional GET requests (If-None-Match), shared by all sub-clients.
+        :param object_cache: ObjectCache for rarely changing resources (bots, terms of service, ...),
+        shared by all sub-clients.
+        :param singleflight: SingleFlight that merges concurrent identical GET requests into one.
+        :param timeout: Request timeout in seconds, or a (connect, read) tuple. Default: no timeout.
+        :param rate_limiter: RateLimiter shared by all sub-clients. By default a new one is created,
+        which learns the server limits from X-RateLimit-* headers. Pass False to disable rate limiting.
+        :param retry_policy: RetryPolicy shared by all sub-clients. By default a new one is created,
+        which retries idempotent requests after network errors and 5xx responses. Pass False to disable retries.
+        :param circuit_breaker: CircuitBreaker shared by all sub-clients, which fails requests fast
+        while a host and endpoint group keep failing.
+        """
+
         self.token = token
         self.server_url = server_url
-
-    @property
+        if session is None:
+            session = create_session(pool_connections=pool_connections,
+                                     pool_maxsize=pool_maxsize,
+                                     pool_block=pool_block,
+                                     keep_alive=keep_alive)
+        self.session = session
+        self.post_store = post_store
+        self.upload_cache = upload_cache
+        self.etag_cache = etag_cache
+        self.object_cache = object_cache
+        self.singleflight = singleflight
+        self.timeout = timeout
+        if rate_limiter is None:
+            rate_limiter = RateLimiter()
+        self.rate_limiter = rate_limiter or None
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy or None
+        self.circuit_breaker = circuit_breaker
+
+    def close(self) -> None:
+        """
+        Close all pooled connections.
+        """
+
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _client(self, name: str, **kwargs):
+        return _load_client_class(name)(token=self.token,
+                                        server_url=self.server_url,
+                                        session=self.session,
+                                        etag_cache=self.etag_cache,
+                                        object_cache=self.object_cache,
+                                        singleflight=self.singleflight,
+                                        timeout=self.timeout,
+                                        rate_limiter=self.rate_limiter,
+                                        retry_policy=self.retry_policy,
+                                        circuit_breaker=self.circuit_breaker,
+                                        **kwargs)
+
+    @cached_property
     def uploads(self):
-        return Uploads(token=self.token, server_url=self.server_url)
+        return self._client('Uploads', cache=self.upload_cache)
 
-    @property
+    @cached_property
     def bleve(self):
-        return Bleve(token=self.token, server_url=self.server_url)
+        return self._client('Bleve')
 
-    @property
+    @cached_property
     def compliance(self):
-        return Compliance(token=self.token, server_url=self.server_url)
+        return self._client('Compliance')
 
-    @property
+    @cached_property
     def elasticsearch(self):
-        return Elasticsearch(token=self.token, server_url=self.server_url)
+        return self._client('Elasticsearch')
 
-    @property
+    @cached_property
     def exports(self):
-        return Exports(token=self.token, server_url=self.server_url)
+        return self._client('Exports')
 
-    @property
+    @cached_property
     def imports(self):
-        return Imports(token=self.token, server_url=self.server_url)
+        return self._client('Imports')
 
-    @property
+    @cached_property
     def integration_actions(self):
-        return IntegrationActions(token=self.token, server_url=self.server_url)
+        return self._client('IntegrationActions')
 
-    @property
+    @cached_property
     def opengraph(self):
-        return Opengraph(token=self.token, server_url=self.server_url)
+        return self._client('Opengraph')
 
-    @property
+    @cached_property
     def permissions(self):
-        return Permissions(token=self.token, server_url=self.server_url)
+        return self._client('Permissions')
 
-    @property
+    @cached_property
     def terms(self):
-        return TermsOfService(token=self.token, server_url=self.server_url)
+        return self._client('TermsOfService')
 
-    @property
+    @cached_property
     def usage(self):
-        return Usage(token=self.token, server_url=self.server_url)
+        return self._client('Usage')
 
-    @property
+    @cached_property
     def shared_channels(self):
-        return SharedChannels(token=self.token, server_url=self.server_url)
+        return self._client('SharedChannels')
 
-    @property
+    @cached_property
     def threads(self):
-        return Threads(token=self.token, server_url=self.server_url)
+        return self._client('Threads')
 
-    @property
+    @cached_property
     def posts(self):
-        return Posts(token=self.token, server_url=self.server_url)
+        return self._client('Posts', store=self.post_store)
 
-    @property
+    @cached_property
     def bots(self):
-        return Bots(token=self.token, server_url=self.server_url)
+        return self._client('Bots')
 
@@ -0,0 +1,433 @@
+from typing import AsyncIterator
+from functools import cached_property
+import asyncio
+import contextlib
+import inspect
+import threading
+
+from Mattermost_AsyncBase import AsyncBase, create_async_session
+from Mattermost_Cache import ETagCache, ObjectCache
+from Mattermost_CircuitBreaker import CircuitBreaker
+from Mattermost_RateLimit import RateLimiter
+from Mattermost_Retry import RetryPolicy
+from Mattermost_Singleflight import AsyncSingleFlight
+from mattermost import _CLIENT_MODULES, _load_client_class
+
+
+class _AsyncPosts:
+    async def _then(self, result, handler):
+        # the post store is read and written once the response has arrived
+        if inspect.isawaitable(result):
+            result = await result
+        return handler(result)
+
+    async def iter_flagged_posts(self,
+                                 user_id: str,
+                                 team_id: str = None,
+                                 channel_id: str = None,
+                                 per_page: int = 200) -> AsyncIterator[dict]:
+        """
+        Iterate over all flagged posts of a user, fetching them page by page. See Posts.iter_flagged_posts.
+        """
+
+        from mm_posts_api import post_list_items
+
+        async def fetch_page(page: int) -> list[dict]:
+            return post_list_items(await self.get_list_of_flagged_posts(user_id,
+                                                                        team_id=team_id,
+                                                                        channel_id=channel_id,
+                                                                        page=page,
+                                                                        per_page=per_page))
+
+        async for posts in self.paginate(fetch_page, per_page=per_page):
+            for post in posts:
+                yield post
+
+    async def iter_posts_for_channel(self,
+                                     channel_id: str,
+                                     per_page: int = 200,
+                                     before: str = None,
+                                     after: str = None,
+                                     include_deleted: bool = None,
+                                     prefetch: int = 0) -> AsyncIterator[dict]:
+        """
+        Iterate over the posts in a channel, fetching them page by page. See Posts.iter_posts_for_channel.
+        """
+
+        pages = self._post_pages_for_channel(channel_id, per_page, before, after, include_deleted)
+        if prefetch:
+            pages = self.prefetch_pages(pages, prefetch)
+        async for posts in pages:
+            for post in posts:
+                yield post
+
+    async def _post_pages_for_channel(self,
+                                      channel_id: str,
+                                      per_page: int,
+                                      before: str = None,
+                                      after: str = None,
+                                      include_deleted: bool = None) -> AsyncIterator[list[dict]]:
+        from mm_posts_api import post_list_items
+
+        while True:
+            if after is not None:
+                posts = post_list_items(await self.get_posts_for_channel(channel_id,
+                                                                         per_page=per_page,
+                                                                         after=after,
+                                                                         include_deleted=include_deleted))
+                posts.reverse()
+            else:
+                posts = post_list_items(await self.get_posts_for_channel(channel_id,
+                                                                         per_page=per_page,
+                                                                         before=before,
+                                                                         include_deleted=include_deleted))
+            if posts:
+                yield posts
+            if len(posts) < per_page:
+                return
+
+            if after is not None:
+                after = posts[-1]['id']
+            else:
+                before = posts[-1]['id']
+
+    async def iter_search_for_team_posts(self,
+                                         team_id: str,
+                                         terms: str,
+                                         is_or_search: bool,
+                                         time_zone_offset: int = None,
+                                         include_deleted_channels: bool = None,
+                                         per_page: int = 60) -> AsyncIterator[dict]:
+        """
+        Iterate over all posts matching a team search, fetching them page by page.
+        See Posts.iter_search_for_team_posts.
+        """
+
+        from mm_posts_api import post_list_items
+
+        seen = set()
+
+        async def fetch_page(page: int) -> list[dict]:
+            posts = post_list_items(await self.search_for_team_posts(team_id,
+                                                                     terms,
+                                                                     is_or_search,
+                                                                     time_zone_offset=time_zone_offset,
+                                                                     include_deleted_channels=include_deleted_channels,
+                                                                     page=page,
+                                                                     per_page=per_page))
+            new_posts = [post for post in posts if post['id'] not in seen]
+            seen.update(post['id'] for post in new_posts)
+            return new_posts
+
+        async for posts in self.paginate(fetch_page, per_page=per_page):
+            for post in posts:
+                yield post
+
+
+class _AsyncBots:
+    async def iter_bots(self,
+                        per_page: int = 200,
+                        include_deleted: bool = None,
+                        only_orphaned: bool = None,
+                        prefetch: int = 0) -> AsyncIterator[dict]:
+        """
+        Iterate over all bots, fetching them page by page. See Bots.iter_bots.
+        """
+
+        async def fetch_page(page: int) -> list[dict]:
+            return await self.get_bots(page=page,
+                                       per_page=per_page,
+                                       include_deleted=include_deleted,
+                                       only_orphaned=only_orphaned) or []
+
+        pages = self.paginate(fetch_page, per_page=per_page)
+        if prefetch:
+            pages = self.prefetch_pages(pages, prefetch)
+        async for bots in pages:
+            for bot in bots:
+                yield bot
+
+
+class _AsyncThreads:
+    async def iter_threads_user_is_following(self,
+                                             user_id: str,
+                                             team_id: str,
+                                             since: int = None,
+                                             deleted: bool = None,
+                                             extended: bool = None,
+                                             pageSize: int = 30,
+                                             prefetch: int = 0) -> AsyncIterator[dict]:
+        """
+        Iterate over all threads that user is following, fetching them page by page.
+        See Threads.iter_threads_user_is_following.
+        """
+
+        async def fetch_page(page: int) -> list[dict]:
+            threads = await self.get_threads_user_is_following(user_id,
+                                                               team_id,
+                                                               since=since,
+                                                               deleted=deleted,
+                                                               extended=extended,
+                                                               page=page,
+                                                               pageSize=pageSize)
+            return threads.get('threads') or []
+
+        pages = self.paginate(fetch_page, per_page=pageSize)
+        if prefetch:
+            pages = self.prefetch_pages(pages, prefetch)
+        async for threads in pages:
+            for thread in threads:
+                yield thread
+
+
+class _AsyncCompliance:
+    async def iter_reports(self, per_page: int = 200) -> AsyncIterator[dict]:
+        """
+        Iterate over all compliance reports, fetching them page by page. See Compliance.iter_reports.
+        """
+
+        async def fetch_page(page: int) -> list[dict]:
+            return await self.get_reports(page=page, per_page=per_page) or []
+
+        async for reports in self.paginate(fetch_page, per_page=per_page):
+            for report in reports:
+                yield report
+
+
+class _AsyncSharedChannels:
+    async def iter_shrd_chnls_for_team(self, team_id: str, per_page: int = 200) -> AsyncIterator[dict]:
+        """
+        Iterate over all shared channels for a team, fetching them page by page.
+        See SharedChannels.iter_shrd_chnls_for_team.
+        """
+
+        async def fetch_page(page: int) -> list[dict]:
+            return await self.get_shrd_chnls_for_team(team_id, page=page, per_page=per_page) or []
+
+        async for channels in self.paginate(fetch_page, per_page=per_page):
+            for channel in channels:
+                yield channel
+
+
+class _AsyncUploads:
+    @staticmethod
+    async def _run_upload(steps) -> dict:
+        # runs the steps of Uploads._upload_steps: requests are awaited, hashing runs in a thread,
+        # since a large file would stall the event loop
+        result = error = None
+        with contextlib.closing(steps):
+            while True:
+                try:
+                    kind, step = steps.send(result) if error is None else steps.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+                result = error = None
+                try:
+                    if kind == 'sleep':
+                        await asyncio.sleep(step)
+                    elif kind == 'blocking':
+                        result = await asyncio.to_thread(step)
+                    else:
+                        result = await step()
+                except Exception as err:
+                    error = err
+
+
+# Async overrides of sub-client methods that post-process results, iterate over pages or run
+# the steps of a multi-request operation, keyed by client name.
+# They are mixed in ahead of AsyncBase when the async client class is built.
+_ASYNC_OVERRIDES = {'Posts': (_AsyncPosts,),
+                    'Uploads': (_AsyncUploads,),
+                    'Bots': (_AsyncBots,),
+                    'Threads': (_AsyncThreads,),
+                    'Compliance': (_AsyncCompliance,),
+                    'SharedChannels': (_AsyncSharedChannels,)}
+
+_async_classes = {}
+_async_classes_lock = threading.Lock()
+
+
+def _load_async_class(name: str):
+    # Like the synchronous facade, API modules are imported on first use only.
+    with _async_classes_lock:
+        cls = _async_classes.get(name)
+        if cls is None:
+            bases = _ASYNC_OVERRIDES.get(name, ()) + (AsyncBase, _load_client_class(name))
+            cls = _async_classes[name] = type(f'Async{name}', bases, {'__module__': __name__})
+        return cls
+
+
+def __getattr__(name: str):
+    if name.startswith('Async') and name[len('Async'):] in _CLIENT_MODULES:
+        return _load_async_class(name[len('Async'):])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class AsyncMattermostAPI:
+    def __init__(self, token: str,
+                 server_url: str,
+                 max_concurrency: int = 100,
+                 pool_maxsize: int = 100,
+                 limit_per_host: int = 0,
+                 keep_alive: bool = True,
+                 session=None,
+                 post_store=None,
+                 upload_cache=None,
+                 etag_cache: ETagCache = None,
+                 object_cache: ObjectCache = None,
+                 singleflight: AsyncSingleFlight = None,
+                 timeout=None,
+                 rate_limiter: RateLimiter = None,
+                 retry_policy: RetryPolicy = None,
+                 circuit_breaker: CircuitBreaker = None):
+        """
+        Asyncio Mattermost API client. Sub-clients expose the same methods as the
+        synchronous ones, but every method returns an awaitable. Each sub-client is
+        created on first access and reused afterwards.
+        All sub-clients share one aiohttp connection pool and one concurrency limit.
+
+        :param token: Access token.
+        :param server_url: Mattermost server URL.
+        :param max_concurrency: Maximum number of requests in flight at once.
+        :param pool_maxsize: Maximum number of open connections (0 - unlimited).
+        :param limit_per_host: Maximum number of open connections per host (0 - unlimited).
+        :param keep_alive: Reuse connections between calls.
+        :param session: Ready-made aiohttp.ClientSession to use instead of creating a new one.
+        :param post_store: PostStore that the posts sub-client reads through and writes to.
+        :param upload_cache: UploadCache that the uploads sub-client reuses not yet attached files from.
+        :param etag_cache: ETagCache for conditional GET requests (If-None-Match), shared by all sub-clients.
+        :param object_cache: ObjectCache for rarely changing resources (bots, terms of service, ...),
+        shared by all sub-clients.
+        :param singleflight: AsyncSingleFlight that merges concurrent identical GET requests into one.
+        :param timeout: Request timeout in seconds, or a (connect, read) tuple. Default: session timeout.
+        :param rate_limiter: RateLimiter shared by all sub-clients. By default a new one is created,
+        which learns the server limits from X-RateLimit-* headers. Pass False to disable rate limiting.
+        :param retry_policy: RetryPolicy shared by all sub-clients. By default a new one is created,
+        which retries idempotent requests after network errors and 5xx responses. Pass False to disable retries.
+        :param circuit_breaker: CircuitBreaker shared by all sub-clients, which fails requests fast
+        while a host and endpoint group keep failing.
+        """
+
+        self.token = token
+        self.server_url = server_url
+        self.pool_maxsize = pool_maxsize
+        self.limit_per_host = limit_per_host
+        self.keep_alive = keep_alive
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.post_store = post_store
+        self.upload_cache = upload_cache
+        self.etag_cache = etag_cache
+        self.object_cache = object_cache
+        self.singleflight = singleflight
+        self.timeout = timeout
+        if rate_limiter is None:
+            rate_limiter = RateLimiter()
+        self.rate_limiter = rate_limiter or None
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        self.retry_policy = retry_policy or None
+        self.circuit_breaker = circuit_breaker
+        self._session = session
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = create_async_session(pool_maxsize=self.pool_maxsize,
+                                                 limit_per_host=self.limit_per_host,
+                                                 keep_alive=self.keep_alive)
+        return self._session
+
+    async def close(self) -> None:
+        """
+        Close all pooled connections.
+        """
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        # sub-clients hold the closed session, drop them so the next access starts afresh
+        for name, value in list(vars(self).items()):
+            if isinstance(value, AsyncBase):
+                del self.__dict__[name]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _client(self, name: str, **kwargs):
+        # the shared session is created at the first request, which runs inside the event loop
+        return _load_async_class(name)(token=self.token,
+                                       server_url=self.server_url,
+                                       session=self._session,
+                                       session_factory=lambda: self.session,
+                                       semaphore=self.semaphore,
+                                       etag_cache=self.etag_cache,
+                                       object_cache=self.object_cache,
+                                       singleflight=self.singleflight,
+                                       timeout=self.timeout,
+                                       rate_limiter=self.rate_limiter,
+                                       retry_policy=self.retry_policy,
+                                       circuit_breaker=self.circuit_breaker,
+                                       **kwargs)
+
+    @cached_property
+    def uploads(self):
+        return self._client('Uploads', cache=self.upload_cache)
+
+    @cached_property
+    def bleve(self):
+        return self._client('Bleve')
+
+    @cached_property
+    def compliance(self):
+        return self._client('Compliance')
+
+    @cached_property
+    def elasticsearch(self):
+        return self._client('Elasticsearch')
+
+    @cached_property
+    def exports(self):
+        return self._client('Exports')
+
+    @cached_property
+    def imports(self):
+        return self._client('Imports')
+
+    @cached_property
+    def integration_actions(self):
+        return self._client('IntegrationActions')
+
+    @cached_property
+    def opengraph(self):
+        return self._client('Opengraph')
+
+    @cached_property
+    def permissions(self):
+        return self._client('Permissions')
+
+    @cached_property
+    def terms(self):
+        return self._client('TermsOfService')
+
+    @cached_property
+    def usage(self):
+        return self._client('Usage')
+
+    @cached_property
+    def shared_channels(self):
+        return self._client('SharedChannels')
+
+    @cached_property
+    def threads(self):
+        return self._client('Threads')
+
+    @cached_property
+    def posts(self):
+        return self._client('Posts', store=self.post_store)
+
+    @cached_property
+    def bots(self):
+        return self._client('Bots')
@@ -0,0 +1,137 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, NamedTuple, Union
+import os
+
+from mm_posts_api import Posts
+from mm_publisher import BulkPublisher, PublishItem
+from mm_uploads_api import Uploads
+
+
+MAX_FILES_PER_POST = 5
+
+
+class AttachResult(NamedTuple):
+    root_id: str
+    posts: list
+    file_ids: list
+
+
+class AttachmentError(Exception):
+    def __init__(self, message: str, errors: dict, posts: list):
+        """
+        Attachment pipeline failure.
+
+        :param message: Error description.
+        :param errors: Errors of the failed files: {index of the file: exception}.
+        :param posts: Posts published before the failure.
+        """
+
+        super().__init__(message)
+        self.errors = errors
+        self.posts = posts
+
+
+class AttachmentPublisher:
+    def __init__(self,
+                 uploads: Uploads,
+                 posts: Posts,
+                 max_workers: int = 4,
+                 chunk_size: int = 8 * 1024 * 1024,
+                 publisher: BulkPublisher = None):
+        """
+        Pipeline that attaches many files to posts.
+
+        Files are uploaded concurrently with bounded concurrency and attached
+        in the order they were given, at most 5 files per post (the server limit).
+        The first post is the thread root, the others are its replies. Every post is
+        published as soon as its files are uploaded, while the next files are still uploading.
+
+        :param uploads: Uploads client.
+        :param posts: Posts client.
+        :param max_workers: Default: 4. Maximum number of files being uploaded at once.
+        :param chunk_size: Default: 8 MiB. Size of one upload request body in bytes.
+        :param publisher: BulkPublisher used to send the posts. Default: a new BulkPublisher for posts.
+        """
+
+        self.uploads = uploads
+        self.posts = posts
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.publisher = publisher if publisher is not None else BulkPublisher(posts)
+
+    def publish(self,
+                channel_id: str,
+                files: Iterable[Union[str, os.PathLike, tuple]],
+                message: str = '',
+                root_id: str = None,
+                props: dict = None) -> AttachResult:
+        """
+        Upload files and publish them as a thread.
+
+        If a file fails to upload, the uploads that have not started are cancelled and
+        AttachmentError is raised. The posts with the files before it stay published.
+        With an upload cache on the uploads client, files that were uploaded but not attached
+        are released back to it, so publishing them again does not upload them again.
+
+        :param channel_id: The channel ID to post in.
+        :param files: Full paths to files or (full path, file name) tuples.
+        :param message: The message of the first post. The other posts have no text.
+        :param root_id: The post ID of an existing thread to reply to. Then every post is a reply to it.
+        :param props: A general JSON property bag to attach to the first post.
+        :return: ID of the thread root, published posts and file IDs, all in the order of files.
+        """
+
+        files = [(item, None) if isinstance(item, (str, os.PathLike)) else tuple(item) for item in files]
+        if not files:
+            raise ValueError("No files to attach")
+
+        posts = []
+        file_ids = []
+        errors = {}
+        futures = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(self.uploads.upload_file, channel_id, path,
+                                           filename=filename, chunk_size=self.chunk_size)
+                           for path, filename in files]
+                try:
+                    for start in range(0, len(futures), MAX_FILES_PER_POST):
+                        group = []
+                        for index in range(start, min(start + MAX_FILES_PER_POST, len(futures))):
+                            try:
+                                group.append(futures[index].result()['id'])
+                            except Exception as err:
+                                errors[index] = err
+                        if errors:
+                            break
+
+                        first = not posts
+                        item = PublishItem(channel_id,
+                                           message if first else '',
+                                           root_id=root_id,
+                                           props=props if first else None,
+                                           file_ids=group)
+                        result = self.publisher.publish([item])[0]
+                        if not result.ok:
+                            raise AttachmentError(f"Failed to publish files {start}-{start + len(group) - 1}: "
+                                                  f"{result.error}", errors, posts) from result.error
+                        posts.append(result.post)
+                        file_ids.extend(group)
+                        if root_id is None:
+                            root_id = result.post['id']
+                finally:
+                    for future in futures:
+                        future.cancel()
+        finally:
+            if self.uploads.cache is not None:
+                # attached files can not be reused, the rest go back to the cache for the next attempt
+                uploaded = [future.result()['id'] for future in futures
+                            if not future.cancelled() and future.exception() is None]
+                posted = set(file_ids)
+                self.uploads.cache.forget(posted)
+                self.uploads.cache.release(file_id for file_id in uploaded if file_id not in posted)
+
+        if errors:
+            raise AttachmentError(f"Failed to upload {len(errors)} of {len(files)} files", errors, posts)
+
+        return AttachResult(root_id, posts, file_ids)
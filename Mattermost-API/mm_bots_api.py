@@ -1,10 +1,13 @@
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Iterator
+import os
+
 from Mattermost_Base import Base
+from Mattermost_Files import FileLike
 
 
 class Bots(Base):
-    def __init__(self, token: str, server_url: str):
-        super().__init__(token, server_url)
+    def __init__(self, token: str, server_url: str, **kwargs):
+        super().__init__(token, server_url, **kwargs)
         self.api_url = f"{self.base_url}/bots"
 
     def convert_user_into_bot(self, user_id: str) -> dict:
@@ -90,7 +93,34 @@ class Bots(Base):
         if only_orphaned is not None:
             self.add_query_param('only_orphaned', only_orphaned)
 
-        return self.request(url, request_type='GET', body=True)
+        return self.request(url, request_type='GET', params=True)
+
+    def iter_bots(self,
+                  per_page: int = 200,
+                  include_deleted: bool = None,
+                  only_orphaned: bool = None,
+                  prefetch: int = 0) -> Iterator[dict]:
+
+        """
+        Iterate over all bots, fetching them page by page.
+
+        :param per_page: Default: 200. The number of bots per page. There is a maximum limit of 200 per page.
+        :param include_deleted: If deleted bots should be returned.
+        :param only_orphaned: When true, only orphaned bots will be returned.
+        :param prefetch: Default: 0. How many pages to fetch in the background ahead of the one being consumed.
+        :return: Iterator over bots
+
+        """
+
+        pages = self.paginate(lambda page: self.get_bots(page=page,
+                                                         per_page=per_page,
+                                                         include_deleted=include_deleted,
+                                                         only_orphaned=only_orphaned) or [],
+                              per_page=per_page)
+        if prefetch:
+            pages = self.prefetch_pages(pages, prefetch)
+        for bots in pages:
+            yield from bots
 
     def patch_bot(self,
                   bot_user_id: str,
@@ -123,7 +153,7 @@ class Bots(Base):
         if description is not None:
             self.add_to_json('description', description)
 
-        return self.request(url, request_type='PUT', body=True)
+        return self.request(url, request_type='PUT', body=True, invalidate=('bot', bot_user_id))
 
     def get_bot(self,
                 bot_user_id: str,
@@ -149,7 +179,7 @@ class Bots(Base):
         if include_deleted is not None:
             self.add_query_param('include_deleted', include_deleted)
 
-        return self.request(url, request_type='GET', body=True)
+        return self.request(url, request_type='GET', params=True, cache=('bot', bot_user_id))
 
     def disable_bot(self, bot_user_id: str) -> dict:
 
@@ -168,7 +198,7 @@ class Bots(Base):
 
         self.reset()
 
-        return self.request(url, request_type='POST')
+        return self.request(url, request_type='POST', invalidate=('bot', bot_user_id))
 
     def enable_bot(self, bot_user_id: str) -> dict:
 
@@ -187,7 +217,7 @@ class Bots(Base):
 
         self.reset()
 
-        return self.request(url, request_type='POST')
+        return self.request(url, request_type='POST', invalidate=('bot', bot_user_id))
 
     def assign_bot_to_user(self,
                            bot_user_id: str,
@@ -209,7 +239,7 @@ class Bots(Base):
 
         self.reset()
 
-        return self.request(url, request_type='POST')
+        return self.request(url, request_type='POST', invalidate=('bot', bot_user_id))
 
     def get_bot_lhs_icon(self, bot_user_id: str) -> dict:
 
@@ -232,7 +262,7 @@ class Bots(Base):
 
     def set_bot_lhs_icon_image(self,
                                bot_user_id: str,
-                               image: str) -> dict:
+                               image: FileLike) -> dict:
 
         """
         Set a bot's LHS icon image based on bot_user_id string parameter.
@@ -243,17 +273,18 @@ class Bots(Base):
         Minimum server version: 5.14
 
         :param bot_user_id: Bot user ID.
-        :param image: SVG icon image to be uploaded
+        :param image: SVG icon image to be uploaded: full path to file, open binary file object, bytes or mmap.
         :return: SVG icon image info
         """
 
         url = f"{self.api_url}/{bot_user_id}/icon"
 
         self.reset()
-        self.add_multipart_form_data_header()
-        self.add_file(file_path=image)
+        # the server accepts only image/svg+xml parts, and in-memory data carries no file name to guess it from
+        filename = None if isinstance(image, (str, os.PathLike)) or hasattr(image, 'name') else 'icon.svg'
+        self.add_file(file_path=image, name='image', filename=filename)
 
-        return self.request(url, request_type='POST')
+        return self.request(url, request_type='POST', files=True)
 
     def delete_bot_lhs_icon_image(self, bot_user_id: str) -> dict:
 
@@ -338,4 +369,4 @@ class Bots(Base):
         if notify_props is not None:
             self.add_to_json('notify_props', notify_props)
 
-        return self.request(url, request_type='POST', body=True)
+        return self.request(url, request_type='POST', params=True, body=True, invalidate=('bot', bot_user_id))
@@ -0,0 +1,143 @@
+from typing import Iterator
+import json
+import os
+import threading
+
+from mm_posts_api import Posts, post_list_items
+
+
+SINCE_LIMIT = 1000
+
+
+def post_changed_at(post: dict) -> int:
+    """
+    Return the latest modification time of a post in Unix time milliseconds.
+
+    :param post: Post object.
+    :return: Latest of create, update, edit and delete times.
+    """
+
+    return max(post.get('create_at') or 0,
+               post.get('update_at') or 0,
+               post.get('edit_at') or 0,
+               post.get('delete_at') or 0)
+
+
+class ChannelSync:
+    def __init__(self, posts: Posts, state_path: str = None, per_page: int = 200, include_deleted: bool = False):
+        """
+        Incremental channel synchronisation built on Posts.get_posts_for_channel.
+
+        For every channel a high-water mark is kept: the latest modification time seen
+        and the newest post. The first sync of a channel downloads it completely,
+        later syncs pull only posts changed since the mark. The server answers a since
+        query with a limited number of posts, so a truncated answer is completed with
+        cursor paging. Paging returns deleted posts only with include_deleted, so without it
+        deletions are not reported for posts beyond the limited answer.
+
+        :param posts: Posts client.
+        :param state_path: JSON file to keep high-water marks between runs.
+        :param per_page: Default: 200. The number of posts per page when paging is needed.
+        :param include_deleted: Default: false. Page with include_deleted, which requires permission
+        to read deleted posts.
+        """
+
+        self.posts = posts
+        self.state_path = state_path
+        self.per_page = per_page
+        self.include_deleted = include_deleted
+        self.state = {}
+        self._lock = threading.Lock()
+
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path, 'r') as f:
+                self.state = json.load(f)
+
+    def sync(self, channel_id: str) -> Iterator[dict]:
+        """
+        Yield posts created, edited or deleted in the channel since the previous sync.
+        A post may be yielded once per sync at most. Deleted posts are reported in full
+        only with include_deleted, see ChannelSync.
+
+        The high-water mark is advanced only after the iterator is exhausted,
+        so an interrupted sync is repeated in full next time.
+
+        :param channel_id: The channel ID to sync.
+        :return: Iterator over changed posts.
+        """
+
+        mark = self.state.get(channel_id)
+        since = mark['since'] if mark is not None else 0
+        newest = None
+        seen = set()
+
+        for post in self._changed_posts(channel_id, mark):
+            if post['id'] in seen:
+                continue
+            seen.add(post['id'])
+            since = max(since, post_changed_at(post))
+            if newest is None or post['create_at'] > newest['create_at']:
+                newest = post
+            yield post
+
+        if newest is None and mark is None:
+            return
+        if newest is None or (mark is not None and newest['create_at'] <= mark['last_create_at']):
+            last_post_id, last_create_at = mark['last_post_id'], mark['last_create_at']
+        else:
+            last_post_id, last_create_at = newest['id'], newest['create_at']
+
+        with self._lock:
+            self.state[channel_id] = {'since': since,
+                                      'last_post_id': last_post_id,
+                                      'last_create_at': last_create_at}
+            self.save()
+
+    def forget(self, channel_id: str) -> None:
+        """
+        Drop the high-water mark of a channel, so the next sync downloads it completely.
+
+        :param channel_id: Channel ID.
+        """
+
+        with self._lock:
+            self.state.pop(channel_id, None)
+            self.save()
+
+    def save(self) -> None:
+        """
+        Write high-water marks to the state file, if one is configured.
+        """
+
+        if self.state_path is None:
+            return
+
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _changed_posts(self, channel_id: str, mark: dict) -> Iterator[dict]:
+        if mark is None:
+            yield from self.posts.iter_posts_for_channel(channel_id, per_page=self.per_page)
+            return
+
+        result = self.posts.get_posts_for_channel(channel_id, since=mark['since'])
+        changed = post_list_items(result)
+        yield from changed
+
+        # The server returns at most SINCE_LIMIT posts, newest first,
+        # so a full answer means older changes may have been cut off.
+        truncated = len(changed) >= SINCE_LIMIT
+        if truncated:
+            yield from self.posts.iter_posts_for_channel(channel_id,
+                                                         per_page=self.per_page,
+                                                         after=mark['last_post_id'],
+                                                         include_deleted=self.include_deleted or None)
+            oldest = min(changed, key=lambda post: post['create_at'])
+            for post in self.posts.iter_posts_for_channel(channel_id,
+                                                          per_page=self.per_page,
+                                                          before=oldest['id'],
+                                                          include_deleted=self.include_deleted or None):
+                if post_changed_at(post) > mark['since']:
+                    yield post
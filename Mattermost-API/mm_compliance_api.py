@@ -1,10 +1,12 @@
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Iterator, Callable, BinaryIO
+import os
+
 from Mattermost_Base import Base
 
 
 class Compliance(Base):
-    def __init__(self, token: str, server_url: str):
-        super().__init__(token, server_url)
+    def __init__(self, token: str, server_url: str, **kwargs):
+        super().__init__(token, server_url, **kwargs)
         self.api_url = f"{self.base_url}/compliance"
 
     def create_report(self):
@@ -38,11 +40,23 @@ class Compliance(Base):
 
         self.reset()
         if page is not None:
-            self.add_to_json('page', page)
+            self.add_query_param('page', page)
         if per_page is not None:
-            self.add_to_json('per_page', per_page)
+            self.add_query_param('per_page', per_page)
 
-        return self.request(url, request_type='GET')
+        return self.request(url, request_type='GET', params=True)
+
+    def iter_reports(self, per_page: int = 200) -> Iterator[dict]:
+        """
+        Iterate over all compliance reports, fetching them page by page.
+
+        :param per_page: The number of reports per page.
+        :return: Iterator over compliance reports
+        """
+
+        for reports in self.paginate(lambda page: self.get_reports(page=page, per_page=per_page) or [],
+                                     per_page=per_page):
+            yield from reports
 
     def get_report(self, report_id: str) -> dict:
         """
@@ -57,24 +71,39 @@ class Compliance(Base):
         url = f"{self.api_url}/reports/{report_id}"
 
         self.reset()
-        self.add_to_json('report_id', report_id)
 
         return self.request(url, request_type='GET')
 
-    def download_report(self, report_id: str) -> dict:
+    def download_report(self,
+                        report_id: str,
+                        file: Union[str, os.PathLike, BinaryIO] = None,
+                        size: int = None,
+                        sha256: str = None,
+                        progress: Callable[[int, Union[int, None]], None] = None,
+                        max_resumes: int = 10) -> dict:
         """
         Download the full contents of a report as a file.
 
+        The report is streamed to disk in chunks, so memory use does not depend on its size.
+        An interrupted download resumes with a Range request; a partly downloaded file
+        is kept as <file>.part and is resumed by the next call.
+
         Must have manage_system permission.
 
         :param report_id: Compliance report GUID
-        :return: The compliance report file
+        :param file: Full path to save the report to, or a binary file object open for writing.
+        Default: <report_id>.zip in the current directory.
+        :param size: Expected size of the file in bytes.
+        :param sha256: Expected SHA-256 of the file content (hex).
+        :param progress: Function called with (bytes downloaded, file size or None) after every chunk.
+        :param max_resumes: Default: 10. How many times to resume after interruptions before giving up.
+        :return: Path, size and SHA-256 of the downloaded report
         """
 
-        url = f"{self.api_url}/reports/{report_id}"
+        url = f"{self.api_url}/reports/{report_id}/download"
 
         self.reset()
-        self.add_to_json('report_id', report_id)
 
-        return self.request(url, request_type='GET')
+        return self.download(url, file if file is not None else f"{report_id}.zip",
+                             size=size, sha256=sha256, progress=progress, max_resumes=max_resumes)
 
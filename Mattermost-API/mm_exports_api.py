@@ -1,10 +1,12 @@
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Callable, BinaryIO
+import os
+
 from Mattermost_Base import Base
 
 
 class Exports(Base):
-    def __init__(self, token: str, server_url: str):
-        super().__init__(token, server_url)
+    def __init__(self, token: str, server_url: str, **kwargs):
+        super().__init__(token, server_url, **kwargs)
         self.api_url = f"{self.base_url}/exports"
 
     def list_export_files(self) -> dict:
@@ -23,23 +25,39 @@ class Exports(Base):
 
         return self.request(url, request_type='GET')
 
-    def download_export_file(self, export_name: str) -> dict:
+    def download_export_file(self,
+                             export_name: str,
+                             file: Union[str, os.PathLike, BinaryIO] = None,
+                             size: int = None,
+                             sha256: str = None,
+                             progress: Callable[[int, Union[int, None]], None] = None,
+                             max_resumes: int = 10) -> dict:
         """
         Downloads an export file.
 
+        The file is streamed to disk in chunks, so a multi-GB export downloads in constant memory.
+        An interrupted download resumes with a Range request; a partly downloaded file
+        is kept as <file>.part and is resumed by the next call.
+
         Minimum server version: 5.33
         Must have manage_system permissions.
 
         :param export_name: The name of the export file to download
-        :return: Download info
+        :param file: Full path to save the export to, or a binary file object open for writing.
+        Default: export_name in the current directory.
+        :param size: Expected size of the file in bytes.
+        :param sha256: Expected SHA-256 of the file content (hex).
+        :param progress: Function called with (bytes downloaded, file size or None) after every chunk.
+        :param max_resumes: Default: 10. How many times to resume after interruptions before giving up.
+        :return: Path, size and SHA-256 of the downloaded file
         """
 
         url = f"{self.api_url}/{export_name}"
 
         self.reset()
-        self.add_to_json('export_name', export_name)
 
-        return self.request(url, request_type='GET')
+        return self.download(url, file if file is not None else export_name,
+                             size=size, sha256=sha256, progress=progress, max_resumes=max_resumes)
 
     def delete_export_file(self, export_name: str) -> dict:
         """
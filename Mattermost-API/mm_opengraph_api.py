@@ -3,8 +3,8 @@ from Mattermost_Base import Base
 
 
 class Opengraph(Base):
-    def __init__(self, token: str, server_url: str):
-        super().__init__(token, server_url)
+    def __init__(self, token: str, server_url: str, **kwargs):
+        super().__init__(token, server_url, **kwargs)
         self.api_url = f"{self.base_url}/opengraph"
 
     def get_og_mdata_for_url(self) -> dict:
@@ -3,8 +3,8 @@ from Mattermost_Base import Base
 
 
 class Permissions(Base):
-    def __init__(self, token: str, server_url: str):
-        super().__init__(token, server_url)
+    def __init__(self, token: str, server_url: str, **kwargs):
+        super().__init__(token, server_url, **kwargs)
         self.api_url = f"{self.base_url}/permissions"
 
     def return_sys_console_ancillary_permissions(self) -> dict:
@@ -19,4 +19,4 @@ class Permissions(Base):
         url = f"{self.api_url}/ancillary"
         self.reset()
 
-        return self.request(url, request_type='GET')
+        return self.request(url, request_type='GET', cache=('ancillary_permissions',))
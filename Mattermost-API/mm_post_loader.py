@@ -0,0 +1,142 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import copy
+import threading
+import time
+
+from mm_posts_api import Posts
+
+
+class PostLoader:
+    def __init__(self, posts: Posts, window: float = 0.005, max_batch: int = 100, max_workers: int = 4):
+        """
+        Batching loader for single post lookups.
+
+        Post ids requested one at a time are collected for up to window seconds
+        or until max_batch distinct ids are waiting, and then fetched with a single
+        Posts.get_posts_by_list_of_ids call. Every caller gets its own post back.
+
+        :param posts: Posts client.
+        :param window: Default: 0.005. How long to wait for more ids after the first one, in seconds.
+        :param max_batch: Default: 100. Maximum number of ids fetched in one request.
+        :param max_workers: Default: 4. Maximum number of batch requests in flight.
+        """
+
+        self.posts = posts
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.loads = 0
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._dispatcher = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def load(self, post_id: str) -> Future:
+        """
+        Schedule a post lookup.
+
+        :param post_id: ID of the post to get.
+        :return: Future resolving to the post, or to an empty dict if the server did not return it.
+        """
+
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("PostLoader is closed")
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._run, daemon=True)
+                self._dispatcher.start()
+            self._pending.setdefault(post_id, []).append(future)
+            self.loads += 1
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        return future
+
+    def get(self, post_id: str, timeout: float = None) -> dict:
+        """
+        Get a single post, batched with other lookups made at the same time.
+
+        :param post_id: ID of the post to get.
+        :param timeout: Maximum time to wait, in seconds.
+        :return: Post retrieval info.
+        """
+
+        return self.load(post_id).result(timeout)
+
+    def get_many(self, post_ids: list[str], timeout: float = None) -> list[dict]:
+        """
+        Get several posts, batched with other lookups made at the same time.
+
+        :param post_ids: List of post ids.
+        :param timeout: Maximum time to wait for each post, in seconds.
+        :return: List of posts in the order of post_ids.
+        """
+
+        futures = [self.load(post_id) for post_id in post_ids]
+        return [future.result(timeout) for future in futures]
+
+    def stats(self) -> dict:
+        """
+        Return batching statistics.
+
+        :return: Number of lookups and of batch requests made for them.
+        """
+
+        with self._cond:
+            return {'loads': self.loads, 'batches': self.batches}
+
+    def close(self) -> None:
+        """
+        Fetch the lookups still waiting and stop the loader.
+        """
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                post_ids = list(self._pending)[:self.max_batch]
+                batch = {post_id: self._pending.pop(post_id) for post_id in post_ids}
+                self.batches += 1
+
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: dict) -> None:
+        try:
+            posts = self.posts.get_posts_by_list_of_ids(list(batch))
+        except Exception as err:
+            for futures in batch.values():
+                for future in futures:
+                    future.set_exception(err)
+            return
+
+        found = {post['id']: post for post in posts if isinstance(post, dict) and 'id' in post}
+        for post_id, futures in batch.items():
+            post = found.get(post_id, {})
+            futures[0].set_result(post)
+            for future in futures[1:]:
+                future.set_result(copy.deepcopy(post))
@@ -0,0 +1,179 @@
+from typing import Iterable, Union
+import json
+import sqlite3
+import threading
+
+
+class PostStore:
+    def __init__(self, path: str):
+        """
+        Local persistent post store backed by SQLite.
+
+        Posts are keyed by id and indexed by channel and create/update time.
+        Soft-deleted posts are kept as tombstones, so a deleted post is not fetched again.
+        A newer version of a post (by update_at) always replaces an older one.
+
+        :param path: Path to the SQLite database file, or ":memory:".
+        """
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS posts (
+                    id TEXT PRIMARY KEY,
+                    channel_id TEXT NOT NULL,
+                    root_id TEXT NOT NULL DEFAULT '',
+                    create_at INTEGER NOT NULL DEFAULT 0,
+                    update_at INTEGER NOT NULL DEFAULT 0,
+                    delete_at INTEGER NOT NULL DEFAULT 0,
+                    data TEXT NOT NULL
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS posts_channel_create ON posts (channel_id, create_at)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS posts_channel_update ON posts (channel_id, update_at)")
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+
+        with self._lock:
+            self._db.close()
+
+    def upsert(self, posts: Iterable[dict]) -> int:
+        """
+        Insert or update posts in a single transaction.
+        Objects without an id (e.g. failed responses) are skipped.
+
+        :param posts: Post objects.
+        :return: Number of posts written.
+        """
+
+        rows = [(post['id'],
+                 post.get('channel_id') or '',
+                 post.get('root_id') or '',
+                 post.get('create_at') or 0,
+                 post.get('update_at') or 0,
+                 post.get('delete_at') or 0,
+                 json.dumps(post))
+                for post in posts if isinstance(post, dict) and post.get('id')]
+        if not rows:
+            return 0
+
+        with self._lock, self._db:
+            self._db.executemany("""
+                INSERT INTO posts (id, channel_id, root_id, create_at, update_at, delete_at, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    channel_id = excluded.channel_id,
+                    root_id = excluded.root_id,
+                    create_at = excluded.create_at,
+                    update_at = excluded.update_at,
+                    delete_at = excluded.delete_at,
+                    data = excluded.data
+                WHERE excluded.update_at >= posts.update_at""", rows)
+        return len(rows)
+
+    def delete(self, post_id: str, delete_at: int) -> None:
+        """
+        Mark a post as soft-deleted, keeping a tombstone for it.
+
+        :param post_id: Post GUID.
+        :param delete_at: Deletion time in Unix time milliseconds.
+        """
+
+        with self._lock, self._db:
+            self._db.execute("""
+                INSERT INTO posts (id, channel_id, update_at, delete_at, data)
+                VALUES (?, '', ?, ?, json_object('id', ?, 'delete_at', ?))
+                ON CONFLICT (id) DO UPDATE SET
+                    update_at = max(posts.update_at, excluded.update_at),
+                    delete_at = excluded.delete_at,
+                    data = json_set(posts.data, '$.delete_at', excluded.delete_at)""",
+                             (post_id, delete_at, delete_at, post_id, delete_at))
+
+    def get(self, post_id: str) -> Union[dict, None]:
+        """
+        Get a stored post, tombstones included.
+
+        :param post_id: Post GUID.
+        :return: Post object or None if the post is not stored.
+        """
+
+        with self._lock:
+            row = self._db.execute("SELECT data FROM posts WHERE id = ?", (post_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def get_many(self, post_ids: Iterable[str]) -> dict:
+        """
+        Get stored posts by ids, tombstones included.
+
+        :param post_ids: Post GUIDs.
+        :return: Dictionary of stored posts by id.
+        """
+
+        post_ids = list(post_ids)
+        found = {}
+        with self._lock:
+            # stay below SQLite's limit on the number of query parameters
+            for start in range(0, len(post_ids), 500):
+                chunk = post_ids[start:start + 500]
+                rows = self._db.execute(f"SELECT id, data FROM posts WHERE id IN ({','.join('?' * len(chunk))})",
+                                        chunk).fetchall()
+                found.update((post_id, json.loads(data)) for post_id, data in rows)
+        return found
+
+    def posts_in_channel(self,
+                         channel_id: str,
+                         since: int = None,
+                         until: int = None,
+                         by: str = 'create_at',
+                         include_deleted: bool = False,
+                         limit: int = None) -> list[dict]:
+        """
+        Get stored posts of a channel in a time range, ordered by time ascending.
+
+        :param channel_id: Channel ID.
+        :param since: Select posts with the time greater than or equal to this, in Unix time milliseconds.
+        :param until: Select posts with the time lower than this, in Unix time milliseconds.
+        :param by: Default: create_at. The time column to filter and order by: create_at or update_at.
+        :param include_deleted: Default: false. Whether to return tombstones of deleted posts.
+        :param limit: Maximum number of posts to return.
+        :return: List of posts.
+        """
+
+        if by not in ('create_at', 'update_at'):
+            raise ValueError(f"by must be 'create_at' or 'update_at', not {by!r}")
+
+        query = "SELECT data FROM posts WHERE channel_id = ?"
+        args = [channel_id]
+        if since is not None:
+            query += f" AND {by} >= ?"
+            args.append(since)
+        if until is not None:
+            query += f" AND {by} < ?"
+            args.append(until)
+        if not include_deleted:
+            query += " AND delete_at = 0"
+        query += f" ORDER BY {by}"
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+
+        with self._lock:
+            rows = self._db.execute(query, args).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def purge_deleted(self, before: int) -> int:
+        """
+        Remove tombstones of posts deleted before the given time.
+
+        :param before: Time in Unix time milliseconds.
+        :return: Number of removed tombstones.
+        """
+
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM posts WHERE delete_at > 0 AND delete_at < ?", (before,)).rowcount
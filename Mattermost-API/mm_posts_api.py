@@ -1,11 +1,41 @@
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Iterator, Callable
+import time
+
 from Mattermost_Base import Base
+from Mattermost_Errors import NotFoundError
+from mm_post_store import PostStore
+
+
+def post_list_items(post_list: dict) -> list[dict]:
+    """
+    Return the posts of a post list response in the order given by its "order" field.
+
+    :param post_list: Post list retrieval info.
+    :return: List of posts.
+    """
+
+    posts = post_list.get('posts') or {}
+    return [posts[post_id] for post_id in post_list.get('order') or [] if post_id in posts]
 
 
 class Posts(Base):
-    def __init__(self, token: str, server_url: str):
-        super().__init__(token, server_url)
+    def __init__(self, token: str, server_url: str, store: PostStore = None, **kwargs):
+        super().__init__(token, server_url, **kwargs)
         self.api_url = f"{self.base_url}/posts"
+        self.store = store
+
+    def _then(self, result, handler: Callable):
+        # Store reads and writes run on the result of a request.
+        # AsyncPosts awaits the result before handing it over.
+        return handler(result)
+
+    def _store_post(self, post: dict) -> dict:
+        self.store.upsert([post])
+        return post
+
+    def _store_post_list(self, post_list: dict) -> dict:
+        self.store.upsert(post_list_items(post_list))
+        return post_list
 
     def create_post(self,
                     channel_id: str,
@@ -14,7 +44,8 @@ class Posts(Base):
                     root_id: str = None,
                     file_ids: list[str] = None,
                     props: dict = None,
-                    metadata: dict = None) -> dict:
+                    metadata: dict = None,
+                    pending_post_id: str = None) -> dict:
         """
         Create a new post in a channel. To create the post as a comment on another post,
         provide root_id.
@@ -29,6 +60,8 @@ class Posts(Base):
         Note that posts are limited to 5 files maximum. Please use additional posts for more files.
         :param props: A general JSON property bag to attach to the post
         :param metadata: A JSON object to add post metadata, e.g the post's priority
+        :param pending_post_id: Client-generated idempotency key. The server returns the already
+        created post instead of creating a duplicate when a request with the same key is repeated shortly.
         :return: Post creation info.
         """
 
@@ -47,8 +80,13 @@ class Posts(Base):
             self.add_to_json('props', props)
         if metadata is not None:
             self.add_to_json('metadata', metadata)
+        if pending_post_id is not None:
+            self.add_to_json('pending_post_id', pending_post_id)
 
-        return self.request(url, request_type='POST', body=True)
+        post = self.request(url, request_type='POST', body=True)
+        if self.store is None:
+            return post
+        return self._then(post, self._store_post)
 
     def create_ephemeral_post(self,
                               user_id: str,
@@ -87,12 +125,26 @@ class Posts(Base):
         """
 
         url = f"{self.api_url}/{post_id}"
+        if self.store is not None:
+            post = self.store.get(post_id)
+            if post is not None:
+                return self._then(post, lambda post: self._stored_post(url, post, include_deleted))
+
         self.reset()
-        self.add_application_json_header()
         if include_deleted is not None:
-            self.add_to_json('include_deleted', include_deleted)
+            self.add_query_param('include_deleted', include_deleted)
 
-        return self.request(url, request_type='GET', body=True)
+        post = self.request(url, request_type='GET', params=True)
+        if self.store is None:
+            return post
+        return self._then(post, self._store_post)
+
+    @staticmethod
+    def _stored_post(url: str, post: dict, include_deleted: bool = None) -> dict:
+        # a tombstone answers like the server does for a deleted post
+        if include_deleted or not post.get('delete_at'):
+            return post
+        raise NotFoundError(f"GET {url}: post was deleted", status=404)
 
     def delete_post(self, post_id: str) -> dict:
         """
@@ -108,7 +160,15 @@ class Posts(Base):
         url = f"{self.api_url}/{post_id}"
         self.reset()
 
-        return self.request(url, request_type='DEL')
+        result = self.request(url, request_type='DEL')
+        if self.store is None:
+            return result
+        return self._then(result, lambda result: self._store_deletion(post_id, result))
+
+    def _store_deletion(self, post_id: str, result: dict) -> dict:
+        if result.get('status') == 'OK':
+            self.store.delete(post_id, delete_at=int(time.time() * 1000))
+        return result
 
     def update_post(self,
                     post_id: str,
@@ -145,7 +205,10 @@ class Posts(Base):
         if props is not None:
             self.add_to_json('props', props)
 
-        return self.request(url, request_type='PUT', body=True)
+        post = self.request(url, request_type='PUT', body=True)
+        if self.store is None:
+            return post
+        return self._then(post, self._store_post)
 
     def mark_as_unread_from_post(self,
                                  user_id: str,
@@ -204,7 +267,10 @@ class Posts(Base):
         if props is not None:
             self.add_to_json('props', props)
 
-        return self.request(url, request_type='PUT', body=True)
+        post = self.request(url, request_type='PUT', body=True)
+        if self.store is None:
+            return post
+        return self._then(post, self._store_post)
 
     def get_thread(self,
                    post_id: str,
@@ -234,23 +300,22 @@ class Posts(Base):
 
         url = f"{self.api_url}/{post_id}/thread"
         self.reset()
-        self.add_application_json_header()
         if perPage is not None:
-            self.add_to_json('perPage', perPage)
+            self.add_query_param('perPage', perPage)
         if fromPost is not None:
-            self.add_to_json('fromPost', fromPost)
+            self.add_query_param('fromPost', fromPost)
         if fromCreateAt is not None:
-            self.add_to_json('fromCreateAt', fromCreateAt)
+            self.add_query_param('fromCreateAt', fromCreateAt)
         if direction is not None:
-            self.add_to_json('direction', direction)
+            self.add_query_param('direction', direction)
         if skipFetchThreads is not None:
-            self.add_to_json('skipFetchThreads', skipFetchThreads)
+            self.add_query_param('skipFetchThreads', skipFetchThreads)
         if collapsedThreads is not None:
-            self.add_to_json('collapsedThreads', collapsedThreads)
+            self.add_query_param('collapsedThreads', collapsedThreads)
         if collapsedThreadsExtended is not None:
-            self.add_to_json('collapsedThreadsExtended', collapsedThreadsExtended)
+            self.add_query_param('collapsedThreadsExtended', collapsedThreadsExtended)
 
-        return self.request(url, request_type='GET', body=True)
+        return self.request(url, request_type='GET', params=True)
 
     def get_list_of_flagged_posts(self,
                                   user_id: str,
@@ -275,17 +340,40 @@ class Posts(Base):
         url = f"{self.base_url}/users/{user_id}/posts/flagged"
 
         self.reset()
-        self.add_application_json_header()
         if team_id is not None:
-            self.add_to_json('team_id', team_id)
+            self.add_query_param('team_id', team_id)
         if channel_id is not None:
-            self.add_to_json('channel_id', channel_id)
+            self.add_query_param('channel_id', channel_id)
         if page is not None:
-            self.add_to_json('page', page)
+            self.add_query_param('page', page)
         if per_page is not None:
-            self.add_to_json('per_page', per_page)
+            self.add_query_param('per_page', per_page)
 
-        return self.request(url, request_type='GET', body=True)
+        return self.request(url, request_type='GET', params=True)
+
+    def iter_flagged_posts(self,
+                           user_id: str,
+                           team_id: str = None,
+                           channel_id: str = None,
+                           per_page: int = 200) -> Iterator[dict]:
+        """
+        Iterate over all flagged posts of a user, fetching them page by page.
+
+        :param user_id: ID of the user
+        :param team_id: Team ID
+        :param channel_id: Channel ID
+        :param per_page: Default: 200. The number of posts per page
+        :return: Iterator over posts
+        """
+
+        pages = self.paginate(lambda page: post_list_items(self.get_list_of_flagged_posts(user_id,
+                                                                                          team_id=team_id,
+                                                                                          channel_id=channel_id,
+                                                                                          page=page,
+                                                                                          per_page=per_page)),
+                              per_page=per_page)
+        for posts in pages:
+            yield from posts
 
     def get_file_info_for_post(self,
                                post_id: str,
@@ -303,11 +391,10 @@ class Posts(Base):
         url = f"{self.api_url}/{post_id}/files/info"
 
         self.reset()
-        self.add_application_json_header()
         if include_deleted is not None:
-            self.add_to_json('include_deleted', include_deleted)
+            self.add_query_param('include_deleted', include_deleted)
 
-        return self.request(url, request_type='GET', body=True)
+        return self.request(url, request_type='GET', params=True)
 
     def get_posts_for_channel(self,
                               channel_id: str,
@@ -324,6 +411,10 @@ class Posts(Base):
         limited till 1000. A caveat with this parameter is that there is no guarantee that the returned posts will
         be consecutive. It is left to the clients to maintain state and fill any missing holes in the post order.
 
+        With a post store, the received posts are written to it, but the page is always requested from the server.
+        The store can not tell whether it holds every post of a page: posts created by other clients are missing
+        from it. Read stored posts of a channel with PostStore.posts_in_channel.
+
         Must have read_channel permission for the channel.
 
         :param channel_id: The channel ID to get the posts for.
@@ -339,21 +430,80 @@ class Posts(Base):
         url = f"{self.base_url}/channels/{channel_id}/posts"
 
         self.reset()
-        self.add_application_json_header()
         if page is not None:
-            self.add_to_json('page', page)
+            self.add_query_param('page', page)
         if per_page is not None:
-            self.add_to_json('per_page', per_page)
+            self.add_query_param('per_page', per_page)
         if since is not None:
-            self.add_to_json('since', since)
+            self.add_query_param('since', since)
         if before is not None:
-            self.add_to_json('before', before)
+            self.add_query_param('before', before)
         if after is not None:
-            self.add_to_json('after', after)
+            self.add_query_param('after', after)
         if include_deleted is not None:
-            self.add_to_json('include_deleted', include_deleted)
+            self.add_query_param('include_deleted', include_deleted)
+
+        post_list = self.request(url, request_type='GET', params=True)
+        if self.store is None:
+            return post_list
+        return self._then(post_list, self._store_post_list)
+
+    def iter_posts_for_channel(self,
+                               channel_id: str,
+                               per_page: int = 200,
+                               before: str = None,
+                               after: str = None,
+                               include_deleted: bool = None,
+                               prefetch: int = 0) -> Iterator[dict]:
+        """
+        Iterate over the posts in a channel, fetching them page by page.
+        Every page after the first one is requested relative to the last post received,
+        so posts created while iterating do not shift the pages.
 
-        return self.request(url, request_type='GET', body=True)
+        Without before and after, posts are yielded newest first, starting from the latest post.
+
+        :param channel_id: The channel ID to get the posts for.
+        :param per_page: Default: 200. The number of posts per page.
+        :param before: A post id to yield the posts that came before this one, newest first.
+        :param after: A post id to yield the posts that came after this one, oldest first.
+        :param include_deleted: Whether to include deleted posts.
+        :param prefetch: Default: 0. How many pages to fetch in the background ahead of the one being consumed.
+        :return: Iterator over posts.
+        """
+
+        pages = self._post_pages_for_channel(channel_id, per_page, before, after, include_deleted)
+        if prefetch:
+            pages = self.prefetch_pages(pages, prefetch)
+        for posts in pages:
+            yield from posts
+
+    def _post_pages_for_channel(self,
+                                channel_id: str,
+                                per_page: int,
+                                before: str = None,
+                                after: str = None,
+                                include_deleted: bool = None) -> Iterator[list[dict]]:
+        while True:
+            if after is not None:
+                posts = post_list_items(self.get_posts_for_channel(channel_id,
+                                                                   per_page=per_page,
+                                                                   after=after,
+                                                                   include_deleted=include_deleted))
+                posts.reverse()
+            else:
+                posts = post_list_items(self.get_posts_for_channel(channel_id,
+                                                                   per_page=per_page,
+                                                                   before=before,
+                                                                   include_deleted=include_deleted))
+            if posts:
+                yield posts
+            if len(posts) < per_page:
+                return
+
+            if after is not None:
+                after = posts[-1]['id']
+            else:
+                before = posts[-1]['id']
 
     def get_posts_around_oldest_unread(self,
                                        user_id: str,
@@ -388,19 +538,18 @@ class Posts(Base):
         url = f"{self.base_url}/users/{user_id}/channels/{channel_id}/posts/unread"
 
         self.reset()
-        self.add_application_json_header()
         if limit_before is not None:
-            self.add_to_json('limit_before', limit_before)
+            self.add_query_param('limit_before', limit_before)
         if limit_after is not None:
-            self.add_to_json('limit_after', limit_after)
+            self.add_query_param('limit_after', limit_after)
         if skipFetchThreads is not None:
-            self.add_to_json('skipFetchThreads', skipFetchThreads)
+            self.add_query_param('skipFetchThreads', skipFetchThreads)
         if collapsedThreads is not None:
-            self.add_to_json('collapsedThreads', collapsedThreads)
+            self.add_query_param('collapsedThreads', collapsedThreads)
         if collapsedThreadsExtended is not None:
-            self.add_to_json('collapsedThreadsExtended', collapsedThreadsExtended)
+            self.add_query_param('collapsedThreadsExtended', collapsedThreadsExtended)
 
-        return self.request(url, request_type='GET', body=True)
+        return self.request(url, request_type='GET', params=True)
 
     def search_for_team_posts(self,
                               team_id: str,
@@ -447,6 +596,45 @@ class Posts(Base):
 
         return self.request(url, request_type='POST', body=True)
 
+    def iter_search_for_team_posts(self,
+                                   team_id: str,
+                                   terms: str,
+                                   is_or_search: bool,
+                                   time_zone_offset: int = None,
+                                   include_deleted_channels: bool = None,
+                                   per_page: int = 60) -> Iterator[dict]:
+        """
+        Iterate over all posts matching a team search, fetching them page by page.
+        Without Elasticsearch the server ignores paging and returns every match at once,
+        so iteration also stops at the first page that brings no new posts.
+
+        :param team_id: Team GUID
+        :param terms: The search terms as inputed by the user.
+        :param is_or_search: Set to true if an Or search should be performed vs an And search.
+        :param time_zone_offset: Default: 0. Offset from UTC of user timezone for date searches.
+        :param include_deleted_channels: Set to true if deleted channels should be
+        included in the search. (archived channels)
+        :param per_page: Default: 60. The number of posts per page.
+        :return: Iterator over posts
+        """
+
+        seen = set()
+
+        def fetch_page(page: int) -> list[dict]:
+            posts = post_list_items(self.search_for_team_posts(team_id,
+                                                               terms,
+                                                               is_or_search,
+                                                               time_zone_offset=time_zone_offset,
+                                                               include_deleted_channels=include_deleted_channels,
+                                                               page=page,
+                                                               per_page=per_page))
+            new_posts = [post for post in posts if post['id'] not in seen]
+            seen.update(post['id'] for post in new_posts)
+            return new_posts
+
+        for posts in self.paginate(fetch_page, per_page=per_page):
+            yield from posts
+
     def pin_post_to_channel(self, post_id: str) -> dict:
         """
         Pin a post to a channel it is in based from the provided post id string.
@@ -506,13 +694,35 @@ class Posts(Base):
         :return: Post list retrieval info
         """
 
+        stored = {}
+        missing = post_ids
+        if self.store is not None and post_ids:
+            known = self.store.get_many(post_ids)
+            # tombstones are known too: deleted posts are not returned by the server anyway
+            stored = {post_id: post for post_id, post in known.items() if not post.get('delete_at')}
+            missing = [post_id for post_id in post_ids if post_id not in known]
+            if not missing:
+                return self._then(stored, lambda stored: [stored[post_id] for post_id in post_ids
+                                                          if post_id in stored])
+
         url = f"{self.api_url}/ids"
         self.reset()
         self.add_application_json_header()
-        if post_ids is not None:
-            self.add_to_json('post_ids', post_ids)
+        if missing is not None:
+            self.add_to_json('post_ids', missing)
 
-        return self.request(url, request_type='POST')
+        posts = self.request(url, request_type='POST', body=True)
+        if self.store is None:
+            return posts
+        return self._then(posts, lambda posts: self._merge_stored(post_ids, stored, posts))
+
+    def _merge_stored(self, post_ids: list[str], stored: dict, posts: list[dict]) -> list[dict]:
+        self.store.upsert(posts)
+        if not stored:
+            return posts
+
+        stored.update((post['id'], post) for post in posts if isinstance(post, dict))
+        return [stored[post_id] for post_id in post_ids if post_id in stored]
 
     def set_post_reminder(self,
                           user_id: str,
@@ -0,0 +1,216 @@
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, NamedTuple, Union
+import base64
+import os
+import random
+import threading
+import time
+
+from Mattermost_Errors import MattermostConnectionError
+from mm_posts_api import Posts
+
+
+def new_pending_post_id() -> str:
+    """
+    Generate an idempotency key in the format of Mattermost ids (26 lowercase base32 characters).
+    """
+
+    return base64.b32encode(os.urandom(16)).decode().rstrip('=').lower()
+
+
+class PublishItem(NamedTuple):
+    channel_id: str
+    message: str
+    root_id: str = None
+    props: dict = None
+    file_ids: list = None
+    pending_post_id: str = None
+
+
+class PublishResult(NamedTuple):
+    index: int
+    item: PublishItem
+    post: dict = None
+    error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class PublishError(Exception):
+    pass
+
+
+class SentLedger:
+    def __init__(self, ttl: float = 300, max_entries: int = 100000):
+        """
+        Short-lived record of idempotency keys already sent and the posts created for them.
+
+        :param ttl: Default: 300. How long a key is remembered, in seconds.
+        :param max_entries: Default: 100000. Maximum number of remembered keys.
+        """
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Union[dict, None]:
+        """
+        Get the post created for a key.
+
+        :param key: Idempotency key.
+        :return: Post or None if the key is unknown or expired.
+        """
+
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def put(self, key: str, post: dict) -> None:
+        """
+        Remember the post created for a key.
+
+        :param key: Idempotency key.
+        :param post: Created post.
+        """
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, post)
+            self._entries.move_to_end(key)
+            self._expire()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._entries:
+            key, (expires, _) = next(iter(self._entries.items()))
+            if expires > now:
+                return
+            del self._entries[key]
+
+
+class BulkPublisher:
+    def __init__(self,
+                 posts: Posts,
+                 max_workers: int = 16,
+                 max_pending: int = 1000,
+                 halt_channel_on_error: bool = True,
+                 retries: int = 3,
+                 backoff: float = 0.2,
+                 max_backoff: float = 5.0,
+                 ledger: SentLedger = None):
+        """
+        Bulk post publisher.
+
+        Posts are sent with bounded global concurrency, while posts of the same
+        channel (and so of the same thread) are sent strictly one after another
+        in the order they were given.
+
+        :param posts: Posts client.
+        :param max_workers: Default: 16. Maximum number of posts being sent at once.
+        :param max_pending: Default: 1000. Maximum number of items read from the input ahead of sending.
+        :param halt_channel_on_error: Default: true. After a failure in a channel, skip the rest of
+        its items instead of posting them out of order.
+        :param retries: Default: 3. How many times to resend a post whose outcome is unknown
+        (timeout or dropped connection). Resends carry the same pending_post_id, so the server
+        does not create a duplicate if the first attempt went through.
+        :param backoff: Default: 0.2. Base delay before a resend, in seconds, doubled on every attempt.
+        :param max_backoff: Default: 5.0. Maximum delay before a resend, in seconds.
+        :param ledger: SentLedger of keys already sent. Items republished with a key from the ledger
+        get the recorded post back without a request.
+        """
+
+        self.posts = posts
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.halt_channel_on_error = halt_channel_on_error
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.ledger = ledger if ledger is not None else SentLedger()
+
+    def publish(self, items: Iterable[Union[PublishItem, tuple]]) -> list[PublishResult]:
+        """
+        Publish a stream of posts.
+
+        :param items: PublishItem objects or (channel_id, message, root_id, props) tuples.
+        Items without a pending_post_id get a generated one.
+        :return: Result of every item, in the order of items. The item of a result carries its
+        pending_post_id, so failed items can be published again safely.
+        """
+
+        results = []
+        lanes = {}
+        failed_channels = set()
+        lock = threading.Lock()
+        pending = threading.BoundedSemaphore(self.max_pending)
+
+        def drain(channel_id: str) -> None:
+            while True:
+                with lock:
+                    lane = lanes[channel_id]
+                    if not lane:
+                        del lanes[channel_id]
+                        return
+                    index, item = lane.popleft()
+                    skip = channel_id in failed_channels
+
+                if skip:
+                    result = PublishResult(index, item, error=PublishError("Skipped after an earlier failure in the channel"))
+                else:
+                    result = self._send(index, item)
+
+                with lock:
+                    results[index] = result
+                    if not result.ok and self.halt_channel_on_error:
+                        failed_channels.add(channel_id)
+                pending.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for index, item in enumerate(items):
+                if not isinstance(item, PublishItem):
+                    item = PublishItem(*item)
+                if item.pending_post_id is None:
+                    item = item._replace(pending_post_id=new_pending_post_id())
+                pending.acquire()
+                with lock:
+                    results.append(None)
+                    lane = lanes.get(item.channel_id)
+                    if lane is None:
+                        lane = lanes[item.channel_id] = deque()
+                        executor.submit(drain, item.channel_id)
+                    lane.append((index, item))
+
+        return results
+
+    def _send(self, index: int, item: PublishItem) -> PublishResult:
+        post = self.ledger.get(item.pending_post_id)
+        if post is not None:
+            return PublishResult(index, item, post=post)
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))))
+            try:
+                post = self.posts.create_post(item.channel_id,
+                                              item.message,
+                                              root_id=item.root_id,
+                                              file_ids=item.file_ids,
+                                              props=item.props,
+                                              pending_post_id=item.pending_post_id)
+            except Exception as err:
+                error = err
+            else:
+                self.ledger.put(item.pending_post_id, post)
+                return PublishResult(index, item, post=post)
+
+            # The request may have reached the server: resending is safe only with the same pending_post_id.
+            if not isinstance(error, MattermostConnectionError):
+                break
+
+        return PublishResult(index, item, error=error)
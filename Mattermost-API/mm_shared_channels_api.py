@@ -1,10 +1,10 @@
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Iterator
 from Mattermost_Base import Base
 
 
 class SharedChannels(Base):
-    def __init__(self, token: str, server_url: str):
-        super().__init__(token, server_url)
+    def __init__(self, token: str, server_url: str, **kwargs):
+        super().__init__(token, server_url, **kwargs)
         self.api_url = f"{self.base_url}/sharedchannels"
 
     def get_shrd_chnls_for_team(self, team_id: str,
@@ -24,13 +24,27 @@ class SharedChannels(Base):
 
         url = f"{self.api_url}/{team_id}"
         self.reset()
-        self.add_application_json_header()
         if page is not None:
-            self.add_to_json('page', page)
+            self.add_query_param('page', page)
         if per_page is not None:
-            self.add_to_json('per_page', per_page)
+            self.add_query_param('per_page', per_page)
 
-        return self.request(url, request_type='GET', body=True)
+        return self.request(url, request_type='GET', params=True)
+
+    def iter_shrd_chnls_for_team(self, team_id: str, per_page: int = 200) -> Iterator[dict]:
+        """
+        Iterate over all shared channels for a team, fetching them page by page.
+
+        :param team_id: Team ID.
+        :param per_page: Default: 200. The number of sharedchannels per page.
+        :return: Iterator over shared channels.
+        """
+
+        for channels in self.paginate(lambda page: self.get_shrd_chnls_for_team(team_id,
+                                                                                page=page,
+                                                                                per_page=per_page) or [],
+                                      per_page=per_page):
+            yield from channels
 
     def get_remote_clstr_info_by_id(self, remote_id: str) -> dict:
         """
@@ -47,4 +61,4 @@ class SharedChannels(Base):
         url = f"{self.api_url}/{remote_id}"
         self.reset()
 
-        return self.request(url, request_type='GET')
+        return self.request(url, request_type='GET', cache=('remote_cluster', remote_id))
@@ -0,0 +1,320 @@
+from typing import Union
+import json
+import sqlite3
+import threading
+import time
+
+from Mattermost_Errors import HTTPError, MattermostConnectionError
+from mm_posts_api import Posts
+from mm_publisher import new_pending_post_id
+from mm_threads_api import Threads
+
+# operation name -> sub-client that performs it
+OPERATIONS = {
+    'create_post': 'posts',
+    'patch_post': 'posts',
+    'mark_all_threads_that_user_following_as_read': 'threads',
+    'mark_thread_that_user_following_read_state_to_the_timestamp': 'threads',
+    'mark_thread_that_user_following_as_read_based_on_post_id': 'threads',
+    'start_following_thread': 'threads',
+    'stop_following_thread': 'threads',
+}
+
+# the server is overloaded or down for maintenance
+TRANSIENT_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+class SpoolFullError(Exception):
+    pass
+
+
+class PostSpool:
+    def __init__(self,
+                 path: str,
+                 posts: Posts,
+                 threads: Threads = None,
+                 max_entries: int = 100000,
+                 max_bytes: int = 64 * 1024 * 1024,
+                 backoff: float = 0.5,
+                 max_backoff: float = 30.0,
+                 autostart: bool = True):
+        """
+        Durable outbound spool for posts and thread operations, backed by SQLite.
+
+        Operations are written to disk and return immediately, then a background
+        drainer replays them strictly in order. While the server is unavailable the
+        operation at the head of the spool is retried with backoff and nothing behind
+        it is sent. An operation the server rejects for good (e.g. 400 or 403) is moved
+        to the dead letters so it does not block the rest.
+        Operations left in the spool by a crash are replayed on the next start.
+        Delivery is at least once. Posts are created with a pending_post_id, but the server
+        remembers it only for about 30 seconds: a create retried within that time returns the
+        post already created, while one replayed later (e.g. after a crash or a long outage)
+        may create a duplicate.
+
+        :param path: Path to the SQLite database file.
+        :param posts: Posts client used to replay post operations.
+        :param threads: Threads client used to replay thread operations.
+        :param max_entries: Default: 100000. Maximum number of spooled operations.
+        :param max_bytes: Default: 64 MiB. Maximum total size of spooled operation arguments.
+        :param backoff: Default: 0.5. Delay before the first retry of a failed operation, in seconds.
+        :param max_backoff: Default: 30.0. Maximum delay between retries, in seconds.
+        :param autostart: Default: true. Start the drainer right away.
+        """
+
+        self.path = path
+        self.clients = {'posts': posts, 'threads': threads}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._cond = threading.Condition()
+        self._closed = False
+        self._drainer = None
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS spool (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    operation TEXT NOT NULL,
+                    args TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL
+                )""")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    seq INTEGER PRIMARY KEY,
+                    operation TEXT NOT NULL,
+                    args TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    failed_at REAL NOT NULL,
+                    status INTEGER,
+                    error TEXT
+                )""")
+        self._entries, self._bytes = self._db.execute(
+            "SELECT count(*), coalesce(sum(length(args)), 0) FROM spool").fetchone()
+        if autostart:
+            self.start()
+
+    def start(self) -> None:
+        """
+        Start the background drainer.
+        """
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("PostSpool is closed")
+            if self._drainer is None:
+                self._drainer = threading.Thread(target=self._run, daemon=True)
+                self._drainer.start()
+
+    def close(self) -> None:
+        """
+        Stop the drainer and close the database. Operations not sent yet stay in the spool.
+        """
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._drainer is not None:
+            self._drainer.join()
+        with self._cond:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def enqueue(self, operation: str, **kwargs) -> int:
+        """
+        Spool an operation.
+
+        :param operation: Name of a Posts or Threads method listed in OPERATIONS.
+        :param kwargs: Keyword arguments of the method.
+        :return: Sequence number of the spooled operation.
+        """
+
+        if operation not in OPERATIONS:
+            raise ValueError(f"Operation {operation!r} can not be spooled")
+        if self.clients[OPERATIONS[operation]] is None:
+            raise ValueError(f"Operation {operation!r} requires a {OPERATIONS[operation]} client")
+
+        args = json.dumps(kwargs)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("PostSpool is closed")
+            if self._entries >= self.max_entries or self._bytes + len(args) > self.max_bytes:
+                raise SpoolFullError(f"Spool is full: {self._entries} operations, {self._bytes} bytes")
+            with self._db:
+                seq = self._db.execute("INSERT INTO spool (operation, args, created_at) VALUES (?, ?, ?)",
+                                       (operation, args, time.time())).lastrowid
+            self._entries += 1
+            self._bytes += len(args)
+            self._cond.notify_all()
+        return seq
+
+    def create_post(self,
+                    channel_id: str,
+                    message: str,
+                    root_id: str = None,
+                    file_ids: list[str] = None,
+                    props: dict = None,
+                    metadata: dict = None,
+                    pending_post_id: str = None) -> str:
+        """
+        Spool a new post. See Posts.create_post.
+
+        :param channel_id: The channel ID to post in.
+        :param message: The message contents, can be formatted with Markdown.
+        :param root_id: The post ID to comment on.
+        :param file_ids: A list of file IDs to associate with the post.
+        :param props: A general JSON property bag to attach to the post
+        :param metadata: A JSON object to add post metadata, e.g the post's priority
+        :param pending_post_id: Idempotency key. Generated if not given.
+        :return: pending_post_id of the post, which the created post will carry.
+        """
+
+        if pending_post_id is None:
+            pending_post_id = new_pending_post_id()
+        self.enqueue('create_post',
+                     channel_id=channel_id,
+                     message=message,
+                     root_id=root_id,
+                     file_ids=file_ids,
+                     props=props,
+                     metadata=metadata,
+                     pending_post_id=pending_post_id)
+        return pending_post_id
+
+    def patch_post(self, post_id: str, **fields) -> int:
+        """
+        Spool a partial post update. See Posts.patch_post.
+
+        :param post_id: Post GUID.
+        :param fields: Fields to update: is_pinned, message, file_ids, has_reactions, props.
+        :return: Sequence number of the spooled operation.
+        """
+
+        return self.enqueue('patch_post', post_id=post_id, **fields)
+
+    def pending(self) -> int:
+        """
+        Return the number of operations not sent yet.
+        """
+
+        with self._cond:
+            return self._entries
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every spooled operation is sent or dead-lettered.
+
+        :param timeout: Maximum time to wait, in seconds.
+        :return: True if the spool is empty.
+        """
+
+        with self._cond:
+            return self._cond.wait_for(lambda: self._entries == 0 or self._closed, timeout) and self._entries == 0
+
+    def dead_letters(self, limit: int = None) -> list[dict]:
+        """
+        Get operations the server rejected.
+
+        :param limit: Maximum number of operations to return.
+        :return: List of operations, oldest first.
+        """
+
+        query = "SELECT seq, operation, args, attempts, created_at, failed_at, status, error FROM dead_letters ORDER BY seq"
+        args = ()
+        if limit is not None:
+            query += " LIMIT ?"
+            args = (limit,)
+        with self._cond:
+            rows = self._db.execute(query, args).fetchall()
+        return [{'seq': seq,
+                 'operation': operation,
+                 'args': json.loads(args),
+                 'attempts': attempts,
+                 'created_at': created_at,
+                 'failed_at': failed_at,
+                 'status': status,
+                 'error': error}
+                for seq, operation, args, attempts, created_at, failed_at, status, error in rows]
+
+    def requeue_dead_letters(self) -> int:
+        """
+        Move all dead letters back to the end of the spool.
+
+        :return: Number of requeued operations.
+        """
+
+        with self._cond:
+            with self._db:
+                rows = self._db.execute("SELECT operation, args, created_at FROM dead_letters ORDER BY seq").fetchall()
+                self._db.executemany("INSERT INTO spool (operation, args, created_at) VALUES (?, ?, ?)", rows)
+                self._db.execute("DELETE FROM dead_letters")
+            self._entries += len(rows)
+            self._bytes += sum(len(args) for _, args, _ in rows)
+            self._cond.notify_all()
+        return len(rows)
+
+    def _head(self) -> Union[tuple, None]:
+        with self._cond:
+            while not self._closed:
+                row = self._db.execute(
+                    "SELECT seq, operation, args, attempts FROM spool ORDER BY seq LIMIT 1").fetchone()
+                if row is not None:
+                    return row
+                self._cond.wait()
+        return None
+
+    def _run(self) -> None:
+        while True:
+            head = self._head()
+            if head is None:
+                return
+            seq, operation, args, attempts = head
+
+            client = self.clients[OPERATIONS[operation]]
+            status, error = None, None
+            try:
+                getattr(client, operation)(**json.loads(args))
+            except HTTPError as err:
+                status, error = err.status, err
+            except Exception as err:
+                error = err
+
+            with self._cond:
+                if error is None:
+                    self._remove(seq, args)
+                elif not self._transient(error, status):
+                    with self._db:
+                        self._db.execute("""
+                            INSERT INTO dead_letters
+                            SELECT seq, operation, args, attempts + 1, created_at, ?, ?, ? FROM spool WHERE seq = ?""",
+                                         (time.time(), status, str(error), seq))
+                    self._remove(seq, args)
+                else:
+                    with self._db:
+                        self._db.execute("UPDATE spool SET attempts = attempts + 1 WHERE seq = ?", (seq,))
+                    # head-of-line: nothing behind it is sent until it goes through
+                    self._cond.wait_for(lambda: self._closed,
+                                        min(self.max_backoff, self.backoff * 2 ** min(attempts, 16)))
+
+    @staticmethod
+    def _transient(error: Exception, status: int) -> bool:
+        if isinstance(error, MattermostConnectionError):
+            return True
+        return status in TRANSIENT_STATUSES
+
+    def _remove(self, seq: int, args: str) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM spool WHERE seq = ?", (seq,))
+        self._entries -= 1
+        self._bytes -= len(args)
+        self._cond.notify_all()
@@ -3,8 +3,8 @@ from Mattermost_Base import Base
 
 
 class TermsOfService(Base):
-    def __init__(self, token: str, server_url: str):
-        super().__init__(token, server_url)
+    def __init__(self, token: str, server_url: str, **kwargs):
+        super().__init__(token, server_url, **kwargs)
         self.api_url = f"{self.base_url}/users/"
 
     def records_user_action_custom_terms(self, user_id: str,
@@ -47,8 +47,6 @@ class TermsOfService(Base):
         url = f"{self.api_url}/{user_id}/terms_of_service"
 
         self.reset()
-        self.add_application_json_header()
-        self.add_to_json('user_id', user_id)
 
         return self.request(url, request_type='GET')
 
@@ -65,7 +63,7 @@ class TermsOfService(Base):
 
         self.reset()
 
-        return self.request(url, request_type='GET')
+        return self.request(url, request_type='GET', cache=('terms_of_service',))
 
     def creates_new_terms_of_service(self) -> dict:
         """
@@ -80,4 +78,4 @@ class TermsOfService(Base):
 
         self.reset()
 
-        return self.request(url, request_type='POST')
+        return self.request(url, request_type='POST', invalidate=('terms_of_service',))
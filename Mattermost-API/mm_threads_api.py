@@ -1,10 +1,10 @@
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Iterator
 from Mattermost_Base import Base
 
 
 class Threads(Base):
-    def __init__(self, token: str, server_url: str):
-        super().__init__(token, server_url)
+    def __init__(self, token: str, server_url: str, **kwargs):
+        super().__init__(token, server_url, **kwargs)
         self.api_url = f"{self.base_url}/users"
 
     def get_threads_user_is_following(self,
@@ -38,24 +38,57 @@ class Threads(Base):
         url = f"{self.api_url}/{user_id}/teams/{team_id}/threads"
 
         self.reset()
-        self.add_application_json_header()
         if since is not None:
-            self.add_to_json('since', since)
+            self.add_query_param('since', since)
         if deleted is not None:
-            self.add_to_json('deleted', deleted)
+            self.add_query_param('deleted', deleted)
         if extended is not None:
-            self.add_to_json('extended', extended)
+            self.add_query_param('extended', extended)
         if page is not None:
-            self.add_to_json('page', page)
+            self.add_query_param('page', page)
         if pageSize is not None:
-            self.add_to_json('pageSize', pageSize)
+            self.add_query_param('pageSize', pageSize)
         if totalsOnly is not None:
-            self.add_to_json('totalsOnly', totalsOnly)
+            self.add_query_param('totalsOnly', totalsOnly)
         if threadsOnly is not None:
-            self.add_to_json('threadsOnly', threadsOnly)
+            self.add_query_param('threadsOnly', threadsOnly)
+
+        return self.request(url, request_type='GET', params=True)
+
+    def iter_threads_user_is_following(self,
+                                       user_id: str,
+                                       team_id: str,
+                                       since: int = None,
+                                       deleted: bool = None,
+                                       extended: bool = None,
+                                       pageSize: int = 30,
+                                       prefetch: int = 0) -> Iterator[dict]:
+        """
+        Iterate over all threads that user is following, fetching them page by page.
+
+        :param user_id: The ID of the user. This can also be "me" which will point to the current user.
+        :param team_id: The ID of the team in which the thread is.
+        :param since: Since filters the threads based on their LastUpdateAt timestamp.
+        :param deleted: Default: false. Deleted will specify that even deleted threads should be returned.
+        :param extended: Default: false. Extended will enrich the response with participant details.
+        :param pageSize: Default: 30. The number of threads per page.
+        :param prefetch: Default: 0. How many pages to fetch in the background ahead of the one being consumed.
+        :return: Iterator over threads.
+        """
+
+        pages = self.paginate(lambda page: self.get_threads_user_is_following(user_id,
+                                                                              team_id,
+                                                                              since=since,
+                                                                              deleted=deleted,
+                                                                              extended=extended,
+                                                                              page=page,
+                                                                              pageSize=pageSize).get('threads') or [],
+                              per_page=pageSize)
+        if prefetch:
+            pages = self.prefetch_pages(pages, prefetch)
+        for threads in pages:
+            yield from threads
 
-        return self.request(url, request_type='GET', body=True)
-                                          
     def get_unread_mention_counts_from_followed_threads(self,
                                                         user_id: str,
                                                         team_id: str) -> dict:
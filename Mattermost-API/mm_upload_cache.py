@@ -0,0 +1,136 @@
+from typing import Iterable, Union
+import json
+import sqlite3
+import threading
+import time
+
+
+class UploadCache:
+    def __init__(self, path: str, max_entries: int = 100000, ttl: float = 24 * 3600):
+        """
+        Content-addressed cache of uploaded files backed by SQLite.
+
+        Files are keyed by SHA-256, channel and size. The server attaches a file to one post
+        only and silently drops a file id that is already attached to another post, so the cache
+        hands out only files that have not been attached yet: an upload left over from a post that
+        failed, or from an interrupted run, is reused once instead of uploading the same content again.
+        Files taken from the cache or just uploaded are in use until they are released back.
+
+        :param path: Path to the SQLite database file, or ":memory:".
+        :param max_entries: Default: 100000. Maximum number of remembered files; the least recently used are evicted.
+        :param ttl: Default: 86400. How long an uploaded file may be reused, in seconds.
+        """
+
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    file_id TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    channel_id TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    available INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    used_at REAL NOT NULL,
+                    info TEXT NOT NULL
+                )""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS files_content ON files (sha256, channel_id, size, available)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS files_used ON files (used_at)")
+
+    def close(self) -> None:
+        """
+        Close the database.
+        """
+
+        with self._lock:
+            self._db.close()
+
+    def take(self, sha256: str, channel_id: str, size: int) -> Union[dict, None]:
+        """
+        Take an uploaded, not yet attached file with the given content.
+        The file is in use until it is released back.
+
+        :param sha256: Hex SHA-256 of the file content.
+        :param channel_id: The ID of the channel the file was uploaded to.
+        :param size: Size of the file in bytes.
+        :return: File info or None if there is no such file.
+        """
+
+        now = time.time()
+        with self._lock, self._db:
+            row = self._db.execute("""
+                SELECT file_id, info FROM files
+                WHERE sha256 = ? AND channel_id = ? AND size = ? AND available = 1 AND created_at >= ?
+                ORDER BY created_at DESC LIMIT 1""", (sha256, channel_id, size, now - self.ttl)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE files SET available = 0, used_at = ? WHERE file_id = ?", (now, row[0]))
+            self.hits += 1
+        return json.loads(row[1])
+
+    def add(self, info: dict, sha256: str, channel_id: str, size: int) -> None:
+        """
+        Remember a just uploaded file. The file is in use until it is released back.
+
+        :param info: File info returned by the server.
+        :param sha256: Hex SHA-256 of the file content.
+        :param channel_id: The ID of the channel the file was uploaded to.
+        :param size: Size of the file in bytes.
+        """
+
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("""
+                INSERT OR REPLACE INTO files (file_id, sha256, channel_id, size, available, created_at, used_at, info)
+                VALUES (?, ?, ?, ?, 0, ?, ?, ?)""", (info['id'], sha256, channel_id, size, now, now, json.dumps(info)))
+            self._evict(now)
+
+    def release(self, file_ids: Iterable[str]) -> int:
+        """
+        Return files that were not attached to a post, so they can be reused.
+
+        :param file_ids: IDs of the files.
+        :return: Number of files made available again.
+        """
+
+        file_ids = [(file_id,) for file_id in file_ids]
+        with self._lock, self._db:
+            return self._db.executemany("UPDATE files SET available = 1 WHERE file_id = ?", file_ids).rowcount
+
+    def forget(self, file_ids: Iterable[str]) -> int:
+        """
+        Forget files, e.g. after they were attached to a post or deleted on the server.
+
+        :param file_ids: IDs of the files.
+        :return: Number of forgotten files.
+        """
+
+        file_ids = [(file_id,) for file_id in file_ids]
+        with self._lock, self._db:
+            return self._db.executemany("DELETE FROM files WHERE file_id = ?", file_ids).rowcount
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        :return: Number of hits, misses, remembered files and files available for reuse.
+        """
+
+        with self._lock:
+            entries, available = self._db.execute("SELECT count(*), coalesce(sum(available), 0) FROM files").fetchone()
+            return {'hits': self.hits, 'misses': self.misses, 'entries': entries, 'available': available}
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM files WHERE created_at < ?", (now - self.ttl,))
+        self._db.execute("""
+            DELETE FROM files WHERE file_id IN (
+                SELECT file_id FROM files ORDER BY used_at DESC LIMIT -1 OFFSET ?)""", (self.max_entries,))
@@ -1,11 +1,26 @@
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Callable, Generator
+import contextlib
+import hashlib
+import os
+import random
+import time
+
 from Mattermost_Base import Base
+from Mattermost_Errors import MattermostConnectionError, CircuitOpenError
+from Mattermost_Files import FileLike, FileSource
+from mm_upload_cache import UploadCache
+
+
+# delay before resuming an interrupted upload, doubled with every resume
+RESUME_BACKOFF = 0.5
+MAX_RESUME_BACKOFF = 30.0
 
 
 class Uploads(Base):
-    def __init__(self, token: str, server_url: str):
-        super().__init__(token, server_url)
+    def __init__(self, token: str, server_url: str, cache: UploadCache = None, **kwargs):
+        super().__init__(token, server_url, **kwargs)
         self.api_url = f"{self.base_url}/uploads"
+        self.cache = cache
 
     def create_upload(self, channel_id: str,
                       filename: str,
@@ -47,7 +62,7 @@ class Uploads(Base):
 
         return self.request(url, request_type='GET')
 
-    def perform_file_upload(self, upload_id: str, file_path: str = None) -> dict:
+    def perform_file_upload(self, upload_id: str, file_path: FileLike = None, data: Union[bytes, memoryview] = None) -> dict:
         """
         Starts or resumes a file upload.
         To resume an existing (incomplete) upload, data should be sent starting from the offset specified in the upload session object.
@@ -59,18 +74,135 @@ class Uploads(Base):
         Must be logged in as the user who created the upload session.
 
         :param upload_id: The ID of the upload session the data belongs to.
-        :param file_path: Full path to file.
-        :return: Upload info.
+        :param file_path: Full path to file, open binary file object, bytes or mmap, sent as multipart/form-data.
+        :param data: Binary content sent as is in the request body, e.g. the next chunk of the file.
+        :return: Upload info: the file info once the upload is complete, empty otherwise.
         """
 
         url = f"{self.api_url}/{upload_id}"
         self.reset()
-        self.add_application_www_form_header()
+
+        if data is not None:
+            self.add_application_octet_stream_header()
+            self.set_content(data)
+            return self.request(url, request_type='POST', content=True)
 
         if file_path is not None:
             self.add_file(file_path=file_path)
 
         return self.request(url, request_type='POST', files=True)
 
+    def upload_file(self,
+                    channel_id: str,
+                    file_path: str,
+                    filename: str = None,
+                    chunk_size: int = 8 * 1024 * 1024,
+                    upload_id: str = None,
+                    progress: Callable[[int, int], None] = None,
+                    max_resumes: int = 10) -> dict:
+        """
+        Upload a file in binary chunks through an upload session.
+
+        The file is memory-mapped and every chunk is sent as a slice of the mapping,
+        so it is neither copied nor read into memory as a whole.
+        After a dropped connection or a timeout the upload resumes, with backoff, from the
+        file_offset of the upload session, so only the unconfirmed part is sent again.
+        While the circuit breaker rejects requests the upload is not resumed.
+        With an upload cache, a file with the same content, channel and size that was
+        uploaded before but not attached to a post is reused without uploading
+        (it keeps the name it was uploaded with).
+
+        :param channel_id: The ID of the channel to upload to.
+        :param file_path: Full path to file.
+        :param filename: The name of the file. Default: base name of file_path.
+        :param chunk_size: Default: 8 MiB. Size of one request body in bytes.
+        :param upload_id: ID of an existing upload session to resume instead of creating a new one.
+        :param progress: Function called with (bytes uploaded, file size) after every chunk.
+        :param max_resumes: Default: 10. How many times to resume after interruptions before giving up.
+        :return: File info of the uploaded file.
+        """
 
+        return self._run_upload(self._upload_steps(channel_id, file_path, filename, chunk_size, upload_id,
+                                                   progress, max_resumes))
 
+    def _upload_steps(self,
+                      channel_id: str,
+                      file_path: str,
+                      filename: str,
+                      chunk_size: int,
+                      upload_id: str,
+                      progress: Callable[[int, int], None],
+                      max_resumes: int) -> Generator[tuple, object, dict]:
+        # The upload without its I/O, shared by the sync and the async client. Every request,
+        # blocking call and pause is yielded as ('request' | 'blocking', function) or ('sleep', seconds);
+        # the driver sends back the result of the step or throws its exception in.
+        with FileSource(file_path) as source:
+            file_size = source.size
+            digest = None
+            if self.cache is not None and upload_id is None:
+                digest, info = yield 'blocking', lambda: self._cached_upload(source, channel_id)
+                if info is not None:
+                    if progress is not None:
+                        progress(file_size, file_size)
+                    return info
+
+            if upload_id is None:
+                name = filename or os.path.basename(file_path)
+                session = yield 'request', lambda: self.create_upload(channel_id, name, file_size)
+                upload_id = session['id']
+            else:
+                session = yield 'request', lambda: self.get_upload_session(upload_id)
+            offset = session.get('file_offset') or 0
+
+            resumes = 0
+            while True:
+                try:
+                    if offset is None:
+                        # the server may have stored part of the chunk before the connection broke
+                        session = yield 'request', lambda: self.get_upload_session(upload_id)
+                        offset = session.get('file_offset') or 0
+                    chunk = source.view[offset:offset + chunk_size]
+                    result = yield 'request', lambda: self.perform_file_upload(upload_id, data=chunk)
+                except MattermostConnectionError as err:
+                    resumes += 1
+                    if isinstance(err, CircuitOpenError) or resumes > max_resumes:
+                        raise
+                    yield 'sleep', self._resume_delay(resumes)
+                    offset = None
+                    continue
+
+                offset += len(chunk)
+                if progress is not None:
+                    progress(offset, file_size)
+                if offset >= file_size:
+                    if digest is not None:
+                        self.cache.add(result, digest, channel_id, file_size)
+                    return result
+
+    @staticmethod
+    def _run_upload(steps: Generator[tuple, object, dict]) -> dict:
+        # runs the steps of _upload_steps in the calling thread
+        result = error = None
+        with contextlib.closing(steps):
+            while True:
+                try:
+                    kind, step = steps.send(result) if error is None else steps.throw(error)
+                except StopIteration as stop:
+                    return stop.value
+                result = error = None
+                try:
+                    if kind == 'sleep':
+                        time.sleep(step)
+                    else:
+                        result = step()
+                except Exception as err:
+                    error = err
+
+    def _cached_upload(self, source: FileSource, channel_id: str) -> tuple:
+        # content digest of the file and the info of an unattached upload of the same content
+        digest = hashlib.sha256(source.view).hexdigest()
+        return digest, self.cache.take(digest, channel_id, source.size)
+
+    @staticmethod
+    def _resume_delay(resumes: int) -> float:
+        return random.uniform(0, min(MAX_RESUME_BACKOFF, RESUME_BACKOFF * 2 ** (resumes - 1)))
@@ -0,0 +1,114 @@
+"""
+Local stand-in for a Mattermost server shared by the benchmark scripts.
+
+The scripts import the client modules the same way the package does, so the
+package directory is put on sys.path here.
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Mattermost-API')
+if PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, PACKAGE_DIR)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    route = None
+    latency = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        if self.headers.get('Transfer-Encoding') == 'chunked':
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                body += self.rfile.read(size)
+                self.rfile.readline()
+                if not size:
+                    return bytes(body)
+        length = int(self.headers.get('Content-Length') or 0)
+        # read in blocks, so large uploads do not inflate the server's memory
+        remaining, body = length, bytearray()
+        while remaining:
+            block = self.rfile.read(min(remaining, 1 << 20))
+            if not block:
+                break
+            remaining -= len(block)
+            if len(body) < (1 << 20):
+                body += block
+        self.body_length = length
+        return bytes(body)
+
+    def _handle(self):
+        self.body_length = None
+        body = self._read_body()
+        if self.body_length is None:
+            self.body_length = len(body)
+        parts = urlsplit(self.path)
+        if self.latency:
+            time.sleep(self.latency)
+        status, headers, payload = self.route(self.command, parts.path, parse_qs(parts.query), body, self)
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(data)))
+        if self.close_connection:
+            # like real servers, confirm the close so the client does not reuse the socket
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+
+class StubServer:
+    def __init__(self, route, latency: float = 0.0):
+        """
+        Threaded HTTP server answering every request with route(method, path, query, body, handler),
+        which returns (status, headers, payload). latency is added to every response, in seconds.
+        """
+
+        handler = type('Handler', (_Handler,), {'route': staticmethod(route), 'latency': latency})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler, bind_and_activate=False)
+        # benchmarks connect from many threads at once, the default backlog of 5 resets connections
+        self.server.request_queue_size = 128
+        self.server.server_bind()
+        self.server.server_activate()
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def echo(method, path, query, body, handler):
+    return 200, {}, {'method': method, 'path': path}
+
+
+def summary(samples: list) -> str:
+    """
+    Format latency samples (seconds) as mean, p50 and p95 in milliseconds.
+    """
+
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (f"mean {statistics.mean(ordered) * 1000:7.3f} ms  "
+            f"p50 {statistics.median(ordered) * 1000:7.3f} ms  "
+            f"p95 {p95 * 1000:7.3f} ms")
@@ -0,0 +1,72 @@
+"""
+End-to-end time of dumping a 100k-post channel with and without page prefetching.
+
+    python benchmarks/bench_channel_dump.py [--posts 100000] [--per-page 200]
+                                            [--latency 0.02] [--work 0.01] [--depths 0 1 2 4]
+
+A stub server serves the channel page by page (before=<last post id>), adding --latency
+seconds to every page to stand in for the network and server time. The consumer writes
+every post as a JSON line to a temporary file and then spends --work seconds per page,
+as if storing the page elsewhere. With prefetch, the next pages are fetched while the
+current one is being consumed, so the time approaches max(fetching, consuming).
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from _stub import StubServer
+
+from Mattermost_Base import create_session
+from mm_posts_api import Posts
+
+
+def channel(total: int):
+    ids = [f'post{n:020d}' for n in range(total - 1, -1, -1)]  # newest first
+    position = {post_id: index for index, post_id in enumerate(ids)}
+
+    def route(method, path, query, body, handler):
+        per_page = int(query.get('per_page', ['60'])[0])
+        before = query.get('before', [None])[0]
+        start = position[before] + 1 if before is not None else 0
+        page = ids[start:start + per_page]
+        posts = {post_id: {'id': post_id, 'channel_id': 'channel', 'message': f'message {post_id}',
+                           'create_at': total - position[post_id]}
+                 for post_id in page}
+        return 200, {}, {'order': page, 'posts': posts}
+
+    return route
+
+
+def dump(url: str, per_page: int, depth: int, work: float) -> tuple:
+    posts = Posts('token', url, session=create_session())
+    count = 0
+    started = time.perf_counter()
+    with tempfile.TemporaryFile('w') as out:
+        for post in posts.iter_posts_for_channel('channel', per_page=per_page, prefetch=depth):
+            out.write(json.dumps(post))
+            out.write('\n')
+            count += 1
+            if work and count % per_page == 0:
+                time.sleep(work)
+    return count, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--per-page', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.02, help="added to every page request, seconds")
+    parser.add_argument('--work', type=float, default=0.01, help="consumer time per page, seconds")
+    parser.add_argument('--depths', type=int, nargs='+', default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    with StubServer(channel(args.posts), latency=args.latency) as server:
+        for depth in args.depths:
+            count, elapsed = dump(server.url, args.per_page, depth, args.work)
+            label = 'sequential' if depth == 0 else f'prefetch={depth}'
+            print(f"{label:>12}: {count} posts in {elapsed:6.2f} s ({count / elapsed:8.0f} posts/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Peak memory and throughput of large uploads: zero-copy file bodies versus reading the file into memory.
+
+    python benchmarks/bench_large_uploads.py [--sizes 10 100 1024 2048] [--chunk-size 8]
+
+Sizes are in MiB; the test files are sparse, so they take no disk space. Scenarios:
+- read() into bytes: the whole file is read and sent as one binary body, as before;
+- multipart, mapped: perform_file_upload(file_path=...) streams the memory-mapped file;
+- upload session: upload_file() sends --chunk-size MiB slices of the mapping.
+Every scenario runs in a fresh process. Peak memory is the growth of anonymous resident
+memory (RssAnon) over the process baseline: pages of a mapped file are page cache that
+the kernel can drop at any time, not memory of the process. Linux only.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from _stub import StubServer
+
+MiB = 1024 * 1024
+
+
+def rss_anon() -> int:
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("RssAnon is not available")
+
+
+class PeakSampler(threading.Thread):
+    def __init__(self, interval: float = 0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = rss_anon()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, rss_anon())
+
+    def stop(self) -> int:
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, rss_anon())
+        return self.peak
+
+
+def uploads_route():
+    received = {}
+    lock = threading.Lock()
+
+    def route(method, path, query, body, handler):
+        if path == '/api/v4/uploads':
+            size = json.loads(body)['file_size']
+            with lock:
+                upload_id = f'upload{len(received)}'
+                received[upload_id] = [0, size]
+            return 201, {}, {'id': upload_id, 'file_offset': 0, 'file_size': size}
+        upload_id = path.rsplit('/', 1)[-1]
+        with lock:
+            state = received[upload_id]
+            state[0] += handler.body_length
+            done = state[0] >= state[1]
+        if method == 'GET':
+            return 200, {}, {'id': upload_id, 'file_offset': state[0]}
+        return (201, {}, {'id': 'file', 'size': state[0]}) if done else (204, {}, b'')
+
+    return route
+
+
+def child(scenario: str, path: str, url: str, chunk_size: int) -> None:
+    from Mattermost_Base import create_session
+    from mm_uploads_api import Uploads
+
+    uploads = Uploads('token', url, session=create_session())
+    size = os.path.getsize(path)
+    upload_id = uploads.create_upload('channel', 'payload.bin', size)['id']
+    baseline = rss_anon()
+    sampler = PeakSampler()
+    sampler.start()
+    started = time.perf_counter()
+    if scenario == 'read':
+        with open(path, 'rb') as f:
+            uploads.perform_file_upload(upload_id, data=f.read())
+    elif scenario == 'multipart':
+        uploads.perform_file_upload(upload_id, file_path=path)
+    else:
+        uploads.upload_file('channel', path, upload_id=upload_id, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({'elapsed': elapsed, 'peak': sampler.stop() - baseline}))
+
+
+SCENARIOS = {
+    'read': 'read() into bytes',
+    'multipart': 'multipart, mapped',
+    'session': 'upload session',
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1024, 2048], help="MiB")
+    parser.add_argument('--chunk-size', type=int, default=8, help="upload session chunk, MiB")
+    parser.add_argument('--child', nargs=3, metavar=('SCENARIO', 'PATH', 'URL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, chunk_size=args.chunk_size * MiB)
+        return
+
+    with StubServer(uploads_route()) as server, tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f'{size}.bin')
+            with open(path, 'wb') as f:
+                f.truncate(size * MiB)
+            for scenario, label in SCENARIOS.items():
+                output = subprocess.run([sys.executable, __file__, '--chunk-size', str(args.chunk_size),
+                                         '--child', scenario, path, server.url],
+                                        check=True, capture_output=True, text=True).stdout
+                result = json.loads(output)
+                print(f"{size:6d} MiB {label:>18}: {size / result['elapsed']:7.0f} MiB/s, "
+                      f"peak +{result['peak'] / MiB:7.1f} MiB")
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Resolving the root posts of many replies: one get_post per reply (N+1) versus PostLoader batching.
+
+    python benchmarks/bench_post_loader.py [--lookups 1000] [--distinct 300] [--workers 32]
+                                           [--latency 0.005]
+
+Every lookup asks for one of --distinct root posts, as replies in a busy channel do.
+The stub server adds --latency seconds to every request. Scenarios:
+- naive, sequential: one get_post per lookup, one after another;
+- naive, threaded: the same calls from a pool of --workers threads;
+- loader, threaded: the threads call PostLoader.get, which merges concurrent lookups
+  into /posts/ids requests of up to 100 distinct ids;
+- loader, get_many: one thread hands all ids to PostLoader.get_many.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import random
+import threading
+import time
+
+from _stub import StubServer
+
+from Mattermost_Base import create_session
+from mm_post_loader import PostLoader
+from mm_posts_api import Posts
+
+
+class Counter:
+    def __init__(self):
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def route(self, method, path, query, body, handler):
+        with self._lock:
+            self.requests += 1
+        if path == '/api/v4/posts/ids':
+            return 200, {}, [{'id': post_id, 'message': f'root {post_id}'} for post_id in json.loads(body)]
+        post_id = path.rsplit('/', 1)[-1]
+        return 200, {}, {'id': post_id, 'message': f'root {post_id}'}
+
+
+def naive_sequential(posts: Posts, ids: list, workers: int) -> None:
+    for post_id in ids:
+        posts.get_post(post_id)
+
+
+def naive_threaded(posts: Posts, ids: list, workers: int) -> None:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(posts.get_post, ids))
+
+
+def loader_threaded(posts: Posts, ids: list, workers: int) -> None:
+    with PostLoader(posts) as loader, ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(loader.get, ids))
+
+
+def loader_get_many(posts: Posts, ids: list, workers: int) -> None:
+    with PostLoader(posts) as loader:
+        loader.get_many(ids)
+
+
+SCENARIOS = {
+    'naive, sequential': naive_sequential,
+    'naive, threaded': naive_threaded,
+    'loader, threaded': loader_threaded,
+    'loader, get_many': loader_get_many,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lookups', type=int, default=1000)
+    parser.add_argument('--distinct', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--latency', type=float, default=0.005, help="added to every request, seconds")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    ids = [f'root{rng.randrange(args.distinct):026d}' for _ in range(args.lookups)]
+    counter = Counter()
+    with StubServer(counter.route, latency=args.latency) as server:
+        posts = Posts('token', server.url, session=create_session(pool_maxsize=args.workers))
+        for name, scenario in SCENARIOS.items():
+            counter.requests = 0
+            started = time.perf_counter()
+            scenario(posts, ids, args.workers)
+            elapsed = time.perf_counter() - started
+            print(f"{name:>18}: {elapsed:6.2f} s, {counter.requests:5d} requests "
+                  f"({args.lookups / elapsed:7.0f} lookups/s)")
+
+
+if __name__ == '__main__':
+    main()
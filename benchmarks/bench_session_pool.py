@@ -0,0 +1,53 @@
+"""
+Per-call latency of a pooled keep-alive session versus unpooled requests.
+
+    python benchmarks/bench_session_pool.py [--calls 500] [--latency 0.0]
+
+Three setups make the same sequence of GET requests against a local stub server:
+- pooled: one shared session from create_session(), connections are reused;
+- no keep-alive: the shared session sends "Connection: close", every call reconnects;
+- unpooled: a new requests.Session per call, as before the session was shared.
+Against a real server every reconnect also pays the TLS handshake, so the gap grows.
+"""
+import argparse
+import time
+
+from _stub import StubServer, echo, summary
+
+import requests
+from Mattermost_Base import create_session
+from mm_bots_api import Bots
+
+
+def run(url: str, calls: int, session_factory) -> list:
+    samples = []
+    shared = session_factory()
+    for _ in range(calls):
+        bots = Bots('token', url, session=shared if shared is not None else requests.Session())
+        started = time.perf_counter()
+        bots.get_bot('bot')
+        samples.append(time.perf_counter() - started)
+        if shared is None:
+            bots.session.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0, help="server think time per request, seconds")
+    args = parser.parse_args()
+
+    setups = {
+        'pooled': lambda: create_session(),
+        'no keep-alive': lambda: create_session(keep_alive=False),
+        'unpooled': lambda: None,
+    }
+    with StubServer(echo, latency=args.latency) as server:
+        for name, factory in setups.items():
+            run(server.url, 20, factory)  # warm up
+            print(f"{name:>14}: {summary(run(server.url, args.calls, factory))}")
+
+
+if __name__ == '__main__':
+    main()
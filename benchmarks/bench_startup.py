@@ -0,0 +1,64 @@
+"""
+Startup cost of the client facades: lazy sub-client loading versus importing every API module.
+
+    python benchmarks/bench_startup.py [--runs 20]
+
+Every scenario runs in a fresh interpreter, so module caches do not carry over;
+the time of a bare interpreter start is subtracted. The "eager" scenarios import
+all API modules up front, which is what the facades did before loading became lazy.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from _stub import PACKAGE_DIR
+
+API_MODULES = ('mm_uploads_api', 'mm_bleve_api', 'mm_compliance_api', 'mm_elasticsearch_api', 'mm_exports_api',
+               'mm_imports_api', 'mm_int_actions_api', 'mm_opengraph_api', 'mm_permissions_api',
+               'mm_terms_of_service_api', 'mm_usage_api', 'mm_shared_channels_api', 'mm_threads_api',
+               'mm_posts_api', 'mm_bots_api')
+
+EAGER = '; '.join(f'import {module}' for module in API_MODULES)
+
+SCENARIOS = {
+    'bare interpreter': 'pass',
+    'sync: import + one sub-client': "import mattermost; mattermost.MattermostAPI('t', 'http://localhost').posts",
+    'sync: eager, all API modules': f"import mattermost; {EAGER}; mattermost.MattermostAPI('t', 'http://localhost')",
+    'async: import + one sub-client': ("import asyncio, mattermost_async\n"
+                                       "async def main():\n"
+                                       "    api = mattermost_async.AsyncMattermostAPI('t', 'http://localhost')\n"
+                                       "    api.posts\n"
+                                       "    await api.close()\n"
+                                       "asyncio.run(main())"),
+    'async: eager, all API modules': f"import asyncio, mattermost_async; {EAGER}",
+}
+
+
+def measure(code: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=PACKAGE_DIR, check=True)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    bare = None
+    for name, code in SCENARIOS.items():
+        elapsed = measure(code, args.runs)
+        if bare is None:
+            bare = elapsed
+            print(f"{name:>32}: {elapsed * 1000:7.1f} ms")
+        else:
+            print(f"{name:>32}: {(elapsed - bare) * 1000:7.1f} ms over bare interpreter")
+
+
+if __name__ == '__main__':
+    main()
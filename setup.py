@@ -28,5 +28,9 @@ install_requires = [
     'requests'
 ]
 
+extras_require = {
+    'async': ['aiohttp'],
+}
+
 if __name__ == '__main__':
-    setup(**setup_args, install_requires=install_requires)
+    setup(**setup_args, install_requires=install_requires, extras_require=extras_require)
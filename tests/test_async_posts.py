@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+
+from Mattermost_Errors import NotFoundError
+from mattermost_async import AsyncMattermostAPI
+from mm_post_store import PostStore
+
+
+def post(post_id: str, **fields) -> dict:
+    return {'id': post_id, 'channel_id': 'channel', 'message': f'message {post_id}', 'create_at': 1, **fields}
+
+
+def server(requests: list):
+    def route(method, path, query, body):
+        requests.append((method, path))
+        if path == '/api/v4/posts':
+            return 201, post('created')
+        if path == '/api/v4/posts/ids':
+            return 200, [post('p2')]
+        if path == '/api/v4/channels/channel/posts':
+            return 200, {'order': ['p1', 'p2'], 'posts': {'p1': post('p1'), 'p2': post('p2')}}
+        if method == 'DELETE':
+            return 200, {'status': 'OK'}
+        return 200, post(path.rsplit('/', 1)[-1])
+
+    return route
+
+
+def test_async_posts_without_store(stub_server):
+    url = stub_server(server([]))
+
+    async def main():
+        async with AsyncMattermostAPI('token', url) as api:
+            created = await api.posts.create_post('channel', 'hello')
+            fetched = await api.posts.get_post('p1')
+            post_list = await api.posts.get_posts_for_channel('channel')
+            deleted = await api.posts.delete_post('p1')
+            return created, fetched, post_list, deleted
+
+    created, fetched, post_list, deleted = asyncio.run(main())
+    assert created['id'] == 'created'
+    assert fetched['id'] == 'p1'
+    assert post_list['order'] == ['p1', 'p2']
+    assert deleted == {'status': 'OK'}
+
+
+def test_async_posts_read_through_store(stub_server):
+    requests = []
+    url = stub_server(server(requests))
+    store = PostStore(':memory:')
+
+    async def main():
+        async with AsyncMattermostAPI('token', url, post_store=store) as api:
+            await api.posts.get_posts_for_channel('channel')
+            # both posts are answered from the store now
+            fetched = await api.posts.get_post('p1')
+            listed = await api.posts.get_posts_by_list_of_ids(['p1', 'p2'])
+            await api.posts.delete_post('p1')
+            with pytest.raises(NotFoundError):
+                await api.posts.get_post('p1')
+            return fetched, listed
+
+    fetched, listed = asyncio.run(main())
+    assert fetched['id'] == 'p1'
+    assert [item['id'] for item in listed] == ['p1', 'p2']
+    assert requests == [('GET', '/api/v4/channels/channel/posts'), ('DELETE', '/api/v4/posts/p1')]
+    assert store.get('p1')['delete_at']
+
+
+def test_sub_clients_can_be_created_outside_the_event_loop(stub_server):
+    url = stub_server(server([]))
+    api = AsyncMattermostAPI('token', url)
+    posts, bots = api.posts, api.bots
+
+    async def main():
+        try:
+            await posts.get_post('p1')
+            await bots.get_bot('bot')
+            return posts.session, bots.session, api.session
+        finally:
+            await api.close()
+
+    posts_session, bots_session, shared = asyncio.run(main())
+    assert posts_session is bots_session is shared
+
+
+def test_response_is_kept_per_task(stub_server):
+    def route(method, path, query, body):
+        bot_id = path.rsplit('/', 1)[-1]
+        if bot_id == 'slow':
+            time.sleep(0.2)
+        return 200, {'user_id': bot_id}
+
+    url = stub_server(route)
+
+    async def fetch(bots, bot_id):
+        await bots.get_bot(bot_id)
+        await asyncio.sleep(0.3)
+        return bots.response.url.rsplit('/', 1)[-1]
+
+    async def main():
+        async with AsyncMattermostAPI('token', url) as api:
+            return await asyncio.gather(fetch(api.bots, 'slow'), fetch(api.bots, 'fast'))
+
+    assert asyncio.run(main()) == ['slow', 'fast']
+
+
+def test_async_iterators_page_through_results(stub_server):
+    channel_posts = [post(f'p{i}', create_at=i) for i in range(5)]
+
+    def route(method, path, query, body):
+        if path == '/api/v4/bots':
+            page, per_page = int(query['page'][0]), int(query['per_page'][0])
+            return 200, [{'user_id': f'bot{i}'} for i in range(5)][page * per_page:(page + 1) * per_page]
+        # newest first, before the given post
+        newest = channel_posts[::-1]
+        if 'before' in query:
+            newest = newest[[item['id'] for item in newest].index(query['before'][0]) + 1:]
+        page = newest[:int(query['per_page'][0])]
+        return 200, {'order': [item['id'] for item in page], 'posts': {item['id']: item for item in page}}
+
+    url = stub_server(route)
+
+    async def main():
+        async with AsyncMattermostAPI('token', url) as api:
+            bots = [bot['user_id'] async for bot in api.bots.iter_bots(per_page=2, prefetch=1)]
+            posts = [item['id'] async for item in api.posts.iter_posts_for_channel('channel', per_page=2)]
+            return bots, posts
+
+    bots, posts = asyncio.run(main())
+    assert bots == ['bot0', 'bot1', 'bot2', 'bot3', 'bot4']
+    assert posts == ['p4', 'p3', 'p2', 'p1', 'p0']
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from Mattermost_Base import create_session
+from mm_attachments import AttachmentPublisher, AttachmentError
+from mm_posts_api import Posts
+from mm_upload_cache import UploadCache
+from mm_uploads_api import Uploads
+
+
+def server(uploads: list):
+    def route(method, path, query, body):
+        if path == '/api/v4/uploads':
+            upload_id = f'upload{len(uploads)}'
+            uploads.append(upload_id)
+            return 201, {'id': upload_id, 'file_offset': 0, 'file_size': json.loads(body)['file_size']}
+        if path.startswith('/api/v4/uploads/'):
+            return 201, {'id': f"file-{path.rsplit('/', 1)[-1]}"}
+        return 403, {'id': 'api.context.permissions.app_error', 'message': 'no permission'}
+
+    return route
+
+
+def test_failed_publish_releases_uploaded_files_to_the_cache(stub_server, tmp_path):
+    uploads = []
+    url = stub_server(server(uploads))
+    session = create_session()
+    cache = UploadCache(':memory:')
+    pipeline = AttachmentPublisher(Uploads('token', url, cache=cache, session=session),
+                                   Posts('token', url, session=session))
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'file{i}.txt'
+        path.write_bytes(f'content {i}'.encode())
+        paths.append(path if i % 2 else str(path))
+
+    with pytest.raises(AttachmentError):
+        pipeline.publish('channel', paths, message='files')
+    assert cache.stats()['available'] == 3
+
+    # the next attempt reuses the uploads instead of sending the files again
+    with pytest.raises(AttachmentError):
+        pipeline.publish('channel', paths, message='files')
+    assert len(uploads) == 3
+
+
+def test_reply_thread_keeps_message_and_props_on_the_first_post(stub_server, tmp_path):
+    created = []
+
+    def route(method, path, query, body):
+        if path == '/api/v4/uploads':
+            return 201, {'id': 'upload', 'file_offset': 0}
+        if path == '/api/v4/uploads/upload':
+            return 201, {'id': f'file-{body.decode()}'}
+        post = json.loads(body)
+        created.append(post)
+        return 201, dict(post, id=f'post{len(created)}')
+
+    url = stub_server(route)
+    session = create_session()
+    pipeline = AttachmentPublisher(Uploads('token', url, session=session), Posts('token', url, session=session),
+                                   max_workers=1)
+    paths = []
+    for i in range(7):
+        path = tmp_path / f'file{i}.txt'
+        path.write_bytes(f'content {i}'.encode())
+        paths.append(path)
+
+    result = pipeline.publish('channel', paths, message='files', root_id='root', props={'kind': 'report'})
+
+    assert result.root_id == 'root'
+    assert [len(post['file_ids']) for post in created] == [5, 2]
+    assert [post['root_id'] for post in created] == ['root', 'root']
+    assert created[0]['message'] == 'files' and created[0]['props'] == {'kind': 'report'}
+    assert created[1]['message'] == '' and 'props' not in created[1]
@@ -0,0 +1,37 @@
+import mm_channel_sync
+from Mattermost_Base import create_session
+from mm_channel_sync import ChannelSync
+from mm_posts_api import Posts
+
+
+def post(n: int, **fields) -> dict:
+    return {'id': f'post{n}', 'channel_id': 'channel', 'create_at': n, 'update_at': n, **fields}
+
+
+def test_truncated_since_answer_is_paged_with_deleted_posts(stub_server, monkeypatch):
+    monkeypatch.setattr(mm_channel_sync, 'SINCE_LIMIT', 2)
+    queries = []
+    # post1 is older than the since answer and was deleted after the previous sync
+    channel = {1: post(1, update_at=50, delete_at=50), 2: post(2), 3: post(3, update_at=40), 4: post(4, update_at=45)}
+
+    def route(method, path, query, body):
+        queries.append(query)
+        include_deleted = query.get('include_deleted') == ['true']
+        visible = [n for n in sorted(channel, reverse=True) if include_deleted or not channel[n].get('delete_at')]
+        if 'since' in query:
+            visible = [4, 3]
+        elif 'before' in query:
+            visible = [n for n in visible if n < int(query['before'][0][len('post'):])]
+        elif 'after' in query:
+            visible = [n for n in visible if n > int(query['after'][0][len('post'):])]
+        return 200, {'order': [f'post{n}' for n in visible], 'posts': {f'post{n}': channel[n] for n in visible}}
+
+    url = stub_server(route)
+    sync = ChannelSync(Posts('token', url, session=create_session()), include_deleted=True)
+    sync.state['channel'] = {'since': 10, 'last_post_id': 'post2', 'last_create_at': 2}
+
+    changed = {item['id'] for item in sync.sync('channel')}
+
+    assert changed == {'post1', 'post3', 'post4'}
+    paged = [query for query in queries if 'since' not in query]
+    assert paged and all(query['include_deleted'] == ['true'] for query in paged)
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from Mattermost_CircuitBreaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from Mattermost_Errors import CircuitOpenError, NotFoundError
+from Mattermost_RateLimit import RateLimiter
+from mattermost_async import AsyncMattermostAPI
+from mm_bots_api import Bots
+
+
+def opened(breaker: CircuitBreaker, url: str) -> tuple:
+    key = breaker.key(url)
+    breaker.record(key, success=False)
+    return key
+
+
+def test_circuit_opens_after_consecutive_failures_and_rejects_requests():
+    changes = []
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60,
+                             on_state_change=lambda key, old, new: changes.append((old, new)))
+    key = breaker.key('http://server/api/v4/posts/abc')
+    assert key == ('server', 'posts')
+
+    breaker.record(key, success=False)
+    breaker.record(key, success=False)
+    # a success resets the count of consecutive failures
+    breaker.record(key, success=True)
+    for _ in range(3):
+        breaker.before(key)
+        breaker.record(key, success=False)
+    assert breaker.state(key) == OPEN
+    assert changes == [(CLOSED, OPEN)]
+
+    with pytest.raises(CircuitOpenError) as raised:
+        breaker.before(key)
+    assert 0 < raised.value.retry_in <= 60
+    assert breaker.stats()[key]['rejected'] == 1
+    # other endpoint groups are not affected
+    breaker.before(breaker.key('http://server/api/v4/users/me'))
+
+
+def test_half_open_circuit_lets_one_probe_through():
+    changes = []
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0,
+                             on_state_change=lambda key, old, new: changes.append((old, new)))
+    key = opened(breaker, 'http://server/api/v4/posts')
+
+    breaker.before(key)
+    assert breaker.state(key) == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before(key)
+
+    # a failed probe opens the circuit again, a successful one closes it
+    breaker.record(key, success=False)
+    assert breaker.state(key) == OPEN
+    breaker.before(key)
+    breaker.record(key, success=True)
+    assert breaker.state(key) == CLOSED
+    assert changes == [(CLOSED, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, OPEN), (OPEN, HALF_OPEN), (HALF_OPEN, CLOSED)]
+
+
+def test_released_probe_frees_its_slot():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    key = opened(breaker, 'http://server/api/v4/posts')
+
+    breaker.before(key)
+    breaker.release(key)
+    # the outcome of a released probe is unknown, so the circuit stays half-open
+    assert breaker.state(key) == HALF_OPEN
+    breaker.before(key)
+    breaker.record(key, success=True)
+    assert breaker.state(key) == CLOSED
+
+
+def test_client_errors_do_not_open_the_circuit(stub_server):
+    def route(method, path, query, body):
+        return 404, {'id': 'app.bot.get.app_error', 'message': 'not found'}
+
+    breaker = CircuitBreaker(failure_threshold=1)
+    bots = Bots('token', stub_server(route), circuit_breaker=breaker)
+    for _ in range(3):
+        with pytest.raises(NotFoundError):
+            bots.get_bot('bot')
+    assert breaker.state(breaker.key(f'{bots.api_url}/bot')) == CLOSED
+
+
+def test_probe_is_not_taken_while_waiting_for_the_rate_limiter():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    limiter = RateLimiter(rate=1)
+    # the bucket is empty, so the next request waits about a second
+    limiter.acquire()
+
+    async def main():
+        async with AsyncMattermostAPI('token', 'http://127.0.0.1:9', rate_limiter=limiter,
+                                      circuit_breaker=breaker) as api:
+            key = opened(breaker, f'{api.bots.api_url}/bot')
+            task = asyncio.create_task(api.bots.get_bot('bot'))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return key
+
+    key = asyncio.run(main())
+    assert breaker._circuits[key].probes == 0
+    # the next request may still probe the server
+    breaker.before(key)
+    assert breaker._circuits[key].state == HALF_OPEN
+
+
+def test_interrupted_probe_is_released():
+    class InterruptedSession:
+        def request(self, **kwargs):
+            raise KeyboardInterrupt
+
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    bots = Bots('token', 'http://127.0.0.1:9', session=InterruptedSession(), circuit_breaker=breaker)
+    key = opened(breaker, f'{bots.api_url}/bot')
+
+    with pytest.raises(KeyboardInterrupt):
+        bots.get_bot('bot')
+    assert breaker._circuits[key].state == HALF_OPEN
+    assert breaker._circuits[key].probes == 0
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+
+from Mattermost_Base import create_session
+from Mattermost_Errors import NotFoundError, MattermostConnectionError
+from Mattermost_Files import DownloadSink
+from Mattermost_Retry import RetryPolicy
+from mattermost_async import AsyncMattermostAPI
+from mm_bots_api import Bots
+
+
+PAYLOAD = {'data': 'x' * 1000}
+
+
+def server(requests: list):
+    def route(method, path, query, body):
+        requests.append(path)
+        if path == '/missing':
+            return 404, {'id': 'app.file.not_found', 'message': 'not found'}
+        return 200, PAYLOAD
+
+    return route
+
+
+def test_failed_download_leaves_no_part_file(stub_server, tmp_path):
+    url = stub_server(server([]))
+    client = Bots('token', url, session=create_session())
+    target = tmp_path / 'file.bin'
+
+    with pytest.raises(NotFoundError):
+        client.download(f'{url}/missing', target)
+    assert list(tmp_path.iterdir()) == []
+
+    assert client.download(f'{url}/file', target)['size'] == len(json.dumps(PAYLOAD))
+    assert json.loads(target.read_bytes()) == PAYLOAD
+    assert list(tmp_path.iterdir()) == [target]
+
+
+def test_async_download_waits_for_the_concurrency_limit(stub_server, tmp_path):
+    requests = []
+    url = stub_server(server(requests))
+
+    async def main():
+        async with AsyncMattermostAPI('token', url, max_concurrency=1) as api:
+            with pytest.raises(NotFoundError):
+                await api.bots.download(f'{url}/missing', tmp_path / 'missing.bin')
+            async with api.semaphore:
+                task = asyncio.create_task(api.bots.download(f'{url}/file', tmp_path / 'file.bin'))
+                await asyncio.sleep(0.2)
+                assert requests == ['/missing']
+            return await task
+
+    assert asyncio.run(main())['size'] == len(json.dumps(PAYLOAD))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['file.bin']
+
+
+def test_async_download_retries_network_errors_by_the_policy(tmp_path):
+    policy = RetryPolicy(max_retries=2, backoff=0)
+
+    async def main():
+        # nothing listens on the discard port, so every connection is refused
+        async with AsyncMattermostAPI('token', 'http://127.0.0.1:9', retry_policy=policy) as api:
+            with pytest.raises(MattermostConnectionError):
+                await api.bots.download('http://127.0.0.1:9/file', tmp_path / 'file.bin', max_resumes=1)
+
+    asyncio.run(main())
+    # the first request and one resume, each retried twice
+    assert policy.stats()['retries'] == 4
+
+
+def test_range_validator_survives_between_calls(tmp_path):
+    target = tmp_path / 'file.bin'
+    with DownloadSink(target) as sink:
+        sink.begin(200, {'ETag': '"v1"', 'Content-Length': '8'})
+        sink.write(b'1234')
+
+    sink = DownloadSink(target)
+    assert sink.request_headers() == {'Range': 'bytes=4-', 'If-Range': '"v1"'}
+    assert sink.begin(206, {'ETag': '"v1"', 'Content-Range': 'bytes 4-7/8'})
+    sink.write(b'5678')
+    sink.finish(size=8)
+    assert target.read_bytes() == b'12345678'
+    assert list(tmp_path.iterdir()) == [target]
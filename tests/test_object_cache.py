@@ -0,0 +1,47 @@
+from Mattermost_Base import create_session
+from Mattermost_Cache import ETagCache, ObjectCache
+from mm_bots_api import Bots
+
+
+def counting(name: str, requests: list):
+    def route(method, path, query, body):
+        requests.append((name, path))
+        return 200, {'user_id': 'bot', 'server': name}
+
+    return route
+
+
+def test_object_cache_is_not_shared_between_tokens_and_servers(stub_server):
+    requests = []
+    first = stub_server(counting('first', requests))
+    second = stub_server(counting('second', requests))
+    cache = ObjectCache()
+    session = create_session()
+
+    alice = Bots('alice-token', first, session=session, object_cache=cache)
+    bob = Bots('bob-token', first, session=session, object_cache=cache)
+    elsewhere = Bots('alice-token', second, session=session, object_cache=cache)
+
+    assert alice.get_bot('bot')['server'] == 'first'
+    assert alice.get_bot('bot')['server'] == 'first'
+    assert bob.get_bot('bot')['server'] == 'first'
+    assert elsewhere.get_bot('bot')['server'] == 'second'
+    assert requests == [('first', '/api/v4/bots/bot'), ('first', '/api/v4/bots/bot'), ('second', '/api/v4/bots/bot')]
+
+    # invalidation by resource still reaches every variant
+    alice.disable_bot('bot')
+    bob.get_bot('bot')
+    assert len(requests) == 5
+
+
+def test_etag_cache_is_not_shared_between_tokens():
+    cache = ETagCache()
+    alice = Bots('alice-token', 'http://localhost', etag_cache=cache)
+    bob = Bots('bob-token', 'http://localhost', etag_cache=cache)
+
+    key, cached = alice.etag_lookup(alice.build_request(f'{alice.api_url}/bot'))
+    assert cached is None
+    alice.etag_store(key, '"v1"', b'{"user_id": "bot", "owner": "alice"}')
+
+    assert alice.etag_lookup(alice.build_request(f'{alice.api_url}/bot'))[1].etag == '"v1"'
+    assert bob.etag_lookup(bob.build_request(f'{bob.api_url}/bot'))[1] is None
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from Mattermost_Errors import RateLimitError
+from Mattermost_RateLimit import RateLimiter
+from mm_bots_api import Bots
+
+
+def test_requests_are_not_delayed_while_the_limits_are_unknown():
+    limiter = RateLimiter()
+    assert [limiter.acquire() for _ in range(100)] == [0.0] * 100
+    assert limiter.effective_rate() is None
+
+
+def test_limits_are_learned_from_the_headers():
+    limiter = RateLimiter()
+    limiter.update(200, {'X-RateLimit-Limit': '10', 'X-RateLimit-Remaining': '5', 'X-RateLimit-Reset': '1'})
+
+    # the bucket refills from remaining to limit in reset seconds
+    assert limiter.limit == 10
+    assert limiter.learned_rate == 5
+    assert limiter.effective_rate() == 5 * limiter.headroom
+    # only the remaining requests, less the headroom, are sent without a delay
+    delays = [limiter.acquire() for _ in range(6)]
+    assert delays[:4] == [0.0] * 4
+    assert 0 < delays[4] < delays[5]
+
+
+def test_configured_rate_takes_precedence_over_the_headers():
+    limiter = RateLimiter(rate=100)
+    limiter.update(200, {'X-RateLimit-Limit': '10', 'X-RateLimit-Remaining': '5', 'X-RateLimit-Reset': '1'})
+    assert limiter.effective_rate() == 100 * limiter.headroom
+
+
+def test_429_pauses_sending_for_retry_after():
+    limiter = RateLimiter()
+    assert limiter.update(429, {'Retry-After': '2'})
+    assert 1.9 < limiter.acquire() <= 2
+    assert limiter.stats()['rejected'] == 1
+    assert not limiter.update(200, {})
+
+
+def test_request_rejected_with_429_is_sent_again_after_retry_after(stub_server):
+    requests = []
+
+    def route(method, path, query, body):
+        requests.append(time.monotonic())
+        if len(requests) == 1:
+            return 429, {'id': 'api.context.rate_limit', 'message': 'too many requests'}, {'Retry-After': '0.2'}
+        return 200, {'user_id': 'bot'}
+
+    limiter = RateLimiter()
+    bots = Bots('token', stub_server(route), rate_limiter=limiter)
+
+    assert bots.get_bot('bot') == {'user_id': 'bot'}
+    assert len(requests) == 2
+    assert requests[1] - requests[0] >= 0.2
+    assert limiter.stats()['rejected'] == 1
+
+
+def test_429_is_not_retried_more_than_max_retries(stub_server):
+    requests = []
+
+    def route(method, path, query, body):
+        requests.append(path)
+        return 429, {'id': 'api.context.rate_limit', 'message': 'too many requests'}, {'Retry-After': '0.01'}
+
+    bots = Bots('token', stub_server(route), rate_limiter=RateLimiter(max_retries=2))
+    with pytest.raises(RateLimitError):
+        bots.get_bot('bot')
+    assert len(requests) == 3
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import aiohttp
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from Mattermost_Retry import RetryPolicy, classify_error, classify_status
+from mm_bots_api import Bots
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Mattermost-API')
+
+
+def test_sync_client_does_not_import_aiohttp():
+    code = "import sys, mattermost; print('aiohttp' in sys.modules)"
+    output = subprocess.run([sys.executable, '-c', code], cwd=PACKAGE_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    assert output.strip() == 'False'
+
+
+def test_errors_are_classified_by_whether_the_request_reached_the_server():
+    refused = requests.ConnectionError(MaxRetryError(None, '/', NewConnectionError(None, 'refused')))
+    assert classify_error(refused) == 'connect'
+    assert classify_error(requests.ConnectTimeout()) == 'connect'
+    assert classify_error(requests.ConnectionError(ProtocolError('connection aborted'))) == 'connection'
+    assert classify_error(requests.ReadTimeout()) == 'timeout'
+    assert classify_error(aiohttp.ServerDisconnectedError()) == 'connection'
+    assert classify_error(asyncio.TimeoutError()) == 'timeout'
+    assert classify_error(ValueError('not a network error')) is None
+
+
+def test_statuses_are_classified():
+    assert [classify_status(status) for status in (200, 304, 404, 429, 500, 503)] == \
+           [None, None, 'client', 'rate_limit', 'server', 'server']
+
+
+def test_only_safe_failures_of_non_idempotent_requests_are_retried():
+    policy = RetryPolicy(backoff=0)
+    assert policy.retry_delay('POST', 0, error=requests.ConnectTimeout()) is not None
+    assert policy.retry_delay('POST', 0, status=429) is not None
+    assert policy.retry_delay('POST', 0, error=requests.ReadTimeout()) is None
+    assert policy.retry_delay('POST', 0, status=503) is None
+    assert policy.retry_delay('GET', 0, error=requests.ReadTimeout()) is not None
+    assert policy.retry_delay('GET', 0, status=503) is not None
+    assert policy.retry_delay('GET', 0, status=501) is None
+    assert policy.retry_delay('GET', 0, status=404) is None
+
+
+def test_retries_stop_after_max_retries():
+    policy = RetryPolicy(max_retries=2, backoff=0)
+    delays = [policy.retry_delay('GET', attempt, status=503) for attempt in range(3)]
+    assert delays[:2] == [0, 0] and delays[2] is None
+    assert policy.stats()['gave_up'] == 1
+
+
+def test_retry_budget_limits_retries_during_an_outage():
+    policy = RetryPolicy(backoff=0, budget_ratio=0.5, budget_max=2)
+    # the full budget allows two retries, each new request adds half a retry
+    assert [policy.retry_delay('GET', 1, status=503) for _ in range(3)] == [0, 0, None]
+    assert policy.retry_delay('GET', 0, status=503) is None
+    assert policy.retry_delay('GET', 0, status=503) == 0
+    stats = policy.stats()
+    assert stats['retries'] == 3 and stats['budget_exhausted'] == 2
+    assert stats['retries_by_kind'] == {'server': 3}
+
+
+def test_dropped_connections_are_retried_by_the_client(stub_server):
+    requests_seen = []
+
+    def route(method, path, query, body):
+        requests_seen.append(path)
+        if len(requests_seen) < 3:
+            raise ConnectionAbortedError("connection dropped")
+        return 200, {'user_id': 'bot'}
+
+    policy = RetryPolicy(backoff=0)
+    bots = Bots('token', stub_server(route), retry_policy=policy)
+    assert bots.get_bot('bot') == {'user_id': 'bot'}
+    assert len(requests_seen) == 3
+    assert policy.stats()['retries'] == 2
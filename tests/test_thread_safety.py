@@ -0,0 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import random
+import time
+
+from Mattermost_Base import create_session
+from mm_posts_api import Posts
+
+
+WORKERS = 32
+CALLS = 1000
+
+
+def echo(method, path, query, body):
+    # a random pause interleaves the calls of different threads
+    time.sleep(random.uniform(0, 0.002))
+    return 200, {'method': method, 'path': path, 'query': query, 'json': json.loads(body) if body else None}
+
+
+def test_shared_posts_client_keeps_payloads_apart(stub_server):
+    url = stub_server(echo)
+    posts = Posts('token', url, session=create_session(pool_maxsize=WORKERS))
+
+    def create(i: int) -> tuple:
+        return i, posts.create_post(f'channel-{i}', f'message {i}', root_id=f'root-{i}', props={'n': i})
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        results = list(executor.map(create, range(CALLS)))
+
+    for i, response in results:
+        assert response['method'] == 'POST'
+        assert response['path'] == '/api/v4/posts'
+        assert response['json'] == {'channel_id': f'channel-{i}',
+                                    'message': f'message {i}',
+                                    'root_id': f'root-{i}',
+                                    'props': {'n': i}}
+
+
+def test_shared_posts_client_keeps_query_params_and_urls_apart(stub_server):
+    url = stub_server(echo)
+    posts = Posts('token', url, session=create_session(pool_maxsize=WORKERS))
+
+    def call(i: int) -> tuple:
+        if i % 2:
+            return i, posts.patch_post(f'post-{i}', message=f'edit {i}')
+        return i, posts.get_posts_for_channel(f'channel-{i}', page=i, per_page=i % 200 + 1)
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        results = list(executor.map(call, range(CALLS)))
+
+    for i, response in results:
+        if i % 2:
+            assert (response['method'], response['path']) == ('PUT', f'/api/v4/posts/post-{i}/patch')
+            assert response['json'] == {'message': f'edit {i}'}
+            assert response['query'] == {}
+        else:
+            assert (response['method'], response['path']) == ('GET', f'/api/v4/channels/channel-{i}/posts')
+            assert response['query'] == {'page': [str(i)], 'per_page': [str(i % 200 + 1)]}
+            assert response['json'] is None
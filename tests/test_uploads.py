@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+import mm_uploads_api
+from Mattermost_Base import create_session
+from Mattermost_CircuitBreaker import CircuitBreaker
+from Mattermost_Errors import CircuitOpenError
+from mattermost_async import AsyncMattermostAPI
+from mm_uploads_api import Uploads
+
+
+CHUNK = 1024
+
+
+class UploadServer:
+    def __init__(self, file_size: int, drops: int = 1):
+        # every dropped chunk is half stored before the connection breaks
+        self.file_size = file_size
+        self.drops = drops
+        self.received = bytearray()
+        self.requests = []
+
+    def route(self, method, path, query, body):
+        self.requests.append((method, path))
+        if path == '/api/v4/uploads':
+            return 201, {'id': 'upload', 'file_offset': 0}
+        if method == 'GET':
+            return 200, {'id': 'upload', 'file_offset': len(self.received)}
+        if self.drops and self.received:
+            self.drops -= 1
+            self.received += body[:len(body) // 2]
+            raise ConnectionAbortedError("connection dropped")
+        self.received += body
+        if len(self.received) >= self.file_size:
+            return 201, {'id': 'file', 'size': len(self.received)}
+        return 200, {}
+
+
+@pytest.fixture
+def payload(tmp_path, monkeypatch):
+    monkeypatch.setattr(mm_uploads_api, 'RESUME_BACKOFF', 0.001)
+    data = bytes(range(256)) * (3 * CHUNK // 256 + 1)
+    path = tmp_path / 'payload.bin'
+    path.write_bytes(data)
+    return str(path), data
+
+
+def test_async_upload_file_resumes_after_a_dropped_chunk(stub_server, payload):
+    path, data = payload
+    server = UploadServer(len(data))
+    url = stub_server(server.route)
+
+    async def main():
+        async with AsyncMattermostAPI('token', url) as api:
+            return await api.uploads.upload_file('channel', path, chunk_size=CHUNK)
+
+    assert asyncio.run(main()) == {'id': 'file', 'size': len(data)}
+    assert bytes(server.received) == data
+    assert ('GET', '/api/v4/uploads/upload') in server.requests
+
+
+def test_upload_file_stops_resuming_while_the_circuit_is_open(stub_server, payload):
+    path, data = payload
+    server = UploadServer(len(data), drops=100)
+    url = stub_server(server.route)
+    uploads = Uploads('token', url, session=create_session(),
+                      circuit_breaker=CircuitBreaker(failure_threshold=1))
+
+    with pytest.raises(CircuitOpenError):
+        uploads.upload_file('channel', path, chunk_size=CHUNK, max_resumes=100)
+    # create, the first chunk and the dropped one: nothing is sent once the circuit opens
+    assert len(server.requests) == 3